@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de l'extraction des blocs de code sur des sorties d'agents synthétiques.
+
+Mesure le débit de scan_code_blocks sur des sorties de 1 à 50 Mo et vérifie
+que le temps reste linéaire en fonction de la taille. Le cas d'un bloc jamais
+fermé, qui faisait dégénérer les anciennes expressions régulières, est inclus.
+
+Sur ces données très denses en blocs, le scanner est 1,1 à 1,8 fois plus lent
+que les anciennes expressions régulières (``--legacy``, moteur C) : il garantit
+un temps linéaire, pas un meilleur débit brut.
+
+Usage :
+    python benchmarks/bench_code_scanner.py
+    python benchmarks/bench_code_scanner.py --sizes 1 5 10 --legacy
+"""
+
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.code_scanner import scan_code_blocks
+
+SECTION_TEMPLATE = """Voici la solution pour le module {i}.
+
+## src/module_{i}/handler.py
+```python
+def handler_{i}(event):
+    # Traitement de l'évènement {i}
+    return {{"status": "ok", "id": {i}}}
+```
+
+`config_{i}.json`:
+```json
+{{"name": "module-{i}", "version": "1.0.{i}"}}
+```
+
+Instructions : lancer `python handler.py`.
+
+```bash
+echo "module {i}"
+```
+
+"""
+
+LEGACY_PATTERNS = [
+    r'# ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
+    r'## ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
+    r'### ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
+    r'`([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))`:\n```\w*\n(.*?)\n```',
+    r'```(\w+)?\n(.*?)```',
+]
+
+
+def build_output(size_mb: float, unterminated: bool = False) -> str:
+    target = int(size_mb * 1024 * 1024)
+    parts = []
+    length = 0
+    i = 0
+    while length < target:
+        section = SECTION_TEMPLATE.format(i=i)
+        parts.append(section)
+        length += len(section)
+        i += 1
+    if unterminated:
+        parts.append("## broken.py\n```python\n" + "x = 1\n" * 1000)
+    return "".join(parts)
+
+
+def time_call(fn, text: str) -> float:
+    start = time.perf_counter()
+    fn(text)
+    return time.perf_counter() - start
+
+
+def legacy_extract(text: str):
+    return [re.findall(pattern, text, re.DOTALL) for pattern in LEGACY_PATTERNS]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du scanner de blocs de code")
+    parser.add_argument("--sizes", nargs="+", type=float, default=[1, 5, 10, 25, 50],
+                        help="Tailles des sorties synthétiques en Mo")
+    parser.add_argument("--legacy", action="store_true",
+                        help="Mesurer aussi l'ancienne extraction par expressions régulières")
+    parser.add_argument("--max-ratio", type=float, default=2.0,
+                        help="Écart maximal toléré entre le temps par Mo le plus lent et le plus rapide")
+    args = parser.parse_args()
+
+    print(f"{'Taille':>8} {'Fermé':>6} {'Blocs':>8} {'Temps (s)':>10} {'Mo/s':>8}" + (f" {'Regex (s)':>10}" if args.legacy else ""))
+    per_mb = []
+
+    for size in args.sizes:
+        for unterminated in (False, True):
+            text = build_output(size, unterminated)
+            real_mb = len(text) / (1024 * 1024)
+            blocks = len(scan_code_blocks(text))
+            elapsed = min(time_call(scan_code_blocks, text) for _ in range(3))
+            per_mb.append(elapsed / real_mb)
+
+            line = f"{real_mb:>7.1f}M {'non' if unterminated else 'oui':>6} {blocks:>8} {elapsed:>10.3f} {real_mb / elapsed:>8.1f}"
+            if args.legacy:
+                line += f" {time_call(legacy_extract, text):>10.3f}"
+            print(line)
+
+    ratio = max(per_mb) / min(per_mb)
+    print(f"\nÉcart de temps par Mo : x{ratio:.2f} (seuil x{args.max_ratio})")
+    if ratio > args.max_ratio:
+        print("❌ Le temps d'extraction n'est pas linéaire en fonction de la taille")
+        sys.exit(1)
+    print("✅ Extraction linéaire")
+
+
+if __name__ == "__main__":
+    main()
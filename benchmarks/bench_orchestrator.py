@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de bout en bout de l'orchestrateur, sans réseau ni clé API.
+
+Exécute ``SmartManager.execute_dynamic_project`` sur les projets de
+``examples/project_templates.py`` avec un modèle de chat factice (latence et
+taille de sortie configurables). Chaque projet tourne dans un processus neuf ;
+on mesure la durée totale, le pic de mémoire (RSS) et le nombre de fichiers
+écrits par seconde. Avec ``--baseline``, le script échoue (code de sortie 1)
+si un projet est plus lent que la référence au-delà de la tolérance.
+
+Usage :
+    python benchmarks/bench_orchestrator.py
+    python benchmarks/bench_orchestrator.py --templates web_app ecommerce --latency 0.2 --stream
+    python benchmarks/bench_orchestrator.py --latency 0.2 --chunk-delay 0.02 --speculative
+    python benchmarks/bench_orchestrator.py --max-tokens 20000 --deadline 2
+    python benchmarks/bench_orchestrator.py --json resultats.json
+    python benchmarks/bench_orchestrator.py --baseline resultats.json --tolerance 0.2
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from examples.project_templates import PROJECT_TEMPLATES
+
+
+def build_plan(template: dict, tasks_per_agent: int) -> dict:
+    return {
+        "complexity": template["complexity"],
+        "components": [],
+        "agents_needed": [
+            {
+                "role": role,
+                "priority": "high",
+                "skills": ["Benchmark"],
+                "tasks": [f"{role} : tâche {index + 1} de {template['name']}" for index in range(tasks_per_agent)]
+            }
+            for role in template["expected_agents"]
+        ],
+        "execution_plan": f"Plan synthétique pour {template['name']}"
+    }
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_single(name: str, args) -> dict:
+    """Exécute un projet dans le processus courant et renvoie ses mesures"""
+    from benchmarks.fake_llm import fake_llm_factory
+    from src.agents.smart_manager import SmartManager
+
+    template = PROJECT_TEMPLATES[name]
+    plan = build_plan(template, args.tasks_per_agent)
+    factory = fake_llm_factory(
+        lambda prompt: plan,
+        latency=args.latency,
+        output_bytes=args.output_kb * 1024,
+        files_per_task=args.files_per_task,
+        chunk_delay=args.chunk_delay
+    )
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        manager = SmartManager(
+            output_directory=output_dir,
+            max_workers=args.max_workers,
+            stream_files=args.stream,
+            fuse_tasks=args.fuse_tasks,
+            speculative=args.speculative,
+            max_tokens=args.max_tokens,
+            deadline=args.deadline,
+            llm_factory=factory
+        )
+        start = time.perf_counter()
+        # Les sorties de l'orchestrateur faussent la mesure : les rediriger
+        with contextlib.redirect_stdout(io.StringIO()):
+            manager.execute_dynamic_project(template["description"])
+        wall_time = time.perf_counter() - start
+
+        project_directory = manager.file_writer.project_directory
+        files = [p for p in project_directory.rglob("*") if p.is_file() and ".agent_code" not in p.parts]
+        written_bytes = sum(p.stat().st_size for p in files)
+
+    # Un modèle factice par modèle routé
+    models = factory.models
+    return {
+        "template": name,
+        "tasks": manager._total_tasks,
+        "llm_calls": sum(model.calls for model in models),
+        "wall_time": wall_time,
+        "simulated_latency": sum(model.simulated_latency for model in models),
+        "files": len(files),
+        "written_mb": written_bytes / (1024 * 1024),
+        "files_per_second": len(files) / wall_time if wall_time else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "tokens": manager.usage.total_tokens,
+        "prompt_tokens": manager.usage.prompt_tokens,
+        "cached_tokens": manager.usage.cached_tokens
+    }
+
+
+def run_isolated(name: str, args) -> dict:
+    # Un processus par projet : le pic RSS et les caches ne se cumulent pas
+    command = [
+        sys.executable, str(Path(__file__).resolve()), "--single", name,
+        "--latency", str(args.latency), "--output-kb", str(args.output_kb),
+        "--files-per-task", str(args.files_per_task), "--tasks-per-agent", str(args.tasks_per_agent),
+        "--max-workers", str(args.max_workers), "--chunk-delay", str(args.chunk_delay)
+    ] + (["--max-tokens", str(args.max_tokens)] if args.max_tokens else []) \
+      + (["--deadline", str(args.deadline)] if args.deadline else []) \
+      + (["--stream"] if args.stream else []) + (["--fuse-tasks"] if args.fuse_tasks else []) \
+      + (["--speculative"] if args.speculative else [])
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, env=benchmark_env())
+    if completed.returncode != 0:
+        raise RuntimeError(f"Le projet {name} a échoué :\n{completed.stderr[-2000:]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def benchmark_env() -> dict:
+    env = dict(os.environ)
+    # Caches et registre isolés : aucune pollution du cache utilisateur, plans toujours recalculés
+    env.setdefault("AGENT_CODE_CACHE_DIR", tempfile.mkdtemp(prefix="agent-code-bench-"))
+    env["AGENT_CODE_PLAN_CACHE"] = "off"
+    env.setdefault("OPENAI_API_KEY", "benchmark-offline")
+    return env
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hors ligne de l'orchestrateur")
+    parser.add_argument("--templates", nargs="+", choices=sorted(PROJECT_TEMPLATES),
+                        default=sorted(PROJECT_TEMPLATES), help="Projets à exécuter (défaut : tous)")
+    parser.add_argument("--latency", type=float, default=0.05, help="Latence simulée par appel LLM (s)")
+    parser.add_argument("--output-kb", type=int, default=8, help="Taille de la sortie de chaque tâche (Ko)")
+    parser.add_argument("--files-per-task", type=int, default=3, help="Fichiers générés par tâche")
+    parser.add_argument("--tasks-per-agent", type=int, default=2, help="Tâches par agent dans le plan")
+    parser.add_argument("--max-workers", type=int, default=4, help="Tâches exécutées en parallèle")
+    parser.add_argument("--stream", action="store_true", help="Écriture des fichiers pendant le streaming")
+    parser.add_argument("--fuse-tasks", action="store_true", help="Fusionner les tâches de chaque agent")
+    parser.add_argument("--speculative", action="store_true",
+                        help="Démarrer les tâches racines pendant le streaming de l'analyse")
+    parser.add_argument("--chunk-delay", type=float, default=0.0,
+                        help="Délai simulé entre deux morceaux d'une réponse en streaming (s)")
+    parser.add_argument("--max-tokens", type=int, default=None, help="Budget de tokens par projet")
+    parser.add_argument("--deadline", type=float, default=None, help="Durée maximale par projet (s)")
+    parser.add_argument("--json", metavar="FICHIER", help="Enregistrer les résultats au format JSON")
+    parser.add_argument("--baseline", metavar="FICHIER", help="Résultats de référence à comparer")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Ralentissement toléré par rapport à la référence (0.2 = +20%%)")
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(run_single(args.single, args)))
+        return
+
+    print(f"Latence simulée {args.latency * 1000:.0f} ms, sortie {args.output_kb} Ko/tâche, "
+          f"{args.max_workers} tâches en parallèle{', streaming' if args.stream else ''}"
+          f"{', tâches fusionnées' if args.fuse_tasks else ''}"
+          f"{', démarrage anticipé' if args.speculative else ''}")
+    print(f"{'Projet':<16} {'Tâches':>6} {'Appels':>6} {'Durée':>8} {'Surcoût':>8} "
+          f"{'Fichiers':>8} {'Fich./s':>8} {'RSS max':>9} {'Cache':>6}")
+
+    results = []
+    for name in args.templates:
+        result = run_isolated(name, args)
+        results.append(result)
+        # Surcoût : durée au-delà de la latence simulée cumulée, répartie sur les workers
+        overhead = result["wall_time"] - result["simulated_latency"] / max(1, args.max_workers)
+        # Part des tokens d'entrée servis par le cache de préfixe simulé
+        cached = 100 * result["cached_tokens"] / max(1, result["prompt_tokens"])
+        print(f"{name:<16} {result['tasks']:>6} {result['llm_calls']:>6} {result['wall_time']:>7.2f}s "
+              f"{overhead:>7.2f}s {result['files']:>8} {result['files_per_second']:>8.1f} "
+              f"{result['peak_rss_mb']:>7.1f}Mo {cached:>5.0f}%")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"options": {k: v for k, v in vars(args).items() if k not in ("json", "baseline", "single")},
+                       "results": results}, f, indent=2)
+        print(f"📄 Résultats : {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = {r["template"]: r for r in json.load(f)["results"]}
+        regressions = []
+        for result in results:
+            reference = baseline.get(result["template"])
+            if reference and result["wall_time"] > reference["wall_time"] * (1 + args.tolerance):
+                regressions.append(f"{result['template']} : {result['wall_time']:.2f}s "
+                                   f"(référence {reference['wall_time']:.2f}s)")
+        if regressions:
+            print("❌ Régressions de performance :")
+            for line in regressions:
+                print(f"    {line}")
+            sys.exit(1)
+        print("✅ Aucune régression par rapport à la référence")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark du démarrage à froid de la CLI.
+
+Lance plusieurs fois `python -X importtime -m src.cli --version` (et `--help`)
+dans un processus neuf, mesure la durée médiane et vérifie qu'aucun module
+lourd (crewai, langchain, openai...) n'est importé pour ces commandes triviales.
+Le script échoue (code de sortie 1) si le seuil de durée est dépassé.
+
+Usage :
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --threshold 0.3 --runs 10
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+HEAVY_MODULES = ("crewai", "langchain", "langchain_core", "langchain_openai", "langchain_community",
+                 "openai", "tiktoken", "httpx", "pydantic")
+
+
+def run_command(args):
+    start = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "src.cli"] + args,
+        cwd=ROOT, capture_output=True, text=True
+    )
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"`agent-code {' '.join(args)}` a échoué :\n{completed.stderr[-2000:]}")
+    return elapsed, completed.stderr
+
+
+def imported_modules(importtime_output: str):
+    # Lignes au format : "import time: self [us] | cumulative | imported package"
+    modules = {}
+    for line in importtime_output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line.split("|")
+        try:
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue
+        modules[parts[2].strip()] = cumulative
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage de la CLI")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre d'exécutions par commande")
+    parser.add_argument("--threshold", type=float, default=0.5,
+                        help="Durée médiane maximale tolérée en secondes")
+    args = parser.parse_args()
+
+    failed = False
+    for command in (["--version"], ["--help"]):
+        timings = []
+        modules = {}
+        for _ in range(args.runs):
+            elapsed, output = run_command(command)
+            timings.append(elapsed)
+            modules = imported_modules(output)
+
+        median = statistics.median(timings)
+        heavy = sorted(name for name in modules if name.split(".")[0] in HEAVY_MODULES)
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:5]
+
+        print(f"agent-code {' '.join(command)} : médiane {median:.3f}s "
+              f"(min {min(timings):.3f}s, max {max(timings):.3f}s), {len(modules)} modules importés")
+        for name, cumulative in slowest:
+            print(f"    {cumulative / 1000:>8.1f} ms  {name}")
+
+        if heavy:
+            print(f"❌ Modules lourds importés au démarrage : {', '.join(heavy[:10])}")
+            failed = True
+        if median > args.threshold:
+            print(f"❌ Démarrage trop lent : {median:.3f}s > {args.threshold:.3f}s")
+            failed = True
+
+    if failed:
+        sys.exit(1)
+    print("✅ Démarrage rapide")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Modèle de chat factice, déterministe et hors ligne, pour les benchmarks.
+
+Répond à l'analyse du SmartManager par un plan JSON (fourni par ``plan_for``)
+et aux tâches par des blocs de code nommés d'une taille configurable, après
+une latence simulée. Aucun appel réseau : seule la surcharge d'orchestration
+(planification, contexte, écriture des fichiers) est mesurée.
+"""
+
+import hashlib
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+# Format de réponse finale attendu par l'exécuteur d'agents de CrewAI
+FINAL_ANSWER_PREFIX = "Thought: I now know the final answer\nFinal Answer: "
+
+FUSED_SECTION_PATTERN = re.compile(r"=== TÂCHE \d+ ===")
+
+# Cache de préfixe simulé, comme chez OpenAI : à partir de 1024 tokens, par pas de 128
+PREFIX_CACHE_MIN_CHARS = 4096
+PREFIX_CACHE_STEP_CHARS = 512
+
+
+class FakeChatModel(BaseChatModel):
+    """Chat model factice : latence et taille de sortie configurables"""
+
+    latency: float = 0.05
+    output_bytes: int = 4096
+    files_per_task: int = 3
+    stream_chunk_size: int = 64
+    chunk_delay: float = 0.0
+    max_tokens: Optional[int] = None
+    streaming: bool = False
+    plan_for: Optional[Callable[[str], Dict]] = None
+
+    calls: int = 0
+    simulated_latency: float = 0.0
+    cached_tokens: int = 0
+    lock: Any = None
+    prefixes: Any = None
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+        self.prefixes = set()
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-benchmark"
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        text, cached_chars = self._respond(messages)
+        # Même durée de génération qu'en streaming, reçue d'un bloc
+        if self.chunk_delay:
+            time.sleep(self.chunk_delay * -(-len(text) // self.stream_chunk_size))
+        usage = self._usage(messages, text, cached_chars)
+        message = AIMessage(content=text, usage_metadata={
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+            "input_token_details": {"cache_read": usage["prompt_tokens_details"]["cached_tokens"]}
+        })
+        return ChatResult(
+            generations=[ChatGeneration(message=message)],
+            llm_output={"token_usage": usage, "model_name": self._llm_type}
+        )
+
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs) -> Iterator[ChatGenerationChunk]:
+        text, cached_chars = self._respond(messages)
+        for start in range(0, len(text), self.stream_chunk_size):
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=text[start:start + self.stream_chunk_size]))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+            # Débit de génération simulé : le texte arrive progressivement
+            if self.chunk_delay:
+                time.sleep(self.chunk_delay)
+        usage = self._usage(messages, text, cached_chars)
+        yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata={
+            "input_tokens": usage["prompt_tokens"],
+            "output_tokens": usage["completion_tokens"],
+            "total_tokens": usage["total_tokens"],
+            "input_token_details": {"cache_read": usage["prompt_tokens_details"]["cached_tokens"]}
+        }))
+
+    def _respond(self, messages) -> Tuple[str, int]:
+        prompt = "\n".join(str(message.content) for message in messages)
+        # Le préfixe est mis en cache dès le début du traitement de la requête
+        cached_chars = self._cached_prefix(prompt)
+        with self.lock:
+            self.calls += 1
+            self.simulated_latency += self.latency
+        time.sleep(self.latency)
+
+        if '"agents_needed"' in prompt and self.plan_for:
+            return FINAL_ANSWER_PREFIX + json.dumps(self.plan_for(prompt), ensure_ascii=False), cached_chars
+        # Requête fusionnée : une section délimitée par tâche
+        sections = FUSED_SECTION_PATTERN.findall(prompt)
+        if sections:
+            return self._truncate(FINAL_ANSWER_PREFIX + "\n".join(
+                f"{marker}\n{self._code_output(prompt + marker)}" for marker in sections
+            )), cached_chars
+        return self._truncate(FINAL_ANSWER_PREFIX + self._code_output(prompt)), cached_chars
+
+    def _truncate(self, text: str) -> str:
+        # Limite de sortie par appel (budget) : ~4 caractères par token, comme _usage
+        return text[:self.max_tokens * 4] if self.max_tokens else text
+
+    def _code_output(self, prompt: str) -> str:
+        # Contenu déterministe : dépend uniquement du prompt
+        digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+        per_file = max(1, self.output_bytes // max(1, self.files_per_task))
+        sections = [f"Implémentation générée ({digest}).\n"]
+        for index in range(self.files_per_task):
+            line = f"    value_{index} = compute('{digest}', {index})  # ligne de remplissage\n"
+            body = line * max(1, per_file // len(line))
+            sections.append(
+                f"## src/module_{digest}/file_{index}.py\n```python\ndef run_{index}():\n{body}    return True\n```\n"
+            )
+        return "\n".join(sections)
+
+    @staticmethod
+    def _usage(messages, text: str, cached_chars: int = 0) -> Dict[str, Any]:
+        prompt_tokens = sum(len(str(message.content)) for message in messages) // 4
+        completion_tokens = len(text) // 4
+        cached_tokens = cached_chars // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": cached_tokens}
+        }
+
+    def _cached_prefix(self, prompt: str) -> int:
+        """Longueur du plus long préfixe déjà vu (par pas), puis mémorisation des préfixes"""
+        hashes = [
+            hashlib.sha1(prompt[:end].encode("utf-8")).digest()
+            for end in range(PREFIX_CACHE_STEP_CHARS, len(prompt) + 1, PREFIX_CACHE_STEP_CHARS)
+        ]
+        with self.lock:
+            cached = 0
+            for index, digest in enumerate(hashes):
+                if digest not in self.prefixes:
+                    break
+                cached = (index + 1) * PREFIX_CACHE_STEP_CHARS
+            self.prefixes.update(hashes)
+            cached = cached if cached >= PREFIX_CACHE_MIN_CHARS else 0
+            self.cached_tokens += cached // 4
+        return cached
+
+
+def fake_llm_factory(plan_for: Callable[[str], Dict], **options) -> Callable:
+    """Fabrique compatible avec ``get_llm`` pour ``SmartManager(llm_factory=...)``"""
+    models: List[FakeChatModel] = []
+
+    def factory(cache_mode=None, streaming=False, callbacks=None, max_tokens=None, **kwargs):
+        model = FakeChatModel(plan_for=plan_for, streaming=streaming, callbacks=callbacks,
+                              max_tokens=max_tokens, **options)
+        models.append(model)
+        return model
+
+    factory.models = models
+    return factory
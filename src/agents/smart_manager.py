@@ -1,17 +1,162 @@
 from crewai import Agent, Task, Crew
 from src.config.llm_config import get_llm
+from src.config.client_pool import get_client_pool, bind_callbacks, reset_callbacks
+from src.config.llm_cache import ResponseCache
+from src.config.rate_limiter import get_rate_limiter
+from src.config.model_router import ModelRouter, estimate_complexity
+from src.utils.blob_store import get_blob_store
+from src.utils.code_scanner import replace_file_blocks
+from src.utils.budget import RunBudget
 from src.utils.file_writer import FileWriter
+from src.utils.task_scheduler import TaskScheduler, priority_rank
+from src.utils.validator import get_validator
+from src.utils.context_manager import RollingContext
+from src.utils.stream_extractor import StreamingFileHandler
+from src.utils.usage import UsageTracker, LedgerRecorder, TraceRecorder
+from src.utils.ledger import get_ledger, set_call_context, reset_call_context
+from src.utils.run_journal import RunJournal
+from src.utils.plan_cache import get_plan_cache
+from src.utils.plan_stream import CancellationHandler, PlanStreamHandler
+from src.utils.tracer import get_tracer, trace_span, traced
+from src.utils.task_batching import build_fused_description, chunk_tasks, split_fused_output
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
 import re
 import json
-from typing import List, Dict
+import contextvars
+import hashlib
+import threading
+import time
+import uuid
+from typing import Callable, List, Dict, Tuple
+
+# Rôles qui consolident le travail des autres et doivent donc s'exécuter après eux
+DOWNSTREAM_ROLE_KEYWORDS = ('qa', 'test', 'quality', 'qualité', 'documentation', 'writer', 'rédacteur')
+
+# Consignes de format communes à toutes les tâches (blocs de code nommés)
+TASK_FORMAT_INSTRUCTIONS = """        IMPORTANT: Votre réponse doit contenir du code prêt à être utilisé.
+        Formatez votre code dans des blocs avec le langage spécifié :
+        ```javascript
+        // Code JavaScript ici
+        ```
+        
+        ```python
+        # Code Python ici
+        ```
+        
+        Organisez votre réponse de manière structurée avec :
+        1. Description de la solution
+        2. Code source avec noms de fichiers explicites
+        3. Instructions d'installation/utilisation si nécessaire
+        
+        Exemple de format attendu:
+        ## app.js
+        ```javascript
+        const express = require('express');
+        // ... reste du code
+        ```
+        
+        ## package.json  
+        ```json
+        {
+          "name": "mon-projet",
+          // ... reste de la configuration
+        }
+        ```
+        """
 
 class SmartManager:
-    def __init__(self):
-        self.llm = get_llm()
+    def __init__(self, max_workers: int = 4, context_token_budget: int = 6000, llm_cache_mode: str = None,
+                 stream_files: bool = False, output_directory: str = None, fresh_plan: bool = False,
+                 llm_factory: Callable = None, routes_file: str = None, fsync_files: bool = False,
+                 fuse_tasks: bool = False, fused_output_tokens: int = 4000,
+                 progress: Callable[[Dict], None] = None, blob_store_mode: str = None,
+                 speculative: bool = False, validate_files: bool = False, repair_rounds: int = 1,
+                 max_tokens: int = None, max_cost: float = None, deadline: float = None):
+        # blob_store_mode : stockage des fichiers extraits par contenu (off, auto, reflink, hardlink, copy)
+        self.file_writer = FileWriter(output_directory=output_directory, fsync=fsync_files,
+                                      blob_store=get_blob_store(blob_store_mode))
+        self.usage = UsageTracker()
+        callbacks = [self.usage]
+        # En mode streaming, les fichiers sont écrits dès que leur bloc de code est complet
+        self.stream_handler = StreamingFileHandler(self.file_writer) if stream_files else None
+        if self.stream_handler:
+            callbacks.append(self.stream_handler)
+        # Registre SQLite local des appels LLM (consulté avec `agent-code stats`)
+        ledger = get_ledger()
+        if ledger:
+            callbacks.append(LedgerRecorder(ledger))
+        # Chronologie de l'exécution (--trace) : chaque appel LLM y figure sous sa tâche
+        tracer = get_tracer()
+        if tracer:
+            callbacks.append(TraceRecorder(tracer))
+        # Budget du projet (tokens, coût estimé en dollars, durée en secondes) : les sorties
+        # des tâches sont bornées selon leur priorité, et plus aucune tâche n'est lancée une
+        # fois le budget épuisé (résultat partiel, reprise possible avec --resume)
+        self.budget = RunBudget(max_tokens, max_cost, deadline) if (max_tokens or max_cost or deadline) else None
+        if self.budget:
+            callbacks.append(self.budget)
+        self._callbacks = callbacks
+        self._budget_pending: Dict[str, Dict] = {}
+        self._budget_stopped = False
+        self._agent_specs: Dict[str, Dict] = {}
+        # Clients LLM partagés par tous les projets du processus ; les callbacks
+        # ci-dessus leur sont rattachés le temps d'une exécution (bind_callbacks)
+        self.pool = get_client_pool()
+        # llm_factory permet d'injecter un autre modèle (benchmarks hors ligne), avec la signature de get_llm
+        self._llm_factory = llm_factory or get_llm
+        self._llm_options = {"cache_mode": llm_cache_mode, "streaming": stream_files}
+        self._llms: Dict[Tuple[str, bool, int], object] = {}
+        # Démarrage anticipé : l'analyse est diffusée en streaming et la première tâche de
+        # chaque agent sans dépendance démarre dès que son entrée du plan est complète
+        self.speculative = speculative
+        self._speculations: Dict[str, Dict] = {}
+        self._speculation_stats = {"started": 0, "reused": 0, "discarded": 0, "interrupted": 0}
+        # Vérification statique des fichiers de chaque tâche ; seuls les fichiers invalides
+        # sont renvoyés à l'agent qui les a produits, au plus repair_rounds fois
+        self.validator = get_validator() if validate_files else None
+        self.repair_rounds = max(0, repair_rounds)
+        self._validation_stats = {"files": 0, "invalid": 0, "repaired": 0, "failed": 0}
+        self._cache_baseline = (0, 0)
+        # Choix du modèle par appel selon la phase, le rôle, la tâche et la complexité
+        self.router = ModelRouter.from_env(routes_file)
+        self.llm = self._get_llm(self.router.default_model)
         self.manager_agent = self._create_manager_agent()
-        self.file_writer = FileWriter()
-        
-    def _create_manager_agent(self) -> Agent:
+        self.scheduler = TaskScheduler(max_workers=max_workers)
+        self.context = RollingContext(token_budget=context_token_budget)
+        self._total_tasks = 0
+        self._context_tokens_saved = 0
+        self._stats_lock = threading.Lock()
+        self.journal = None
+        # Sorties d'une exécution précédente indexées par hash de l'entrée (mode --update)
+        self._previous_outputs: Dict[str, str] = {}
+        self._reused_tasks = 0
+        # Fusion des tâches d'un agent en requêtes multi-sections, bornées en tokens de sortie
+        self.fuse_tasks = fuse_tasks
+        self.fused_output_tokens = fused_output_tokens
+        # Plans déjà calculés pour des prompts proches ; fresh_plan force une nouvelle analyse
+        self.plan_cache = get_plan_cache()
+        self.fresh_plan = fresh_plan
+        # Événements d'avancement ({"event": ..., ...}) transmis par exemple au flux d'un job `agent-code serve`
+        self.progress = progress
+
+    def _get_llm(self, model: str, streaming: bool = False, max_tokens: int = None):
+        # Un client par modèle, partagé par tous les agents (et projets) qui l'utilisent ;
+        # streaming force un client en streaming (analyse avec démarrage anticipé),
+        # max_tokens borne la sortie de chaque appel (budget du projet)
+        options = dict(self._llm_options, streaming=self._llm_options["streaming"] or streaming)
+        if max_tokens:
+            options["max_tokens"] = max_tokens
+        key = (model, options["streaming"], max_tokens)
+        if key not in self._llms:
+            self._llms[key] = self.pool.llm(self._llm_factory, model, **options)
+        return self._llms[key]
+    
+    def _create_manager_agent(self, model: str = None) -> Agent:
+        model = model or self.router.default_model
+        # Agent neuf à chaque analyse : crewai modifie l'agent pendant l'exécution d'un crew
+        # (crew, agent_executor...), seul le client LLM est partagé
         return Agent(
             role="Smart Project Manager",
             goal="Analyser intelligemment les projets logiciels et orchestrer dynamiquement des équipes d'agents spécialisés.",
@@ -20,19 +165,51 @@ class SmartManager:
             des équipes optimales. Maîtrise parfaitement les patterns de développement modernes.""",
             verbose=True,
             allow_delegation=True,
-            llm=self.llm
+            llm=self._get_llm(model, streaming=self.speculative)
         )
     
+    @contextmanager
+    def _run_context(self, project_name: str):
+        """Rattache les appels LLM de l'exécution à ce projet (registre, callbacks)"""
+        token = set_call_context(run_id=uuid.uuid4().hex[:12], project=project_name,
+                                 phase="analysis", role=self.manager_agent.role, task_id=None)
+        callbacks_token = bind_callbacks(self._callbacks)
+        if self.budget:
+            self.budget.reset()
+            self._budget_stopped = False
+        # Les caches de réponses sont partagés : ne compter que les accès de cette exécution
+        self._cache_baseline = self._cache_counters()
+        self._emit("started", project=project_name, project_directory=str(self.file_writer.project_directory))
+        try:
+            yield
+        finally:
+            reset_callbacks(callbacks_token)
+            reset_call_context(token)
+    
+    def _emit(self, event: str, **fields):
+        if self.progress:
+            self.progress({"event": event, "time": time.time(), **fields})
+    
+    def _cache_counters(self) -> Tuple[int, int]:
+        caches = [llm.cache for llm in self._llms.values() if isinstance(getattr(llm, "cache", None), ResponseCache)]
+        return sum(c.hits for c in caches), sum(c.misses for c in caches)
+    
     def analyze_project_needs(self, user_prompt: str) -> str:
+        # Modèle de planification choisi d'après une estimation préalable de la complexité
+        route = self.router.route("analysis", self.manager_agent.role, user_prompt, estimate_complexity(user_prompt))
+        self.manager_agent = self._create_manager_agent(route["model"])
+        
         planning_task = Task(
+            # Consignes fixes en tête (préfixe stable, compatible avec le cache de prompt du
+            # fournisseur), le prompt de l'utilisateur en dernier
             description=f"""
-            Analyse approfondie du projet suivant : "{user_prompt}"
-            
-            Tu dois :
+            Tu dois, pour le projet décrit à la fin de ce message :
             1. Évaluer la complexité technique du projet
             2. Identifier tous les composants nécessaires (frontend, backend, database, auth, tests, etc.)
             3. Déterminer les rôles d'agents requis pour chaque composant
             4. Proposer un plan d'exécution avec priorités
+            5. Indiquer pour chaque agent les rôles dont il dépend ("depends_on"), afin que
+               les travaux indépendants puissent être menés en parallèle
             
             Format de réponse attendu (JSON) :
             {{
@@ -43,11 +220,14 @@ class SmartManager:
                         "role": "Backend Developer",
                         "priority": "high",
                         "skills": ["API", "Database", "Authentication"],
-                        "tasks": ["Créer l'API REST", "Configurer la base de données"]
+                        "tasks": ["Créer l'API REST", "Configurer la base de données"],
+                        "depends_on": []
                     }}
                 ],
                 "execution_plan": "Description du plan d'exécution"
             }}
+            
+            Analyse approfondie du projet suivant : "{user_prompt}"
             """,
             expected_output="Analyse complète du projet au format JSON avec agents requis et plan d'exécution",
             agent=self.manager_agent
@@ -55,9 +235,13 @@ class SmartManager:
         
         # Exécuter l'analyse
         crew = Crew(agents=[self.manager_agent], tasks=[planning_task], verbose=False)
-        result = crew.kickoff()
+        start = time.perf_counter()
+        with trace_span("analysis kickoff", "kickoff", heavy=True, model=route["model"], route=route["name"]):
+            result = crew.kickoff()
+        self.router.record(route, time.perf_counter() - start)
         return str(result)
     
+    @traced("stage")
     def parse_analysis_result(self, analysis_result: str) -> Dict:
         try:
             # Extraire le JSON de la réponse
@@ -115,22 +299,20 @@ class SmartManager:
         }
     
     def create_dynamic_agents(self, agents_specs: List[Dict]) -> List[Agent]:
-        agents = []
-        
-        for spec in agents_specs:
-            role = spec.get("role", "Generic Developer")
-            skills = spec.get("skills", [])
-            
-            agent = Agent(
-                role=role,
-                goal=f"Exceller dans le rôle de {role} en utilisant les compétences : {', '.join(skills)}",
-                backstory=self._generate_backstory(role, skills),
-                verbose=True,
-                llm=self.llm
-            )
-            agents.append(agent)
+        return [self._create_agent(spec, self.router.default_model) for spec in agents_specs]
+    
+    def _create_agent(self, spec: Dict, model: str, max_tokens: int = None) -> Agent:
+        # Un agent par tâche (état propre à chaque exécution de crew) ; le client LLM est partagé
+        role = spec.get("role", "Generic Developer")
+        skills = spec.get("skills", [])
         
-        return agents
+        return Agent(
+            role=role,
+            goal=f"Exceller dans le rôle de {role} en utilisant les compétences : {', '.join(skills)}",
+            backstory=self._generate_backstory(role, skills),
+            verbose=True,
+            llm=self._get_llm(model, max_tokens=max_tokens)
+        )
     
     def _generate_backstory(self, role: str, skills: List[str]) -> str:
         backstories = {
@@ -145,71 +327,336 @@ class SmartManager:
         return backstories.get(role, f"Expert {role} avec compétences en {', '.join(skills)}")
     
     def create_dynamic_tasks(self, agents: List[Agent], agents_specs: List[Dict]) -> List[Task]:
-        tasks = []
+        return [node["task"] for node in self.plan_tasks(agents, agents_specs)]
+    
+    def plan_tasks(self, agents: List[Agent], agents_specs: List[Dict], complexity: str = None) -> List[Dict]:
+        """Construit le graphe des tâches : un noeud par tâche avec ses dépendances et son modèle"""
+        nodes = []
+        spec_nodes = []
         
         for agent, spec in zip(agents, agents_specs):
             role = spec.get("role", "Generic Developer")
             task_descriptions = spec.get("tasks", [f"Exécuter les tâches du rôle {role}"])
+            ids = []
+            
+            # Fusion optionnelle : une requête pour plusieurs tâches du même agent
+            if self.fuse_tasks:
+                groups = chunk_tasks(task_descriptions, self.fused_output_tokens)
+            else:
+                groups = [[task_desc] for task_desc in task_descriptions]
             
-            for task_desc in task_descriptions:
-                enhanced_description = f"""
-                {task_desc}
-                
-                IMPORTANT: Votre réponse doit contenir du code prêt à être utilisé.
-                Formatez votre code dans des blocs avec le langage spécifié :
-                ```javascript
-                // Code JavaScript ici
-                ```
-                
-                ```python
-                # Code Python ici
-                ```
-                
-                Organisez votre réponse de manière structurée avec :
-                1. Description de la solution
-                2. Code source avec noms de fichiers explicites
-                3. Instructions d'installation/utilisation si nécessaire
-                
-                Exemple de format attendu:
-                ## app.js
-                ```javascript
-                const express = require('express');
-                // ... reste du code
-                ```
-                
-                ## package.json  
-                ```json
-                {{
-                  "name": "mon-projet",
-                  // ... reste de la configuration
-                }}
-                ```
-                """
-                
+            for parts in groups:
+                task_desc = " | ".join(parts)
+                route = self.router.route("task", role, task_desc, complexity)
+                # Texte propre à la tâche, placé en fin de prompt
+                task_prompt = build_fused_description(parts, self.fused_output_tokens) if len(parts) > 1 else task_desc
                 task = Task(
-                    description=enhanced_description,
+                    description=self._build_task_description(task_prompt),
                     expected_output=f"Code source fonctionnel et structuré pour : {task_desc}",
-                    agent=agent
+                    agent=self._create_agent(spec, route["model"])
                 )
-                tasks.append(task)
+                node_id = f"t{len(nodes) + 1}"
+                # Les tâches d'un même agent restent séquentielles
+                nodes.append({
+                    "id": node_id,
+                    "index": len(nodes),
+                    "role": role,
+                    "description": task_desc,
+                    "parts": parts,
+                    "prompt": task_prompt,
+                    "task": task,
+                    "route": route,
+                    "priority": priority_rank(spec.get("priority")),
+                    "depends_on": ids[-1:]
+                })
+                ids.append(node_id)
+            
+            spec_nodes.append(ids)
+        
+        # La première tâche d'un agent attend la dernière tâche des rôles dont il dépend
+        last_task_by_role = {spec.get("role", "Generic Developer"): ids[-1] for spec, ids in zip(agents_specs, spec_nodes) if ids}
+        by_id = {node["id"]: node for node in nodes}
+        for ids, dep_roles in zip(spec_nodes, self._infer_role_dependencies(agents_specs)):
+            if ids:
+                by_id[ids[0]]["depends_on"] = [last_task_by_role[r] for r in dep_roles if r in last_task_by_role]
         
-        return tasks
+        try:
+            TaskScheduler.topological_order(nodes)
+        except ValueError:
+            print("⚠️ Dépendances cycliques dans le plan, exécution séquentielle des tâches")
+            for previous, node in zip(nodes, nodes[1:]):
+                node["depends_on"] = [previous["id"]]
+        
+        return nodes
+    
+    def _build_task_description(self, task_desc: str, execution_context: str = None) -> str:
+        # Ordre fixe : consignes statiques, contexte accumulé, puis texte propre à la tâche.
+        # Les prompts partagent ainsi un long préfixe identique (cache de prompt du fournisseur).
+        context = f"\n        Contexte des étapes précédentes :\n{execution_context}\n" if execution_context else ""
+        return f"{TASK_FORMAT_INSTRUCTIONS}{context}\n        Tâche à réaliser :\n        {task_desc}\n"
+    
+    def _infer_role_dependencies(self, agents_specs: List[Dict]) -> List[List[str]]:
+        roles = [spec.get("role", "Generic Developer") for spec in agents_specs]
+        dependencies = []
+        
+        for spec, role in zip(agents_specs, roles):
+            declared = spec.get("depends_on")
+            if isinstance(declared, list):
+                # Dépendances explicites fournies par le plan
+                dependencies.append([r for r in declared if r in roles and r != role])
+            elif self._is_downstream_role(role):
+                # QA, documentation... : attendre la fin des rôles de production
+                dependencies.append([r for r in roles if r != role and not self._is_downstream_role(r)])
+            else:
+                dependencies.append([])
+        
+        return dependencies
+    
+    def _is_downstream_role(self, role: str) -> bool:
+        role_lower = role.lower()
+        return any(keyword in role_lower for keyword in DOWNSTREAM_ROLE_KEYWORDS)
     
+    @traced("run")
     def execute_dynamic_project(self, user_prompt: str) -> str:
         print(f"🧠 Analyse du projet : {user_prompt}")
         
-        # Préparer le répertoire de sortie
+        # Préparer le répertoire de sortie et le journal d'exécution
         project_name = self._generate_project_name(user_prompt)
         self.file_writer.set_project_directory(project_name)
         print(f"📁 Répertoire de sortie créé : {self.file_writer.project_directory}")
+        self.journal = RunJournal(self.file_writer.project_directory)
+        self.journal.start(user_prompt, project_name)
         
-        # 1. Analyser les besoins
-        analysis_result = self.analyze_project_needs(user_prompt)
-        print("📋 Analyse terminée")
+        # Chaque appel LLM de ce projet est rattaché au run dans le registre d'usage
+        with self._run_context(project_name):
+            # 1-2. Analyser les besoins (ou réutiliser le plan d'un prompt similaire)
+            parsed_analysis, graph = self._plan_project(user_prompt)
+            self.journal.record_analysis(parsed_analysis)
+            
+            return self._execute_plan(project_name, parsed_analysis, graph)
+    
+    @traced("run")
+    def resume_project(self, project_directory: str) -> str:
+        """Reprend un projet interrompu à partir de son journal d'exécution"""
+        self.journal = RunJournal.load(Path(project_directory))
+        self.file_writer.use_project_directory(project_directory)
+        user_prompt = self.journal.data["prompt"]
+        project_name = self.journal.data["project_name"] or self._generate_project_name(user_prompt)
+        print(f"🔁 Reprise du projet : {user_prompt}")
+        print(f"📁 Répertoire de sortie : {self.file_writer.project_directory}")
+        
+        with self._run_context(project_name):
+            parsed_analysis = self.journal.data.get("analysis")
+            graph = None
+            if parsed_analysis is None:
+                # Interruption pendant l'analyse : la relancer
+                parsed_analysis, graph = self._plan_project(user_prompt)
+                self.journal.record_analysis(parsed_analysis)
+            
+            return self._execute_plan(project_name, parsed_analysis, graph)
+    
+    @traced("run")
+    def update_project(self, project_directory: str, user_prompt: str) -> str:
+        """Régénère un projet existant à partir d'un prompt révisé.
+        
+        Seules les tâches dont l'entrée (rôle, description, sorties amont) a changé sont
+        relancées ; les autres reprennent la sortie de l'exécution précédente, et seuls
+        les fichiers dont le contenu diffère sont réécrits.
+        """
+        self.file_writer.use_project_directory(project_directory)
+        project_directory = self.file_writer.project_directory
+        previous = RunJournal.load(project_directory) if RunJournal.exists(project_directory) else None
+        if previous:
+            self._previous_outputs = {
+                entry["input_hash"]: entry["output"]
+                for entry in previous.data["tasks"].values() if entry.get("input_hash")
+            }
+        project_name = (previous and previous.data.get("project_name")) or project_directory.name
+        print(f"🔄 Mise à jour du projet : {user_prompt}")
+        print(f"📁 Répertoire de sortie : {project_directory} "
+              f"({len(self._previous_outputs)} sortie(s) de tâche réutilisable(s))")
+        
+        self.journal = RunJournal(project_directory)
+        self.journal.start(user_prompt, project_name)
+        
+        with self._run_context(project_name):
+            # Le prompt a été révisé : toujours relancer l'analyse
+            parsed_analysis, graph = self._plan_project(user_prompt, fresh=True)
+            self.journal.record_analysis(parsed_analysis)
+            
+            return self._execute_plan(project_name, parsed_analysis, graph)
+    
+    @traced("run")
+    def plan_queued_project(self, user_prompt: str) -> Tuple[Dict, List[Dict]]:
+        """File persistante : crée le répertoire du projet, l'analyse et renvoie (plan, tâches)"""
+        project_name = self._generate_project_name(user_prompt)
+        self.file_writer.set_project_directory(project_name)
+        print(f"🧠 Analyse du projet : {user_prompt}")
+        print(f"📁 Répertoire de sortie créé : {self.file_writer.project_directory}")
+        self.journal = RunJournal(self.file_writer.project_directory)
+        self.journal.start(user_prompt, project_name)
+        
+        with self._run_context(project_name):
+            # Les tâches sont exécutées par d'autres unités de la file : pas de démarrage anticipé
+            parsed_analysis, (_, task_nodes) = self._plan_project(user_prompt, speculate=False)
+        self.journal.record_analysis(parsed_analysis)
+        return parsed_analysis, task_nodes
+    
+    @traced("run")
+    def run_queued_task(self, project_directory: str, project_name: str, parsed_analysis: Dict,
+                        node_id: str, outputs: Dict[str, str]) -> Tuple[str, Dict[str, Dict]]:
+        """File persistante : exécute une tâche à partir des sorties de ses ancêtres.
         
-        # 2. Parser le résultat
+        Renvoie la sortie et les fichiers écrits par la tâche (entrées du manifeste).
+        """
+        self.file_writer.use_project_directory(project_directory)
+        self.journal = None
+        _, task_nodes = self._task_graph(parsed_analysis)
+        by_id = {node["id"]: node for node in task_nodes}
+        upstream = [(by_id[dep], outputs[dep]) for dep in TaskScheduler.ancestors(task_nodes)[node_id]]
+        
+        records_before = dict(self.file_writer.file_records)
+        with self._run_context(project_name):
+            output = self._run_task_node(by_id[node_id], upstream)
+        files = {path: record for path, record in self.file_writer.file_records.items()
+                 if records_before.get(path) != record}
+        return output, files
+    
+    @traced("run")
+    def finalize_queued_project(self, project_directory: str, user_prompt: str, project_name: str,
+                                parsed_analysis: Dict, outputs: Dict[str, str], file_records: Dict[str, Dict]) -> str:
+        """File persistante : journal, sortie combinée, résumé et manifeste une fois toutes les tâches terminées"""
+        self.file_writer.use_project_directory(project_directory)
+        # Fichiers déjà écrits par les workers : seuls les fichiers modifiés seront réécrits
+        self.file_writer.file_records.update(file_records)
+        self.journal = RunJournal(self.file_writer.project_directory)
+        self.journal.start(user_prompt, project_name)
+        self.journal.record_analysis(parsed_analysis)
+        
+        agents, task_nodes = self._task_graph(parsed_analysis)
+        by_id = {node["id"]: node for node in task_nodes}
+        for node_id, ancestors in TaskScheduler.ancestors(task_nodes).items():
+            upstream = [(by_id[dep], outputs[dep]) for dep in ancestors]
+            self.journal.record_task(by_id[node_id], outputs[node_id], self._task_input_hash(by_id[node_id], upstream))
+        
+        with self._run_context(project_name):
+            return self._finish_project(project_name, agents, task_nodes, outputs)
+    
+    @traced("stage")
+    def _plan_project(self, user_prompt: str, fresh: bool = False,
+                      speculate: bool = True) -> Tuple[Dict, Tuple[List[Agent], List[Dict]]]:
+        """Plan d'analyse et graphe des tâches (agents, noeuds), construit une seule fois"""
+        if self.plan_cache and not (self.fresh_plan or fresh):
+            match = self.plan_cache.lookup(user_prompt)
+            if match:
+                plan, similarity, cached_prompt = match
+                print(f"♻️ Plan réutilisé (similarité {similarity:.2f} avec « {cached_prompt} »), analyse LLM évitée")
+                return plan, self._task_graph(plan)
+        
+        if self.speculative and speculate:
+            analysis_result = self._analyze_with_early_start(user_prompt)
+        else:
+            analysis_result = self.analyze_project_needs(user_prompt)
+        print("📋 Analyse terminée")
         parsed_analysis = self.parse_analysis_result(analysis_result)
+        graph = self._task_graph(parsed_analysis)
+        if self._speculations:
+            self._reconcile_speculations(graph[1])
+        
+        # Ne mémoriser que les plans exploitables
+        if self.plan_cache and parsed_analysis.get("agents_needed"):
+            self.plan_cache.store(user_prompt, parsed_analysis)
+        return parsed_analysis, graph
+    
+    def _analyze_with_early_start(self, user_prompt: str) -> str:
+        """Analyse en streaming : la première tâche de chaque agent sans dépendance démarre
+        dès que son entrée de ``agents_needed`` est complète, sans écrire de fichier.
+        
+        Sa sortie n'est reprise que si le plan final contient la même tâche racine (même
+        hash d'entrée, même modèle) ; sinon elle est abandonnée (``_reconcile_speculations``).
+        """
+        self._speculations = {}
+        estimated_complexity = estimate_complexity(user_prompt)
+        executor = ThreadPoolExecutor(max_workers=self.scheduler.max_workers,
+                                      thread_name_prefix="agent-code-early")
         
+        def on_agent(spec: Dict, fields: Dict[str, str]):
+            if not self._can_start_early(spec):
+                return
+            agent = self._create_agent(spec, self.router.default_model)
+            node = self.plan_tasks([agent], [spec], fields.get("complexity") or estimated_complexity)[0]
+            input_hash = self._task_input_hash(node, [])
+            if input_hash in self._speculations:
+                return
+            with self._stats_lock:
+                self._speculation_stats["started"] += 1
+                # Position dans le plan final encore inconnue : identifiant propre au démarrage anticipé
+                # (journaux, registre, trace), la sortie reprise est rattachée à la tâche du plan final
+                node["id"] = f"early{self._speculation_stats['started']}"
+            print(f"⚡ Démarrage anticipé pendant l'analyse ({node['id']}) : {node['role']} — {node['description']}")
+            ctx = contextvars.copy_context()
+            cancel = threading.Event()
+            self._speculations[input_hash] = {"node": node, "cancel": cancel,
+                                              "future": executor.submit(ctx.run, self._run_early_task, node, cancel)}
+        
+        token = bind_callbacks(self._callbacks + [PlanStreamHandler(on_agent)])
+        try:
+            return self.analyze_project_needs(user_prompt)
+        except BaseException:
+            # Analyse en échec : aucune sortie anticipée ne sera reprise, ne plus en lancer
+            for speculation in self._speculations.values():
+                self._discard_speculation(speculation)
+            self._speculations = {}
+            raise
+        finally:
+            reset_callbacks(token)
+            # Les tâches lancées continuent ; leur sortie est attendue par _run_task_node
+            executor.shutdown(wait=False)
+    
+    def _can_start_early(self, spec: Dict) -> bool:
+        if self.budget and self.budget.limits_usage:
+            # Les sorties sont bornées à partir du plan complet : pas de tâche avant lui
+            return False
+        # Mêmes règles que _infer_role_dependencies, sans connaître les autres rôles
+        declared = spec.get("depends_on")
+        if isinstance(declared, list):
+            return not declared
+        return not self._is_downstream_role(spec.get("role", "Generic Developer"))
+    
+    def _run_early_task(self, node: Dict, cancel: threading.Event) -> str:
+        # Ni le parseur du plan ni l'écriture en streaming : les fichiers ne sont écrits
+        # que si la sortie est reprise par le plan final. Tâche abandonnée : ses appels
+        # LLM suivants échouent (CancellationHandler)
+        callbacks = [callback for callback in self._callbacks if callback is not self.stream_handler]
+        token = bind_callbacks(callbacks + [CancellationHandler(cancel)])
+        try:
+            return self._kickoff_task(node)
+        finally:
+            reset_callbacks(token)
+    
+    def _reconcile_speculations(self, task_nodes: List[Dict]):
+        # Tâches racines du plan final : seules celles-ci peuvent reprendre une sortie anticipée
+        roots = {self._task_input_hash(node, []): node["route"]["model"] for node in task_nodes if not node["depends_on"]}
+        for input_hash, speculation in list(self._speculations.items()):
+            if roots.get(input_hash) == speculation["node"]["route"]["model"]:
+                continue
+            del self._speculations[input_hash]
+            self._discard_speculation(speculation)
+            print(f"🗑️ Démarrage anticipé abandonné ({speculation['node']['role']}) : tâche absente du plan final")
+    
+    def _discard_speculation(self, speculation: Dict):
+        # En attente : annulée ; en cours : arrêtée à son prochain appel ou token LLM
+        future = speculation["future"]
+        running = not future.done() and not future.cancel()
+        if running:
+            speculation["cancel"].set()
+        with self._stats_lock:
+            self._speculation_stats["discarded"] += 1
+            if running:
+                self._speculation_stats["interrupted"] += 1
+    
+    def _execute_plan(self, project_name: str, parsed_analysis: Dict,
+                      graph: Tuple[List[Agent], List[Dict]] = None) -> str:
         # Afficher le plan d'exécution
         execution_plan = parsed_analysis.get("execution_plan", "Aucun plan d'exécution détaillé fourni.")
         print("\n" + "="*70)
@@ -225,50 +672,347 @@ class SmartManager:
             # ... (gestion du cas sans agent)
             return "Aucun agent spécialisé n'a été jugé nécessaire pour ce projet."
 
-        agents = self.create_dynamic_agents(agents_specs)
-        tasks = self.create_dynamic_tasks(agents, agents_specs)
+        # Graphe déjà construit par _plan_project, sauf reprise d'un plan journalisé
+        agents, task_nodes = graph or self._task_graph(parsed_analysis)
+        self._context_tokens_saved = 0
+        
+        # Les tâches déjà terminées lors d'une exécution précédente ne sont pas relancées
+        completed = self.journal.completed_outputs(task_nodes)
+        if completed:
+            print(f"⏭️ {len(completed)}/{len(task_nodes)} tâches déjà terminées, reprises depuis le journal")
+        self._emit("planned", tasks=len(task_nodes), completed=len(completed),
+                   agents=[spec.get("role", "Generic Developer") for spec in agents_specs])
         
-        # 4. Exécuter le projet séquentiellement
-        print(f"🚀 Lancement de l'exécution séquentielle de {len(tasks)} tâches")
+        # 4. Exécuter le graphe de tâches : les tâches indépendantes tournent en parallèle
+        print(f"🚀 Lancement de l'exécution de {len(task_nodes) - len(completed)} tâches "
+              f"({self.scheduler.max_workers} en parallèle au maximum)")
         
-        execution_context = []
+        self._budget_pending = {node["id"]: node for node in task_nodes if node["id"] not in completed}
+        if self.budget:
+            shaping = " ; sorties des tâches réparties par priorité" if self.budget.limits_usage else ""
+            print(f"💰 Budget : {self.budget.summary()}{shaping}")
+        outputs = self.scheduler.run(task_nodes, self._run_task_node, completed=completed,
+                                     should_stop=self._budget_exhausted)
+        return self._finish_project(project_name, agents, task_nodes, outputs)
+    
+    @traced("stage")
+    def _task_graph(self, parsed_analysis: Dict) -> Tuple[List[Agent], List[Dict]]:
+        # Agents et graphe des tâches, identiques d'un processus à l'autre pour un même plan
+        agents_specs = parsed_analysis.get("agents_needed", [])
+        self._agent_specs = {spec.get("role", "Generic Developer"): spec for spec in agents_specs}
+        agents = self.create_dynamic_agents(agents_specs)
+        task_nodes = self.plan_tasks(agents, agents_specs, parsed_analysis.get("complexity"))
+        self._total_tasks = len(task_nodes)
+        return agents, task_nodes
+    
+    @traced("stage")
+    def _finish_project(self, project_name: str, agents: List[Agent], task_nodes: List[Dict],
+                        outputs: Dict[str, str]) -> str:
         final_result = ""
-
-        for i, task in enumerate(tasks):
-            agent_role = task.agent.role
-            print(f"\n" + "-"*70)
-            print(f"Étape {i+1}/{len(tasks)} : Exécution par {agent_role}")
-            print(f"Tâche : {task.description.split('IMPORTANT')[0].strip()}")
-            print("-" * 70)
-
-            # Injecter le contexte des tâches précédentes
-            if execution_context:
-                task.description = f"Contexte des étapes précédentes :\n{''.join(execution_context)}\n\n{task.description}"
-
-            # Exécuter la tâche
-            crew = Crew(agents=[task.agent], tasks=[task], verbose=False)
-            task_output = crew.kickoff()
-            
-            # Sauvegarder le résultat de la tâche
-            execution_context.append(f"Résultat de {agent_role}:\n{task_output}\n")
-            final_result += f"--- Résultat de {agent_role} ---\n{task_output}\n\n"
-            
-            print(f"✅ Étape {i+1} terminée.")
+        # Budget épuisé : les tâches jamais lancées sont absentes des sorties
+        skipped = [node for node in task_nodes if node["id"] not in outputs]
+        for node in task_nodes:
+            if node["id"] not in outputs:
+                continue
+            if len(node["parts"]) > 1:
+                # Requête fusionnée : une section par tâche d'origine
+                sections = split_fused_output(outputs[node['id']], len(node["parts"]))
+                for part, section in zip(node["parts"], sections):
+                    final_result += f"--- Résultat de {node['role']} : {part} ---\n{section}\n\n"
+            else:
+                final_result += f"--- Résultat de {node['role']} ---\n{outputs[node['id']]}\n\n"
 
         # 5. Sauvegarder les résultats et extraire les fichiers de code
         print("\n💾 Sauvegarde des fichiers générés...")
-        created_files = self.file_writer.write_agent_output("Combined_Output", final_result)
+        if self.file_writer.file_records:
+            # Fichiers nommés déjà écrits tâche par tâche : seule la sortie combinée reste à écrire
+            created_files = self.file_writer.write_combined_output("Combined_Output", final_result)
+        else:
+            # Aucun fichier nommé : blocs de code anonymes extraits de la sortie combinée
+            created_files = self.file_writer.write_agent_output("Combined_Output", final_result)
         
         # 6. Créer le résumé du projet
         agents_used = [agent.role for agent in agents]
         files_created_summary = {"Combined_Output": created_files}
         self.file_writer.write_project_summary(project_name, agents_used, files_created_summary)
+        self.file_writer.write_manifest(self.journal.data["prompt"], self._manifest_tasks())
+        if skipped:
+            # Journal laissé en cours : --resume lancera les tâches restantes
+            print(f"⏸️ {len(skipped)}/{len(task_nodes)} tâche(s) non lancée(s) : "
+                  f"{', '.join(sorted({node['role'] for node in skipped}))} ; "
+                  f"reprise avec --resume {self.file_writer.project_directory}")
+        else:
+            self.journal.mark_completed()
+        
+        if self._reused_tasks or self.file_writer.files_unchanged:
+            print(f"♻️ {self._reused_tasks} tâche(s) inchangée(s) réutilisée(s), "
+                  f"{self.file_writer.files_written} fichier(s) écrit(s), {self.file_writer.files_unchanged} inchangé(s)")
+        
+        blob_stats = self.file_writer.blob_stats
+        if blob_stats["created"] or blob_stats["reused"]:
+            links = ", ".join(f"{count} {method}" for method, count in sorted(blob_stats["links"].items()))
+            print(f"🧱 Blobs : {blob_stats['created']} nouveau(x), {blob_stats['reused']} dédupliqué(s) "
+                  f"({blob_stats['reused_bytes'] / 1024:.1f} Ko non réécrits) ; liens : {links}")
+        
+        hits, misses = self._cache_counters()
+        if hits or misses:
+            print(f"♻️ Cache LLM : {hits - self._cache_baseline[0]} réponse(s) réutilisée(s), "
+                  f"{misses - self._cache_baseline[1]} appel(s) réseau")
+        
+        pool_stats = self.pool.stats()
+        print(f"🔌 Pool (processus) : {pool_stats['llm_created']} client(s) LLM, {pool_stats['llm_hits']} réutilisation(s) ; "
+              f"{pool_stats['http_requests']} requête(s) HTTP sur {pool_stats['http_connections']} connexion(s)")
+        
+        for route in self.router.report():
+            print(f"🧭 Route {route['route']} : {route['calls']} appel(s), "
+                  f"p50 {route['p50']:.1f}s, p95 {route['p95']:.1f}s, total {route['total']:.1f}s")
+        
+        validation = self._validation_stats
+        if validation["files"]:
+            print(f"🧪 Validation : {validation['files']} fichier(s) vérifié(s), {validation['invalid']} invalide(s), "
+                  f"{validation['repaired']} corrigé(s), {validation['failed']} toujours en échec "
+                  f"(processus : {self.validator.stats['cached']}/{self.validator.stats['files']} résultat(s) en cache)")
+        
+        # Sorties anticipées jamais reprises (tâche réutilisée d'une exécution précédente, échec)
+        for speculation in self._speculations.values():
+            self._discard_speculation(speculation)
+        self._speculations = {}
+        if self._speculation_stats["started"]:
+            stats = self._speculation_stats
+            interrupted = (f" dont {stats['interrupted']} arrêtée(s) en cours d'exécution"
+                           if stats["interrupted"] else "")
+            print(f"⚡ Démarrage anticipé : {stats['started']} tâche(s) lancée(s) pendant l'analyse, "
+                  f"{stats['reused']} reprise(s), {stats['discarded']} abandonnée(s){interrupted}")
+        
+        if self._context_tokens_saved:
+            print(f"🗜️ {self._context_tokens_saved} tokens de contexte économisés au total")
+        print(f"🔢 Tokens consommés : {self.usage.total_tokens} "
+              f"({self.usage.prompt_tokens} en entrée, {self.usage.completion_tokens} en sortie, {self.usage.calls} appels)")
+        if self.usage.cached_tokens:
+            print(f"⚡ Cache de prompt du fournisseur : {self.usage.cached_tokens} tokens d'entrée en cache "
+                  f"({100 * self.usage.cached_tokens / max(1, self.usage.prompt_tokens):.0f}%)")
+        if self.budget:
+            print(f"💰 Budget consommé : {self.budget.summary()}")
+        limiter_stats = get_rate_limiter().stats()
+        if limiter_stats["retries"]:
+            print(f"🚦 {limiter_stats['retries']} nouvelle(s) tentative(s), {limiter_stats['rate_limited']} erreur(s) 429, "
+                  f"concurrence actuelle {limiter_stats['concurrency_limit']}")
         
         total_files = len(created_files)
-        print(f"🎉 Projet terminé ! {total_files} fichiers créés dans {self.file_writer.project_directory}")
+        if skipped:
+            print(f"🎉 Projet partiel : {total_files} fichiers créés dans {self.file_writer.project_directory}")
+        else:
+            print(f"🎉 Projet terminé ! {total_files} fichiers créés dans {self.file_writer.project_directory}")
+        self._emit("completed", project_directory=str(self.file_writer.project_directory), files=total_files,
+                   tokens=self.usage.as_dict(), skipped_tasks=len(skipped),
+                   budget=self.budget.as_dict() if self.budget else None)
         
         return final_result
     
+    def _run_task_node(self, node: Dict, upstream: List[Tuple[Dict, str]]) -> str:
+        # Un span par tâche, dans la voie du thread qui l'exécute
+        with trace_span(f"{node['id']} · {node['role']}", "task", description=node["description"],
+                        model=node["route"]["model"], upstream=len(upstream)):
+            return self._execute_task_node(node, upstream)
+    
+    def _execute_task_node(self, node: Dict, upstream: List[Tuple[Dict, str]]) -> str:
+        task = node["task"]
+        step = f"{node['index'] + 1}/{self._total_tasks}"
+        print(f"\n" + "-"*70)
+        print(f"Étape {step} : Exécution par {node['role']}")
+        print(f"Tâche : {node['description']}")
+        print(f"Modèle : {node['route']['model']} (route {node['route']['name']})")
+        print("-" * 70)
+        self._emit("task_started", task=node["id"], role=node["role"], step=step)
+        
+        # Tâche identique à l'exécution précédente (même entrée) : réutiliser sa sortie
+        input_hash = self._task_input_hash(node, upstream)
+        previous_output = self._previous_outputs.get(input_hash)
+        if previous_output is not None:
+            with self._stats_lock:
+                self._reused_tasks += 1
+            print(f"♻️ Étape {step} inchangée ({node['role']}), sortie précédente réutilisée")
+            return self._complete_task(node, previous_output, input_hash)
+        
+        # Tâche démarrée pendant l'analyse : attendre sa sortie plutôt que la relancer
+        speculation = self._speculations.pop(input_hash, None) if not upstream else None
+        if speculation is not None:
+            try:
+                early_output = speculation["future"].result()
+            except Exception as e:
+                print(f"⚠️ Démarrage anticipé de l'étape {step} en échec ({e}), nouvelle exécution")
+            else:
+                with self._stats_lock:
+                    self._speculation_stats["reused"] += 1
+                print(f"⚡ Étape {step} démarrée pendant l'analyse ({node['role']}, "
+                      f"{speculation['node']['id']} → {node['id']}), sortie reprise")
+                return self._complete_task(node, early_output, input_hash)
+        
+        # Injecter le résultat des tâches dont celle-ci dépend, compacté selon le budget
+        if upstream:
+            # Ordre stable (ordre du plan) : même préfixe de prompt pour les tâches sœurs
+            ordered = sorted(upstream, key=lambda item: item[0]["index"])
+            entries = [(f"Résultat de {dep['role']}", output) for dep, output in ordered]
+            execution_context, stats = self.context.build(entries)
+            with self._stats_lock:
+                self._context_tokens_saved += stats["saved_tokens"]
+            if stats["saved_tokens"]:
+                print(f"🗜️ Contexte compacté : {stats['context_tokens']} tokens "
+                      f"({stats['saved_tokens']} économisés, {stats['compacted']} résultat(s) résumé(s))")
+            task.description = self._build_task_description(node["prompt"], execution_context)
+        
+        # Tâches ordonnancées par ce processus uniquement (pas les unités de la file persistante)
+        if self.budget and self.budget.limits_usage and node["id"] in self._budget_pending:
+            self._apply_budget(node, step)
+        task_output = self._kickoff_task(node)
+        
+        if len(node["parts"]) > 1:
+            sections = split_fused_output(task_output, len(node["parts"]))
+            missing = sum(1 for section in sections if not section)
+            print(f"✅ Étape {step} terminée ({node['role']}, {len(node['parts'])} tâches fusionnées"
+                  + (f", {missing} section(s) manquante(s)" if missing else "") + ").")
+            for part, section in zip(node["parts"], sections):
+                print(f"   • {part} : {len(section)} caractères")
+        else:
+            print(f"✅ Étape {step} terminée ({node['role']}).")
+        return self._complete_task(node, task_output, input_hash)
+    
+    def _apply_budget(self, node: Dict, step: str):
+        """Borne la sortie de la tâche : le budget restant est partagé avec les tâches pas encore lancées"""
+        with self._stats_lock:
+            self._budget_pending.pop(node["id"], None)
+            others = list(self._budget_pending.values())
+        
+        def prompt_tokens(candidate: Dict) -> int:
+            # Tâche à venir : son contexte amont n'est pas encore connu, compter le budget de contexte
+            tokens = self.context.count_tokens(candidate["task"].description)
+            if candidate is not node and candidate["depends_on"]:
+                tokens += self.context.token_budget
+            return tokens
+        
+        limit = self.budget.allocate([node] + others, prompt_tokens)[node["id"]]
+        if limit:
+            spec = self._agent_specs.get(node["role"], {"role": node["role"]})
+            node["task"].agent = self._create_agent(spec, node["route"]["model"], max_tokens=limit)
+            print(f"💰 Étape {step} : sortie limitée à {limit} tokens ({self.budget.summary()})")
+    
+    def _budget_exhausted(self) -> bool:
+        reason = self.budget.exhausted() if self.budget else None
+        if reason and not self._budget_stopped:
+            self._budget_stopped = True
+            print(f"⏹️ Budget épuisé ({reason}) : plus aucune tâche lancée, les tâches en cours se terminent")
+            self._emit("budget_exhausted", reason=reason)
+        return reason is not None
+    
+    def _kickoff_task(self, node: Dict) -> str:
+        # Exécuter la tâche
+        task = node["task"]
+        crew = Crew(agents=[task.agent], tasks=[task], verbose=False)
+        token = set_call_context(phase="task", role=node["role"], task_id=node["id"])
+        start = time.perf_counter()
+        try:
+            with trace_span(f"kickoff {node['id']}", "kickoff", heavy=True, role=node["role"],
+                            model=node["route"]["model"]) as span_args:
+                task_output = str(crew.kickoff())
+                span_args["output_chars"] = len(task_output)
+        finally:
+            reset_call_context(token)
+        self.router.record(node["route"], time.perf_counter() - start)
+        return task_output
+    
+    def _complete_task(self, node: Dict, task_output: str, input_hash: str) -> str:
+        if self.validator:
+            # Fichiers vérifiés (et corrigés) avant d'être écrits et transmis aux tâches suivantes
+            task_output = self._validate_task_output(node, task_output)
+        # Enregistrer immédiatement la sortie pour pouvoir reprendre après un arrêt
+        # (tâches de la file persistante : c'est la file qui tient ce journal)
+        if self.journal:
+            with trace_span("RunJournal.record_task", "journal"):
+                self.journal.record_task(node, task_output, input_hash)
+        # Écrire les fichiers de la tâche dès maintenant, rattachés à leur origine dans le manifeste
+        self.file_writer.write_task_files(task_output, {"role": node["role"], "task": node["id"], "input_hash": input_hash})
+        self._emit("task_completed", task=node["id"], role=node["role"])
+        return task_output
+    
+    @traced("stage")
+    def _validate_task_output(self, node: Dict, task_output: str) -> str:
+        """Vérifie les fichiers nommés d'une sortie ; les fichiers invalides sont renvoyés à
+        l'agent producteur avec leur erreur et remplacés dans la sortie par leur correction"""
+        files = self.file_writer.extract_file_structure(task_output)
+        if not files:
+            return task_output
+        errors = self.validator.validate(files)
+        initial_errors = len(errors)
+        
+        for attempt in range(1, self.repair_rounds + 1):
+            if not errors or self._budget_exhausted():
+                break
+            print(f"🧪 {len(errors)} fichier(s) invalide(s) ({node['role']}) : {', '.join(sorted(errors))} "
+                  f"— correction {attempt}/{self.repair_rounds}")
+            repaired = self.file_writer.extract_file_structure(self._request_repair(node, files, errors))
+            corrections = {
+                filename: repaired[filename] for filename in errors
+                if repaired.get(filename) is not None and repaired[filename] != files[filename]
+            }
+            if corrections:
+                # Réécrire exactement le bloc attribué à chaque fichier, puis revérifier toute la sortie
+                task_output = replace_file_blocks(task_output, corrections)
+                files = self.file_writer.extract_file_structure(task_output)
+            errors = self.validator.validate(files)
+        
+        for filename, error in sorted(errors.items()):
+            print(f"⚠️ Fichier invalide conservé ({node['role']}) : {filename} — {error}")
+        with self._stats_lock:
+            self._validation_stats["files"] += len(files)
+            self._validation_stats["invalid"] += initial_errors
+            self._validation_stats["repaired"] += initial_errors - len(errors)
+            self._validation_stats["failed"] += len(errors)
+        return task_output
+    
+    @traced("stage")
+    def _request_repair(self, node: Dict, files: Dict[str, str], errors: Dict[str, str]) -> str:
+        # Seuls les fichiers en échec, avec leur erreur : bien moins coûteux qu'une passe de QA complète
+        listing = "\n\n".join(
+            f"        ## {filename}\n        Erreur : {error}\n```{filename.rsplit('.', 1)[-1]}\n{files[filename]}\n```"
+            for filename, error in sorted(errors.items())
+        )
+        task = Task(
+            description=self._build_task_description(
+                f"Les fichiers suivants, produits pour la tâche « {node['description']} », ne passent pas "
+                f"la vérification statique. Corrige uniquement les erreurs signalées et renvoie chaque "
+                f"fichier complet, sous le même nom.\n\n{listing}"
+            ),
+            expected_output="Version corrigée et complète de chaque fichier invalide",
+            agent=node["task"].agent
+        )
+        crew = Crew(agents=[task.agent], tasks=[task], verbose=False)
+        token = set_call_context(phase="repair", role=node["role"], task_id=node["id"])
+        try:
+            return str(crew.kickoff())
+        finally:
+            reset_call_context(token)
+    
+    def _task_input_hash(self, node: Dict, upstream: List[Tuple[Dict, str]]) -> str:
+        # L'entrée d'une tâche : son rôle, sa description et les sorties des tâches amont
+        digest = hashlib.sha256()
+        digest.update(f"{node['role']}\0{node['description']}\0".encode("utf-8"))
+        for upstream_hash in sorted(
+            f"{dep['role']}:{hashlib.sha256(output.encode('utf-8')).hexdigest()}" for dep, output in upstream
+        ):
+            digest.update(upstream_hash.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _manifest_tasks(self) -> Dict[str, Dict]:
+        return {
+            task_id: {
+                "role": entry["role"],
+                "description": entry["description"],
+                "input_hash": entry.get("input_hash"),
+                "output_hash": hashlib.sha256(entry["output"].encode("utf-8")).hexdigest()
+            }
+            for task_id, entry in self.journal.data["tasks"].items()
+        }
+    
     def _generate_project_name(self, user_prompt: str) -> str:
         # Générer un nom de projet basé sur le prompt utilisateur
         words = user_prompt.lower().split()
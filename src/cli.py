@@ -3,10 +3,33 @@
 import argparse
 import sys
 import os
+import time
 from pathlib import Path
-from .agents.smart_manager import SmartManager
+from .config.rate_limiter import configure_rate_limiter
+from .utils.batch_runner import load_batch_prompts, run_batch, write_batch_summary
+from .utils.tracer import start_tracing, stop_tracing
 
 def main():
+    # Sous-commande de consultation du registre d'usage (aucune clé API requise)
+    if sys.argv[1:2] == ["stats"]:
+        run_stats_command(sys.argv[2:])
+        return
+    # Processus persistant qui exécute les jobs soumis par une API locale
+    if sys.argv[1:2] == ["serve"]:
+        run_serve_command(sys.argv[2:])
+        return
+    # File persistante : ajout de projets et processus workers
+    if sys.argv[1:2] == ["enqueue"]:
+        run_enqueue_command(sys.argv[2:])
+        return
+    if sys.argv[1:2] == ["worker"]:
+        run_worker_command(sys.argv[2:])
+        return
+    # Stockage de blobs partagé : contenus les plus dupliqués et ramasse-miettes
+    if sys.argv[1:2] == ["blobs"]:
+        run_blobs_command(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="Agent Code - Générateur de code avec agents IA spécialisés",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -15,6 +38,13 @@ Exemples d'usage:
   agent-code "Créer une API REST pour un e-commerce"
   agent-code "Application React avec authentification" --verbose
   agent-code --interactive
+  agent-code --batch prompts.jsonl --concurrency 4
+  agent-code --resume ./api_rest_e-commerce_20240101_120000
+  agent-code --update ./api_rest_e-commerce_20240101_120000 "API REST e-commerce avec paiement Stripe"
+  agent-code stats --by role --by model --since 7
+  agent-code serve --port 8765 --concurrency 2
+  agent-code enqueue --batch prompts.jsonl && agent-code worker --processes 4
+  agent-code --batch prompts.jsonl --blob-store auto && agent-code blobs
   
 Le code généré sera placé dans le répertoire courant.
         """
@@ -44,6 +74,48 @@ Le code généré sera placé dans le répertoire courant.
         help="Répertoire de sortie (défaut: répertoire courant)"
     )
     
+    add_manager_arguments(parser)
+    add_rate_limit_arguments(parser)
+    
+    parser.add_argument(
+        "--batch",
+        metavar="FICHIER",
+        help="Fichier JSONL de projets à générer (une ligne par projet : {\"prompt\": ..., \"name\": ...})"
+    )
+    
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=2,
+        help="Nombre de projets générés en parallèle en mode batch (défaut: 2)"
+    )
+    
+    parser.add_argument(
+        "--resume",
+        metavar="REPERTOIRE_PROJET",
+        help="Reprendre un projet interrompu : seules les tâches non terminées sont relancées"
+    )
+    
+    parser.add_argument(
+        "--update",
+        metavar="REPERTOIRE_PROJET",
+        help="Mettre à jour un projet existant avec un prompt révisé : seules les tâches dont l'entrée a changé sont relancées"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        metavar="FICHIER",
+        help="Enregistrer la chronologie de l'exécution (analyse, tâches, appels LLM, écritures) au format "
+             "Chrome Trace Event, lisible dans chrome://tracing ou https://ui.perfetto.dev"
+    )
+    
+    parser.add_argument(
+        "--trace-profile",
+        action="store_true",
+        help="Avec --trace : joindre aux étapes lourdes les fonctions les plus coûteuses (cProfile) "
+             "et les plus grosses allocations (tracemalloc) ; ralentit l'exécution"
+    )
+    
     parser.add_argument(
         "--version",
         action="version",
@@ -51,19 +123,25 @@ Le code généré sera placé dans le répertoire courant.
     )
     
     args = parser.parse_args()
-    
-    # Vérifier les variables d'environnement nécessaires
-    if not os.getenv("OPENAI_API_KEY"):
-        print("❌ Erreur: La variable d'environnement OPENAI_API_KEY est requise")
-        print("   Définissez votre clé API OpenAI avec:")
-        print("   export OPENAI_API_KEY='votre-clé-api'")
-        sys.exit(1)
+    prepare_environment(args)
+    if args.trace_profile and not args.trace:
+        parser.error("--trace-profile nécessite --trace")
+    if args.trace:
+        start_tracing(args.trace, profile=args.trace_profile)
     
     try:
-        if args.interactive or not args.prompt:
-            result = run_interactive_mode(args.output_dir, args.verbose)
+        if args.update:
+            if not args.prompt:
+                parser.error("--update nécessite le prompt révisé")
+            result = run_update_mode(args.update, args.prompt, **build_manager_options(args))
+        elif args.resume:
+            result = run_resume_mode(args.resume, **build_manager_options(args))
+        elif args.batch:
+            result = run_batch_mode(args.batch, args.output_dir, args.concurrency, **build_manager_options(args))
+        elif args.interactive or not args.prompt:
+            result = run_interactive_mode(args.output_dir, args.verbose, **build_manager_options(args))
         else:
-            result = run_direct_mode(args.prompt, args.output_dir, args.verbose)
+            result = run_direct_mode(args.prompt, args.output_dir, args.verbose, **build_manager_options(args))
             
         if args.verbose:
             print("\n" + "="*70)
@@ -80,8 +158,507 @@ Le code généré sera placé dans le répertoire courant.
             import traceback
             traceback.print_exc()
         sys.exit(1)
+    finally:
+        # Trace écrite même après une interruption : les étapes terminées y figurent
+        trace_path = stop_tracing()
+        if trace_path:
+            print(f"🕒 Trace : {trace_path} (chrome://tracing ou https://ui.perfetto.dev)")
+
+def prepare_environment(args):
+    """Vérifie la clé API et applique les limites de débit de la ligne de commande"""
+    # Vérifier les variables d'environnement nécessaires (inutile en mode replay hors ligne)
+    replay = (getattr(args, "llm_cache", None) or os.getenv("AGENT_CODE_LLM_CACHE", "")).lower() == "replay"
+    if not os.getenv("OPENAI_API_KEY") and not replay:
+        print("❌ Erreur: La variable d'environnement OPENAI_API_KEY est requise")
+        print("   Définissez votre clé API OpenAI avec:")
+        print("   export OPENAI_API_KEY='votre-clé-api'")
+        sys.exit(1)
+    
+    if args.rpm is not None or args.tpm is not None:
+        configure_rate_limiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+
+def add_manager_arguments(parser):
+    """Options du SmartManager, communes à la génération directe, à `serve` et à `enqueue`"""
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=4,
+        help="Nombre maximal de tâches indépendantes exécutées en parallèle (défaut: 4)"
+    )
+    
+    parser.add_argument(
+        "--context-budget",
+        type=int,
+        default=6000,
+        help="Budget en tokens du contexte transmis à chaque tâche (défaut: 6000)"
+    )
+    
+    parser.add_argument(
+        "--llm-cache",
+        choices=["off", "read", "replay"],
+        default=None,
+        help="Cache disque des réponses LLM : off, read (lecture/enregistrement) ou replay "
+             "(hors ligne, échec si absent). Défaut : variable AGENT_CODE_LLM_CACHE ou off"
+    )
+    
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Écrire chaque fichier dès que son bloc de code est reçu, sans attendre la fin du projet"
+    )
+    
+    parser.add_argument(
+        "--fuse-tasks",
+        action="store_true",
+        help="Regrouper les tâches d'un même agent en une seule requête LLM à sections délimitées"
+    )
+    
+    parser.add_argument(
+        "--fused-output-tokens",
+        type=int,
+        default=4000,
+        help="Budget de tokens de sortie d'une requête fusionnée, qui fixe le nombre de tâches regroupées (défaut: 4000)"
+    )
+    
+    parser.add_argument(
+        "--fsync",
+        action="store_true",
+        help="Synchroniser les fichiers générés sur disque (fsync groupé) pour survivre à une coupure"
+    )
+    
+    parser.add_argument(
+        "--blob-store",
+        choices=["off", "auto", "reflink", "hardlink", "copy"],
+        default=None,
+        help="Stocker chaque fichier extrait une seule fois par contenu et le lier dans le projet "
+             "(auto : reflink, puis lien dur, puis copie). Défaut : variable AGENT_CODE_BLOB_STORE ou off"
+    )
+    
+    parser.add_argument(
+        "--speculative",
+        action="store_true",
+        help="Diffuser l'analyse en streaming et démarrer la première tâche de chaque agent "
+             "sans dépendance dès que son entrée du plan est reçue"
+    )
+    
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Vérifier chaque fichier généré (Python, JSON, YAML, HTML, JS/TS/CSS) et renvoyer "
+             "les fichiers invalides à l'agent qui les a produits"
+    )
+    
+    parser.add_argument(
+        "--repair-rounds",
+        type=int,
+        default=1,
+        help="Nombre maximal de demandes de correction par tâche avec --validate (défaut: 1, 0 = signaler seulement)"
+    )
+    
+    parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        metavar="TOKENS",
+        help="Budget de tokens par projet (entrée et sortie) : la sortie de chaque tâche est bornée selon "
+             "sa priorité, et plus aucune tâche n'est lancée une fois le budget atteint"
+    )
+    
+    parser.add_argument(
+        "--max-cost",
+        type=float,
+        default=None,
+        metavar="DOLLARS",
+        help="Budget de coût estimé par projet, en dollars (prix de AGENT_CODE_MODEL_PRICES)"
+    )
+    
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        metavar="SECONDES",
+        help="Durée maximale par projet : passé ce délai, plus aucune tâche n'est lancée (résultat partiel, "
+             "reprise avec --resume)"
+    )
+    
+    parser.add_argument(
+        "--routes",
+        metavar="FICHIER",
+        help="Table de routage JSON des modèles par phase, rôle, tâche et complexité (défaut: AGENT_CODE_ROUTES ou table intégrée)"
+    )
+    
+    parser.add_argument(
+        "--fresh-plan",
+        action="store_true",
+        help="Ignorer le cache de plans et relancer l'analyse LLM même pour un prompt déjà vu"
+    )
+
+def add_rate_limit_arguments(parser):
+    """Limites de débit du processus, appliquées par prepare_environment"""
+    parser.add_argument(
+        "--rpm",
+        type=float,
+        default=None,
+        help="Limite de requêtes LLM par minute, partagée par tous les agents (défaut: AGENT_CODE_RPM ou illimité)"
+    )
+    
+    parser.add_argument(
+        "--tpm",
+        type=float,
+        default=None,
+        help="Limite de tokens LLM par minute, partagée par tous les agents (défaut: AGENT_CODE_TPM ou illimité)"
+    )
+
+def run_stats_command(argv):
+    """Sous-commande `agent-code stats` : tokens, coût et latences issus du registre d'usage"""
+    from .utils.ledger import GROUP_COLUMNS, UsageLedger
+    
+    parser = argparse.ArgumentParser(
+        prog="agent-code stats",
+        description="Statistiques des appels LLM enregistrés (tokens, coût estimé, latences p50/p95)"
+    )
+    parser.add_argument(
+        "--by",
+        action="append",
+        choices=list(GROUP_COLUMNS),
+        help="Regroupement (répétable, défaut: role, model et project)"
+    )
+    parser.add_argument(
+        "--since",
+        type=float,
+        default=None,
+        metavar="JOURS",
+        help="Ne considérer que les appels des N derniers jours"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Sortie JSON au lieu de tableaux"
+    )
+    args = parser.parse_args(argv)
+    
+    ledger = UsageLedger()
+    report = {group_by: ledger.summarize(group_by, args.since) for group_by in (args.by or ["role", "model", "project"])}
+    
+    if args.json:
+        import json
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+        return report
+    
+    period = f"{args.since:g} derniers jours" if args.since is not None else "depuis le début"
+    print(f"📊 Registre d'usage : {ledger.path} ({period})")
+    for group_by, rows in report.items():
+        print("\n" + "="*104)
+        print(f"{group_by.upper():<32} {'Appels':>7} {'Tokens in':>11} {'En cache':>8} {'Tokens out':>11} "
+              f"{'Coût $':>9} {'p50':>7} {'p95':>7} {'Retries':>8}")
+        print("="*104)
+        for row in rows:
+            cached = f"{100 * row['cached_tokens'] / row['prompt_tokens']:.0f}%" if row['prompt_tokens'] else "-"
+            print(f"{str(row['key'])[:32]:<32} {row['calls']:>7} {row['prompt_tokens']:>11} {cached:>8} "
+                  f"{row['completion_tokens']:>11} {row['cost']:>9.4f} {row['p50_latency']:>6.1f}s "
+                  f"{row['p95_latency']:>6.1f}s {row['retries']:>8}")
+        if not rows:
+            print("(aucun appel enregistré)")
+    return report
 
-def run_interactive_mode(output_dir: str, verbose: bool):
+def run_blobs_command(argv):
+    """Sous-commande `agent-code blobs` : contenus partagés entre projets et suppression des blobs orphelins"""
+    from .utils.blob_store import BlobStore
+    
+    parser = argparse.ArgumentParser(
+        prog="agent-code blobs",
+        description="Stockage des fichiers générés adressé par le contenu (AGENT_CODE_BLOB_DIR)"
+    )
+    parser.add_argument(
+        "--gc",
+        action="store_true",
+        help="Supprimer les blobs qu'aucun manifeste de projet ne référence"
+    )
+    parser.add_argument(
+        "--min-age",
+        type=float,
+        default=24,
+        metavar="HEURES",
+        help="Ne supprimer que les blobs ni écrits ni réutilisés depuis N heures (défaut: 24)"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Avec --gc : afficher ce qui serait supprimé sans rien supprimer"
+    )
+    parser.add_argument(
+        "--top",
+        type=int,
+        default=10,
+        help="Nombre de contenus partagés affichés (défaut: 10)"
+    )
+    parser.add_argument(
+        "--json",
+        action="store_true",
+        help="Sortie JSON"
+    )
+    args = parser.parse_args(argv)
+    
+    store = BlobStore(os.getenv("AGENT_CODE_BLOB_DIR") or None)
+    if args.gc:
+        result = store.gc(min_age_seconds=args.min_age * 3600, dry_run=args.dry_run)
+    else:
+        result = store.report(top=args.top)
+    
+    if args.json:
+        import json
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+        return result
+    
+    if args.gc:
+        verb = "seraient supprimé(s)" if args.dry_run else "supprimé(s)"
+        print(f"🧹 {result['removed']} blob(s) {verb} ({result['freed_bytes'] / 1024:.1f} Ko), "
+              f"{result['kept']} conservé(s) ; {result['projects']} projet(s) référencé(s), "
+              f"{result['stale_projects']} disparu(s)")
+        return result
+    
+    print(f"🧱 Stockage de blobs : {store.root}")
+    print(f"   {result['blobs']} blob(s), {result['stored_bytes'] / 1024:.1f} Ko sur disque pour "
+          f"{result['logical_bytes'] / 1024:.1f} Ko référencés par {result['projects']} projet(s)")
+    if result["projects_without_manifest"]:
+        print(f"   {result['projects_without_manifest']} projet(s) sans manifeste (en cours ou interrompus)")
+    if result["shared"]:
+        print(f"\n{'HASH':<14} {'Réf.':>5} {'Taille':>9}  Exemples")
+        for entry in result["shared"]:
+            print(f"{entry['hash'][:12]:<14} {entry['references']:>5} {entry['size']:>9}  {', '.join(entry['paths'])}")
+    return result
+
+def run_serve_command(argv):
+    """Sous-commande `agent-code serve` : API locale de jobs de génération, imports et clients gardés en mémoire"""
+    parser = argparse.ArgumentParser(
+        prog="agent-code serve",
+        description="Processus persistant qui génère les projets soumis par une API HTTP locale "
+                    "(POST /jobs, GET /jobs/<id>, GET /jobs/<id>/events en NDJSON, GET /health)"
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="Adresse d'écoute (défaut: 127.0.0.1, accès local uniquement)"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=8765,
+        help="Port d'écoute (défaut: 8765)"
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="CHEMIN",
+        help="Écouter sur une socket Unix plutôt qu'en TCP"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=2,
+        help="Nombre de jobs exécutés en parallèle (défaut: 2)"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=16,
+        help="Nombre maximal de jobs en attente ; au-delà les soumissions sont refusées (503) (défaut: 16)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Répertoire de sortie des projets (défaut: répertoire courant)"
+    )
+    add_manager_arguments(parser)
+    add_rate_limit_arguments(parser)
+    args = parser.parse_args(argv)
+    prepare_environment(args)
+    
+    from .utils.job_server import JobService, create_server
+    
+    output_dir = str(Path(args.output_dir).absolute())
+    service = JobService(output_dir, args.concurrency, args.queue_size, **build_manager_options(args))
+    start = time.perf_counter()
+    service.start()
+    server = create_server(service, args.host, args.port, args.socket)
+    address = args.socket or f"http://{args.host}:{server.server_port}"
+    print(f"🛰️ Agent Code prêt en {time.perf_counter() - start:.1f}s sur {address} "
+          f"({args.concurrency} job(s) en parallèle, file de {args.queue_size})")
+    print(f"📁 Répertoire de sortie : {output_dir}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⚠️ Arrêt du serveur")
+    finally:
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+def run_enqueue_command(argv):
+    """Sous-commande `agent-code enqueue` : ajoute des projets à la file persistante"""
+    parser = argparse.ArgumentParser(
+        prog="agent-code enqueue",
+        description="Ajoute des projets à la file persistante SQLite, exécutée par `agent-code worker`"
+    )
+    parser.add_argument(
+        "prompt",
+        nargs="?",
+        help="Description du projet à générer"
+    )
+    parser.add_argument(
+        "--name",
+        help="Nom du projet dans la file"
+    )
+    parser.add_argument(
+        "--priority",
+        choices=["low", "medium", "high", "critical"],
+        default="medium",
+        help="Priorité du projet dans la file (défaut: medium)"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FICHIER",
+        help="Fichier JSONL de projets (une ligne par projet : {\"prompt\": ..., \"name\": ..., \"priority\": ...})"
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="FICHIER",
+        help="Base SQLite de la file (défaut: AGENT_CODE_QUEUE ou <cache>/queue.sqlite)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Répertoire de sortie des projets (défaut: répertoire courant)"
+    )
+    add_manager_arguments(parser)
+    args = parser.parse_args(argv)
+    if not args.prompt and not args.batch:
+        parser.error("un prompt ou --batch est requis")
+    
+    from .utils.job_queue import JobQueue, get_queue_path
+    
+    queue = JobQueue(args.queue or get_queue_path())
+    entries = load_batch_prompts(args.batch) if args.batch else [{"prompt": args.prompt, "name": args.name}]
+    for entry in entries:
+        project_id = queue.enqueue(entry["prompt"], args.output_dir, entry.get("name"),
+                                   entry.get("priority", args.priority), build_manager_options(args))
+        print(f"📥 {project_id} : {entry.get('name') or entry['prompt']}")
+    print(f"🗃️ {len(entries)} projet(s) ajouté(s) à la file {queue.path}")
+
+def run_worker_command(argv):
+    """Sous-commande `agent-code worker` : exécute les projets et les tâches de la file persistante"""
+    parser = argparse.ArgumentParser(
+        prog="agent-code worker",
+        description="Exécute la file persistante : analyses, tâches (par priorité) et finalisations, "
+                    "sous bail renouvelé ; une unité dont le bail expire est reprise par un autre worker"
+    )
+    parser.add_argument(
+        "--queue",
+        metavar="FICHIER",
+        help="Base SQLite de la file (défaut: AGENT_CODE_QUEUE ou <cache>/queue.sqlite)"
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="Nombre de processus workers lancés (défaut: 1) ; les limites --rpm/--tpm sont réparties entre eux"
+    )
+    parser.add_argument(
+        "--lease",
+        type=float,
+        default=120.0,
+        metavar="SECONDES",
+        help="Durée du bail d'une unité de travail, renouvelé toutes les SECONDES/3 (défaut: 120)"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="Tentatives par unité avant d'abandonner le projet (défaut: 3)"
+    )
+    parser.add_argument(
+        "--poll",
+        type=float,
+        default=1.0,
+        metavar="SECONDES",
+        help="Intervalle d'interrogation de la file quand elle est vide (défaut: 1)"
+    )
+    parser.add_argument(
+        "--exit-when-idle",
+        action="store_true",
+        help="S'arrêter quand plus aucun projet n'est en attente ou en cours"
+    )
+    parser.add_argument(
+        "--status",
+        action="store_true",
+        help="Afficher l'état de la file et quitter"
+    )
+    add_rate_limit_arguments(parser)
+    args = parser.parse_args(argv)
+    
+    from .utils.job_queue import JobQueue, get_queue_path, run_worker_process
+    
+    queue_path = args.queue or get_queue_path()
+    if args.status:
+        status = JobQueue(queue_path).status()
+        print(f"🗃️ Projets : {status['projects'] or '{}'}")
+        print(f"🧩 Tâches : {status['tasks']}")
+        for project in status["recent"]:
+            print(f"   {project['id']} {project['status']:<10} {project['name'] or ''} "
+                  f"{project['project_directory'] or ''} {project['error'] or ''}".rstrip())
+        return
+    prepare_environment(args)
+    
+    processes = max(1, args.processes)
+    worker_options = {"lease_seconds": args.lease, "poll_interval": args.poll,
+                      "exit_when_idle": args.exit_when_idle, "max_attempts": args.max_attempts}
+    # Chaque processus a son propre limiteur : lui attribuer sa part des quotas
+    rate_limits = {"requests_per_minute": args.rpm / processes if args.rpm else None,
+                   "tokens_per_minute": args.tpm / processes if args.tpm else None}
+    print(f"👷 {processes} worker(s) sur la file {JobQueue(queue_path).path}")
+    if processes == 1:
+        processed = run_worker_process(queue_path, worker_options, rate_limits)
+        print(f"✅ {processed} unité(s) de travail exécutée(s)")
+        return
+    
+    import multiprocessing
+    context = multiprocessing.get_context("spawn")
+    workers = [
+        context.Process(target=run_worker_process, args=(queue_path, dict(worker_options), rate_limits))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        # Les unités en cours seront reprises à l'expiration de leur bail
+        for worker in workers:
+            worker.terminate()
+        print("\n⚠️ Workers arrêtés")
+
+def build_manager_options(args) -> dict:
+    """Options du SmartManager issues de la ligne de commande"""
+    return {
+        "max_workers": args.max_workers,
+        "context_token_budget": args.context_budget,
+        "llm_cache_mode": args.llm_cache,
+        "stream_files": args.stream,
+        "fresh_plan": args.fresh_plan,
+        "routes_file": args.routes,
+        "fsync_files": args.fsync,
+        "fuse_tasks": args.fuse_tasks,
+        "fused_output_tokens": args.fused_output_tokens,
+        "blob_store_mode": args.blob_store,
+        "speculative": args.speculative,
+        "validate_files": args.validate,
+        "repair_rounds": args.repair_rounds,
+        "max_tokens": args.max_tokens,
+        "max_cost": args.max_cost,
+        "deadline": args.deadline,
+    }
+
+def run_interactive_mode(output_dir: str, verbose: bool, **manager_options):
     """Mode interactif avec menu de sélection"""
     print("🤖 Agent Code - Système Multi-Agents Intelligent")
     print("=" * 50)
@@ -119,9 +696,9 @@ def run_interactive_mode(output_dir: str, verbose: bool):
     print(f"📁 Répertoire de sortie : {Path(output_dir).absolute()}")
     print("\n" + "="*70)
     
-    return execute_project(user_prompt, output_dir, verbose)
+    return execute_project(user_prompt, output_dir, verbose, **manager_options)
 
-def run_direct_mode(prompt: str, output_dir: str, verbose: bool):
+def run_direct_mode(prompt: str, output_dir: str, verbose: bool, **manager_options):
     """Mode direct avec prompt en argument"""
     print("🤖 Agent Code - Génération en cours...")
     print(f"🎯 Projet : {prompt}")
@@ -130,35 +707,52 @@ def run_direct_mode(prompt: str, output_dir: str, verbose: bool):
     if verbose:
         print("\n" + "="*70)
     
-    return execute_project(prompt, output_dir, verbose)
+    return execute_project(prompt, output_dir, verbose, **manager_options)
+
+def run_batch_mode(batch_file: str, output_dir: str, concurrency: int, **manager_options):
+    """Mode batch : génère plusieurs projets en parallèle à partir d'un fichier JSONL"""
+    prompts = load_batch_prompts(batch_file)
+    print(f"🤖 Agent Code - Batch de {len(prompts)} projets ({concurrency} en parallèle)")
+    print(f"📁 Répertoire de sortie : {Path(output_dir).absolute()}")
+    
+    start = time.perf_counter()
+    results = run_batch(prompts, str(Path(output_dir).absolute()), concurrency, **manager_options)
+    summary_file = write_batch_summary(results, output_dir, time.perf_counter() - start)
+    
+    if not all(r["success"] for r in results):
+        raise RuntimeError(f"Certains projets ont échoué, voir {summary_file}")
+    return f"{len(results)} projets générés, résumé : {summary_file}"
+
+def run_resume_mode(project_dir: str, **manager_options):
+    """Mode reprise : relance uniquement les tâches absentes du journal d'exécution"""
+    from .agents.smart_manager import SmartManager
+    
+    print("🤖 Agent Code - Reprise en cours...")
+    project_path = Path(project_dir).absolute()
+    smart_manager = SmartManager(output_directory=str(project_path.parent), **manager_options)
+    return smart_manager.resume_project(str(project_path))
 
-def execute_project(user_prompt: str, output_dir: str, verbose: bool):
+def run_update_mode(project_dir: str, prompt: str, **manager_options):
+    """Mode mise à jour : régénération incrémentale d'un projet existant"""
+    from .agents.smart_manager import SmartManager
+    
+    print("🤖 Agent Code - Mise à jour incrémentale...")
+    project_path = Path(project_dir).absolute()
+    smart_manager = SmartManager(output_directory=str(project_path.parent), **manager_options)
+    return smart_manager.update_project(str(project_path), prompt)
+
+def execute_project(user_prompt: str, output_dir: str, verbose: bool, **manager_options):
     """Exécute le projet avec le SmartManager"""
+    # Import différé : crewai et langchain ne sont chargés qu'au lancement d'une génération
+    from .agents.smart_manager import SmartManager
     
-    # Changer vers le répertoire de sortie
-    original_cwd = Path.cwd()
     output_path = Path(output_dir).absolute()
     
-    if not output_path.exists():
-        output_path.mkdir(parents=True, exist_ok=True)
-    
-    os.chdir(output_path)
+    # Créer le SmartManager : les fichiers sont écrits dans le répertoire de sortie
+    smart_manager = SmartManager(output_directory=str(output_path), **manager_options)
     
-    try:
-        # Créer le SmartManager avec le répertoire courant
-        smart_manager = SmartManager()
-        
-        # Configurer le FileWriter pour utiliser le répertoire courant
-        smart_manager.file_writer = smart_manager.file_writer.__class__(output_directory=None)
-        
-        # Exécuter le projet
-        result = smart_manager.execute_dynamic_project(user_prompt)
-        
-        return result
-        
-    finally:
-        # Revenir au répertoire original
-        os.chdir(original_cwd)
+    # Exécuter le projet
+    return smart_manager.execute_dynamic_project(user_prompt)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,179 @@
+import logging
+import os
+import threading
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import get_buffer_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+# Callbacks du SmartManager en cours, propagés aux threads de travail par le
+# TaskScheduler via contextvars.copy_context() (comme le contexte d'appel du registre)
+_active_callbacks: ContextVar[Tuple[BaseCallbackHandler, ...]] = ContextVar("agent_code_callbacks", default=())
+
+
+def bind_callbacks(handlers: List[BaseCallbackHandler]) -> Token:
+    return _active_callbacks.set(tuple(handlers))
+
+
+def reset_callbacks(token: Token):
+    _active_callbacks.reset(token)
+
+
+def get_base_url() -> str:
+    return (os.getenv("OPENAI_BASE_URL") or os.getenv("OPENAI_API_BASE") or DEFAULT_BASE_URL).rstrip("/")
+
+
+class CallbackRouter(BaseCallbackHandler):
+    """Callback unique des clients partagés : relaie chaque événement LLM aux
+    callbacks du projet en cours (``bind_callbacks``), ce qui permet de réutiliser
+    un même client pour plusieurs projets sans mélanger tokens et fichiers."""
+
+    # Seules les erreurs des callbacks qui le demandent (``raise_error``) sont propagées
+    # par ``_failed`` : les autres sont journalisées comme le ferait LangChain
+    raise_error = True
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        for handler in _active_callbacks.get():
+            try:
+                handler.on_chat_model_start(serialized, messages, **kwargs)
+            except NotImplementedError:
+                # Même repli que LangChain pour les callbacks sans on_chat_model_start
+                self._call(handler, "on_llm_start", serialized, [get_buffer_string(m) for m in messages], **kwargs)
+            except Exception as e:
+                self._failed(handler, "on_chat_model_start", e)
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self._dispatch("on_llm_start", serialized, prompts, **kwargs)
+
+    def on_llm_new_token(self, token, **kwargs) -> None:
+        self._dispatch("on_llm_new_token", token, **kwargs)
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        self._dispatch("on_llm_end", response, **kwargs)
+
+    def on_llm_error(self, error, **kwargs) -> None:
+        self._dispatch("on_llm_error", error, **kwargs)
+
+    def _dispatch(self, event: str, *args, **kwargs):
+        for handler in _active_callbacks.get():
+            self._call(handler, event, *args, **kwargs)
+
+    def _call(self, handler, event: str, *args, **kwargs):
+        try:
+            getattr(handler, event)(*args, **kwargs)
+        except Exception as e:
+            self._failed(handler, event, e)
+
+    @staticmethod
+    def _failed(handler, event: str, error: Exception):
+        if getattr(handler, "raise_error", False):
+            raise error
+        logger.warning("Erreur dans le callback %s.%s : %s", type(handler).__name__, event, error)
+
+
+class ClientPool:
+    """Clients LLM et connexions HTTP partagés par toutes les tâches et tous les
+    projets du processus (mode batch, utilisation embarquée).
+
+    - un ``httpx.Client`` keep-alive par endpoint, passé à chaque client OpenAI ;
+    - un client LLM par (fabrique, modèle, options).
+
+    Les agents crewai ne sont pas partagés : l'exécution d'un crew modifie l'agent
+    (crew, agent_executor...), chaque tâche construit donc le sien.
+    """
+
+    def __init__(self, max_connections: int = 20, keepalive_expiry: float = 30.0):
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.callback_router = CallbackRouter()
+        self._http_clients: Dict[str, httpx.Client] = {}
+        self._llms: Dict[Tuple, Any] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "llm_created": 0, "llm_hits": 0,
+            "http_requests": 0, "http_connections": 0
+        }
+
+    def http_client(self, base_url: Optional[str] = None) -> httpx.Client:
+        base_url = base_url or get_base_url()
+        with self._lock:
+            client = self._http_clients.get(base_url)
+            if client is None:
+                client = httpx.Client(
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections,
+                                        keepalive_expiry=self.keepalive_expiry),
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                    follow_redirects=True,
+                    event_hooks={"request": [self._trace_request]}
+                )
+                self._http_clients[base_url] = client
+            return client
+
+    def llm(self, factory: Callable, model: str, **options):
+        key = (factory, model) + tuple(sorted(options.items()))
+        return self._get_or_create(
+            self._llms, "llm", key, lambda: factory(model=model, callbacks=[self.callback_router], **options)
+        )
+
+    def _get_or_create(self, entries: Dict[Tuple, Any], counter: str, key: Tuple, create: Callable[[], Any]):
+        with self._lock:
+            if key in entries:
+                self._counters[f"{counter}_hits"] += 1
+                return entries[key]
+        # Construction hors verrou : un client LLM demande son client HTTP au pool
+        value = create()
+        with self._lock:
+            if key in entries:
+                # Construit en parallèle par un autre thread : garder le premier
+                self._counters[f"{counter}_hits"] += 1
+                return entries[key]
+            entries[key] = value
+            self._counters[f"{counter}_created"] += 1
+            return value
+
+    def llms(self) -> List[Any]:
+        with self._lock:
+            return list(self._llms.values())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._counters)
+        stats["http_reused"] = max(0, stats["http_requests"] - stats["http_connections"])
+        return stats
+
+    def close(self):
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            self._http_clients.clear()
+
+    def _trace_request(self, request: httpx.Request):
+        with self._lock:
+            self._counters["http_requests"] += 1
+        # Événements de httpcore : une connexion TCP ouverte = requête sans réutilisation
+        request.extensions["trace"] = self._trace_event
+
+    def _trace_event(self, event_name: str, info: Dict):
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self._counters["http_connections"] += 1
+
+
+_client_pool: Optional[ClientPool] = None
+_client_pool_lock = threading.Lock()
+
+
+def get_client_pool() -> ClientPool:
+    """Pool unique du processus (AGENT_CODE_MAX_CONNECTIONS connexions par endpoint)"""
+    global _client_pool
+    with _client_pool_lock:
+        if _client_pool is None:
+            _client_pool = ClientPool(max_connections=int(os.getenv("AGENT_CODE_MAX_CONNECTIONS", "20")))
+        return _client_pool
@@ -0,0 +1,195 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.caches import BaseCache, RETURN_VAL_TYPE
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from src.config.paths import get_cache_dir
+
+CACHE_MODES = ("off", "read", "replay")
+
+
+def get_cache_mode() -> str:
+    mode = os.getenv("AGENT_CODE_LLM_CACHE", "off").strip().lower()
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Mode de cache LLM inconnu : {mode} (attendu : {', '.join(CACHE_MODES)})")
+    return mode
+
+
+class CacheMissError(RuntimeError):
+    """Levée en mode replay lorsqu'une réponse n'a jamais été enregistrée."""
+
+
+class ResponseCache(BaseCache):
+    """Cache disque des réponses LLM, adressé par le contenu.
+
+    La clé est le hash SHA-256 du modèle, de la température et de la liste
+    normalisée des messages. Modes :
+
+    - ``read`` : lecture du cache, appel réseau et enregistrement en cas d'absence ;
+    - ``replay`` : lecture seule, toute absence lève ``CacheMissError`` (exécution hors ligne).
+
+    Les entrées inutilisées depuis plus de ``max_age_days`` sont supprimées, puis les
+    moins récemment utilisées tant que la taille totale dépasse ``max_bytes``.
+    """
+
+    def __init__(self, model: str, temperature: float, mode: str = "read", directory: Optional[Path] = None,
+                 max_bytes: int = 500 * 1024 * 1024, max_age_days: float = 30, max_tokens: Optional[int] = None):
+        if mode not in ("read", "replay"):
+            raise ValueError(f"Mode de cache invalide pour ResponseCache : {mode}")
+        self.model = model
+        self.temperature = temperature
+        # Une réponse tronquée par une limite de sortie ne doit pas servir un appel sans limite
+        self.max_tokens = max_tokens
+        self.mode = mode
+        self.directory = Path(directory) if directory else get_cache_dir() / "llm"
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_days * 86400
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._writes_since_eviction = 0
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def key(self, prompt: str) -> str:
+        fields = {
+            "model": self.model,
+            "temperature": self.temperature,
+            "messages": self._normalize_messages(prompt)
+        }
+        if self.max_tokens:
+            # Clés inchangées pour les appels sans limite
+            fields["max_tokens"] = self.max_tokens
+        payload = json.dumps(fields, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _normalize_messages(self, prompt: str):
+        # Le prompt est la sérialisation langchain de la liste des messages : on ne
+        # garde que le type et le contenu, sans les espaces de fin de ligne
+        try:
+            messages = json.loads(prompt)
+        except ValueError:
+            return self._normalize_text(prompt)
+        if not isinstance(messages, list):
+            return self._normalize_text(prompt)
+
+        normalized = []
+        for message in messages:
+            kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+            content = kwargs.get("content", "")
+            if isinstance(content, str):
+                content = self._normalize_text(content)
+            normalized.append({"type": kwargs.get("type") or message.get("id", [""])[-1], "content": content})
+        return normalized
+
+    def _normalize_text(self, text: str) -> str:
+        return "\n".join(line.rstrip() for line in text.strip().splitlines())
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        path = self._path(self.key(prompt))
+        try:
+            if time.time() - path.stat().st_mtime > self.max_age_seconds:
+                raise FileNotFoundError(path)
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            generations = [self._load_generation(item) for item in entry["generations"]]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            if self.mode == "replay":
+                raise CacheMissError(
+                    f"Aucune réponse enregistrée pour ce prompt (modèle {self.model}) en mode replay"
+                )
+            return None
+
+        # Marquer l'entrée comme récemment utilisée pour l'éviction LRU
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        if self.mode == "replay":
+            return
+        path = self._path(self.key(prompt))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        entry = {"created": time.time(), "model": self.model, "temperature": self.temperature,
+                 "generations": [self._dump_generation(generation) for generation in return_val]}
+
+        # Écriture atomique : fichier temporaire puis renommage
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        with self._lock:
+            self._writes_since_eviction += 1
+            should_evict = self._writes_since_eviction >= 50
+            if should_evict:
+                self._writes_since_eviction = 0
+        if should_evict:
+            self.evict()
+
+    def _dump_generation(self, generation: Generation) -> dict:
+        item = {"text": generation.text, "generation_info": generation.generation_info}
+        if isinstance(generation, ChatGeneration):
+            item["message"] = message_to_dict(generation.message)
+        return item
+
+    def _load_generation(self, item: dict) -> Generation:
+        if "message" in item:
+            message = messages_from_dict([item["message"]])[0]
+            # Une réponse rejouée ne consomme aucun token : ne pas la recompter
+            if getattr(message, "usage_metadata", None):
+                message.usage_metadata = None
+            return ChatGeneration(message=message, generation_info=item.get("generation_info"))
+        return Generation(text=item["text"], generation_info=item.get("generation_info"))
+
+    def evict(self) -> int:
+        """Supprime les entrées expirées puis les plus anciennes au-delà de ``max_bytes``"""
+        now = time.time()
+        entries = []
+        removed = 0
+
+        for path in self.directory.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                path.unlink(missing_ok=True)
+                removed += 1
+            else:
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        return removed
+
+    def clear(self, **kwargs: Any) -> None:
+        for path in self.directory.glob("*/*.json"):
+            path.unlink(missing_ok=True)
@@ -1,12 +1,103 @@
 import os
+import time
 from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from src.config.client_pool import get_client_pool
+from src.config.llm_cache import ResponseCache, get_cache_mode
+from src.config.rate_limiter import get_rate_limiter
+from src.utils.usage import extract_token_usage
 
 load_dotenv()
 
-def get_llm(model="gpt-4", temperature=0.3):
-    return ChatOpenAI(
+class RateLimitedChatOpenAI(ChatOpenAI):
+    """ChatOpenAI dont chaque requête passe par le limiteur partagé du processus"""
+    
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = get_rate_limiter()
+        estimated_tokens = self._estimate_tokens(messages)
+        parent = super()._generate
+        return limiter.call(
+            lambda: parent(messages, stop=stop, run_manager=run_manager, **kwargs),
+            estimated_tokens,
+            usage_fn=lambda result: sum(extract_token_usage(result))
+        )
+    
+    def _stream(self, messages, stop=None, run_manager=None, **kwargs):
+        limiter = get_rate_limiter()
+        estimated_tokens = self._estimate_tokens(messages)
+        attempt = 0
+        
+        while True:
+            started = limiter.acquire(estimated_tokens)
+            received = False
+            released = False
+            actual_tokens = None
+            try:
+                for chunk in super()._stream(messages, stop=stop, run_manager=run_manager, **kwargs):
+                    received = True
+                    # stream_usage : l'usage réel arrive avec le dernier fragment
+                    usage = getattr(chunk.message, "usage_metadata", None)
+                    if usage:
+                        actual_tokens = (actual_tokens or 0) + usage.get("input_tokens", 0) + usage.get("output_tokens", 0)
+                    yield chunk
+            except Exception as e:
+                released = True
+                limiter.release(started, error=e, estimated_tokens=estimated_tokens)
+                # Impossible de reprendre un flux déjà commencé
+                delay = None if received else limiter.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                limiter.record_retry()
+                print(f"⏳ {type(e).__name__} : nouvelle tentative dans {delay:.1f}s")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            except BaseException as e:
+                # Flux fermé par le consommateur (GeneratorExit), interruption, annulation :
+                # rendre la place sans nouvelle tentative
+                released = True
+                limiter.release(started, error=e, estimated_tokens=estimated_tokens)
+                raise
+            finally:
+                if not released:
+                    limiter.release(started, estimated_tokens=estimated_tokens, actual_tokens=actual_tokens)
+            return
+    
+    def _estimate_tokens(self, messages) -> int:
+        # ~4 caractères par token en entrée, plus la sortie maximale attendue
+        prompt_chars = sum(len(str(message.content)) for message in messages)
+        return prompt_chars // 4 + (self.max_tokens or 1000)
+
+def get_llm(model="gpt-4", temperature=0.3, cache_mode=None, streaming=False, callbacks=None, max_tokens=None):
+    cache_mode = cache_mode or get_cache_mode()
+    api_key = os.getenv("OPENAI_API_KEY")
+    cache = None
+    
+    if cache_mode != "off":
+        cache = ResponseCache(
+            model,
+            temperature,
+            mode=cache_mode,
+            max_bytes=int(float(os.getenv("AGENT_CODE_LLM_CACHE_MAX_MB", "500")) * 1024 * 1024),
+            max_age_days=float(os.getenv("AGENT_CODE_LLM_CACHE_MAX_AGE_DAYS", "30")),
+            max_tokens=max_tokens
+        )
+        # En mode replay aucune requête n'est émise : une clé factice suffit
+        if cache_mode == "replay" and not api_key:
+            api_key = "replay-offline"
+    
+    return RateLimitedChatOpenAI(
         model=model,
         temperature=temperature,
-        openai_api_key=os.getenv("OPENAI_API_KEY")
-    )
\ No newline at end of file
+        # Limite de sortie par appel (budget de tokens du projet), None = limite du modèle
+        max_tokens=max_tokens,
+        openai_api_key=api_key,
+        cache=cache,
+        streaming=streaming,
+        stream_usage=streaming,
+        callbacks=callbacks,
+        # Connexions keep-alive partagées par tous les clients du processus
+        http_client=get_client_pool().http_client(),
+        # Les nouvelles tentatives sont gérées par le limiteur partagé
+        max_retries=0
+    )
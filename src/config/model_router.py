@@ -0,0 +1,151 @@
+import json
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from src.utils.ledger import percentile
+
+COMPLEXITIES = ("simple", "medium", "complex")
+
+# Table par défaut : les règles sont évaluées dans l'ordre, la première qui correspond l'emporte.
+# Chaque critère absent est ignoré ; les mots-clés sont cherchés dans le rôle ou la tâche.
+DEFAULT_ROUTING = {
+    "models": {
+        "fast": "gpt-4o-mini",
+        "strong": "gpt-4"
+    },
+    "default": "strong",
+    "routes": [
+        {"name": "planning-simple", "phase": "analysis", "complexity": ["simple"], "model": "fast"},
+        {"name": "planning", "phase": "analysis", "model": "strong"},
+        {"name": "docs-config", "phase": "task", "model": "fast",
+         "keywords": ["documentation", "readme", "doc", "rédacteur", "writer", "config", "configuration",
+                      "docker", "déploiement", "deploiement", "ci/cd", "env", "makefile"]},
+        {"name": "simple-project", "phase": "task", "complexity": ["simple"], "model": "fast"},
+        {"name": "core-code", "phase": "task", "model": "strong"}
+    ]
+}
+
+# Indices de composants pour estimer la complexité avant l'analyse
+COMPONENT_KEYWORDS = {
+    "frontend": ("frontend", "react", "vue", "angular", "interface", "ui", "dashboard"),
+    "backend": ("backend", "api", "serveur", "server", "rest", "graphql", "fastapi", "django", "node"),
+    "database": ("database", "base de donnees", "postgresql", "mysql", "mongodb", "sql", "redis"),
+    "auth": ("auth", "authentification", "login", "oauth", "jwt", "utilisateurs"),
+    "payments": ("paiement", "payment", "stripe", "panier", "commandes"),
+    "realtime": ("temps reel", "websocket", "real-time", "streaming", "notifications"),
+    "data": ("etl", "pipeline", "spark", "data lake", "kafka", "ml", "machine learning", "modele"),
+    "devops": ("docker", "kubernetes", "ci/cd", "deploiement", "mlops", "monitoring", "grafana"),
+    "mobile": ("mobile", "react native", "flutter", "ios", "android"),
+    "tests": ("tests", "qa", "qualite")
+}
+
+FEATURE_SEPARATORS = re.compile(r",| et | avec | and | with ")
+
+
+def _normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", text.lower())
+    return "".join(c for c in text if not unicodedata.combining(c))
+
+
+def _contains(text: str, keyword: str) -> bool:
+    # Mot entier : "doc" ne doit pas correspondre à "docker"
+    return re.search(r"(?<!\w)" + re.escape(_normalize(keyword)) + r"(?!\w)", text) is not None
+
+
+def estimate_complexity(prompt: str) -> str:
+    """Estimation de la complexité d'un prompt avant l'analyse LLM.
+
+    Score = composants techniques reconnus + fonctionnalités énumérées (virgules,
+    "et", "avec"). Volontairement prudente : seuls les prompts courts et peu
+    chargés sont classés ``simple``.
+    """
+    text = _normalize(prompt)
+    components = sum(
+        1 for keywords in COMPONENT_KEYWORDS.values()
+        if any(_contains(text, keyword) for keyword in keywords)
+    )
+    features = len(FEATURE_SEPARATORS.findall(text))
+    score = components + features
+    if score <= 4 and len(text.split()) <= 30:
+        return "simple"
+    if score >= 8:
+        return "complex"
+    return "medium"
+
+
+class ModelRouter:
+    """Choisit le modèle de chaque appel selon la phase, le rôle, la tâche et la complexité.
+
+    La table de routage (voir ``DEFAULT_ROUTING``) associe des alias de modèles à des
+    noms réels et liste des règles ordonnées. Les durées des appels sont
+    enregistrées par route pour le rapport de fin d'exécution.
+    """
+
+    def __init__(self, routing: Optional[Dict] = None):
+        routing = routing or DEFAULT_ROUTING
+        self.models: Dict[str, str] = dict(routing.get("models", {}))
+        self.default = routing.get("default", "strong")
+        self.routes: List[Dict] = list(routing.get("routes", []))
+        self._latencies: Dict[str, List[float]] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, routes_file: Optional[str] = None) -> "ModelRouter":
+        """Table lue depuis ``routes_file`` ou AGENT_CODE_ROUTES ; AGENT_CODE_ROUTING=off désactive le routage"""
+        routes_file = routes_file or os.getenv("AGENT_CODE_ROUTES")
+        if routes_file:
+            with open(routes_file, 'r', encoding='utf-8') as f:
+                routing = json.load(f)
+        else:
+            routing = json.loads(json.dumps(DEFAULT_ROUTING))
+            routing["models"]["fast"] = os.getenv("AGENT_CODE_FAST_MODEL", routing["models"]["fast"])
+            routing["models"]["strong"] = os.getenv("AGENT_CODE_STRONG_MODEL", routing["models"]["strong"])
+
+        if os.getenv("AGENT_CODE_ROUTING", "on").strip().lower() in ("off", "0", "false", "no"):
+            # Un seul modèle pour tous les appels, comme avant le routage
+            routing = {"models": routing.get("models", {}), "default": routing.get("default", "strong"), "routes": []}
+        return cls(routing)
+
+    @property
+    def default_model(self) -> str:
+        return self.resolve(self.default)
+
+    def resolve(self, model: str) -> str:
+        # Alias ("fast", "strong") ou nom de modèle direct
+        return self.models.get(model, model)
+
+    def route(self, phase: str, role: str = "", task: str = "", complexity: Optional[str] = None) -> Dict:
+        """Renvoie ``{"name", "model"}`` de la première règle correspondante"""
+        text = _normalize(f"{role} {task}")
+        complexity = complexity if complexity in COMPLEXITIES else None
+        for rule in self.routes:
+            if rule.get("phase") and rule["phase"] != phase:
+                continue
+            if rule.get("complexity") and complexity not in rule["complexity"]:
+                continue
+            if rule.get("roles") and not any(_contains(_normalize(role), r) for r in rule["roles"]):
+                continue
+            if rule.get("keywords") and not any(_contains(text, k) for k in rule["keywords"]):
+                continue
+            return {"name": rule.get("name", rule.get("model")), "model": self.resolve(rule.get("model", self.default))}
+        return {"name": "default", "model": self.default_model}
+
+    def record(self, route: Dict, latency: float):
+        with self._lock:
+            self._latencies.setdefault(f"{route['name']} ({route['model']})", []).append(latency)
+
+    def report(self) -> List[Dict]:
+        with self._lock:
+            return [
+                {
+                    "route": name,
+                    "calls": len(latencies),
+                    "total": sum(latencies),
+                    "p50": percentile(latencies, 0.5),
+                    "p95": percentile(latencies, 0.95)
+                }
+                for name, latencies in sorted(self._latencies.items())
+            ]
@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+
+def get_cache_dir() -> Path:
+    # Répertoire racine des caches locaux d'agent-code
+    return Path(os.getenv("AGENT_CODE_CACHE_DIR", str(Path.home() / ".cache" / "agent-code"))).expanduser()
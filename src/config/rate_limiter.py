@@ -0,0 +1,199 @@
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+
+class TokenBucket:
+    """Seau à jetons rechargé en continu : ``per_minute`` unités par minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float):
+        # Une demande plus grande que la capacité attend simplement un seau plein
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(min(wait, 1.0))
+
+    def adjust(self, amount: float):
+        # Corriger a posteriori une estimation (positif : débit supplémentaire)
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveRateLimiter:
+    """Limiteur partagé par tous les clients LLM du processus.
+
+    - débit borné en requêtes et en tokens par minute (seaux à jetons, 0 = illimité) ;
+    - concurrence adaptative AIMD : +1/limite à chaque succès, x0.5 sur une erreur
+      429, x0.9 lorsqu'une réponse dépasse la latence cible ;
+    - nouvelles tentatives avec backoff exponentiel et gigue sur les erreurs
+      transitoires (429, délais, connexion, 5xx), en respectant ``Retry-After``.
+    """
+
+    def __init__(self, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = 16, min_concurrency: int = 1, latency_target: float = 0,
+                 max_retries: int = 6, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.latency_target = latency_target
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.concurrency_limit = float(self.max_concurrency)
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self._condition = threading.Condition()
+        self._thread_state = threading.local()
+
+    def acquire(self, estimated_tokens: int = 0) -> float:
+        with self._condition:
+            while self.in_flight >= int(self.concurrency_limit):
+                self._condition.wait()
+            self.in_flight += 1
+        if self.request_bucket:
+            self.request_bucket.acquire(1)
+        if self.token_bucket and estimated_tokens:
+            self.token_bucket.acquire(estimated_tokens)
+        return time.monotonic()
+
+    def release(self, started: float, error: Optional[BaseException] = None,
+                estimated_tokens: int = 0, actual_tokens: Optional[int] = None):
+        latency = time.monotonic() - started
+        if self.token_bucket and actual_tokens is not None:
+            self.token_bucket.adjust(actual_tokens - estimated_tokens)
+
+        with self._condition:
+            self.in_flight -= 1
+            self.requests += 1
+            if error is not None and is_rate_limit_error(error):
+                self.rate_limited += 1
+                self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.5)
+            elif error is None:
+                if self.latency_target and latency > self.latency_target:
+                    self.concurrency_limit = max(self.min_concurrency, self.concurrency_limit * 0.9)
+                else:
+                    self.concurrency_limit = min(self.max_concurrency,
+                                                 self.concurrency_limit + 1.0 / self.concurrency_limit)
+            self._condition.notify_all()
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """Délai avant la prochaine tentative, ou ``None`` si l'erreur est définitive"""
+        if attempt >= self.max_retries or not is_transient_error(error):
+            return None
+        retry_after = _retry_after(error)
+        # Backoff exponentiel avec gigue complète
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+        return max(delay, retry_after or 0)
+
+    def call(self, fn: Callable, estimated_tokens: int = 0, usage_fn: Callable = None):
+        attempt = 0
+        while True:
+            started = self.acquire(estimated_tokens)
+            try:
+                result = fn()
+            except Exception as e:
+                self.release(started, error=e, estimated_tokens=estimated_tokens)
+                delay = self.retry_delay(e, attempt)
+                if delay is None:
+                    raise
+                self.record_retry()
+                print(f"⏳ {type(e).__name__} : nouvelle tentative dans {delay:.1f}s ({attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+                continue
+            self.release(started, estimated_tokens=estimated_tokens,
+                         actual_tokens=usage_fn(result) if usage_fn else None)
+            return result
+
+    def record_retry(self):
+        with self._condition:
+            self.retries += 1
+        # Compteur propre au thread : permet d'attribuer les tentatives à un appel précis
+        self._thread_state.retries = self.thread_retries() + 1
+
+    def thread_retries(self) -> int:
+        return getattr(self._thread_state, "retries", 0)
+
+    def stats(self) -> Dict[str, float]:
+        with self._condition:
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "rate_limited": self.rate_limited,
+                "concurrency_limit": round(self.concurrency_limit, 2),
+                "in_flight": self.in_flight
+            }
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient_error(error: BaseException) -> bool:
+    if is_rate_limit_error(error):
+        return True
+    status = getattr(error, "status_code", None)
+    if isinstance(status, int) and status >= 500:
+        return True
+    return type(error).__name__ in ("APITimeoutError", "APIConnectionError", "InternalServerError", "Timeout")
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+_rate_limiter: Optional[AdaptiveRateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def _limiter_from_env(**overrides) -> AdaptiveRateLimiter:
+    options = {
+        "requests_per_minute": float(os.getenv("AGENT_CODE_RPM", "0")),
+        "tokens_per_minute": float(os.getenv("AGENT_CODE_TPM", "0")),
+        "max_concurrency": int(os.getenv("AGENT_CODE_MAX_CONCURRENCY", "16")),
+        "latency_target": float(os.getenv("AGENT_CODE_LATENCY_TARGET", "0")),
+        "max_retries": int(os.getenv("AGENT_CODE_MAX_RETRIES", "6"))
+    }
+    options.update({key: value for key, value in overrides.items() if value is not None})
+    return AdaptiveRateLimiter(**options)
+
+
+def get_rate_limiter() -> AdaptiveRateLimiter:
+    """Limiteur unique du processus, configuré par les variables AGENT_CODE_*"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        if _rate_limiter is None:
+            _rate_limiter = _limiter_from_env()
+        return _rate_limiter
+
+
+def configure_rate_limiter(**overrides) -> AdaptiveRateLimiter:
+    """Remplace le limiteur du processus ; les options non fournies viennent de l'environnement"""
+    global _rate_limiter
+    with _rate_limiter_lock:
+        _rate_limiter = _limiter_from_env(**overrides)
+        return _rate_limiter
@@ -1,15 +1,27 @@
-from crewai import Crew
-from src.agents.project_agents import manager, dev_backend, dev_frontend, qa_agent
-from src.tasks.project_tasks import task_planification, task_backend, task_frontend, task_qa
+from functools import lru_cache
 
-crew = Crew(
-    agents=[manager, dev_backend, dev_frontend, qa_agent],
-    tasks=[task_planification, task_backend, task_frontend, task_qa],
-    verbose=True
-)
+@lru_cache(maxsize=None)
+def get_crew():
+    # Construit l'équipe (et donc les agents et leur LLM) au premier usage
+    from crewai import Crew
+    from src.agents.project_agents import get_agents
+    from src.tasks.project_tasks import get_tasks
+
+    agents = get_agents()
+    tasks = get_tasks()
+    return Crew(
+        agents=[agents["manager"], agents["dev_backend"], agents["dev_frontend"], agents["qa_agent"]],
+        tasks=[tasks["task_planification"], tasks["task_backend"], tasks["task_frontend"], tasks["task_qa"]],
+        verbose=True
+    )
+
+def __getattr__(name):
+    if name == "crew":
+        return get_crew()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def run_project():
-    results = crew.kickoff()
+    results = get_crew().kickoff()
     print("=== Résultat final ===")
     print(results)
-    return results
\ No newline at end of file
+    return results
@@ -1,28 +1,49 @@
-from crewai import Task
-from src.agents.project_agents import manager, dev_backend, dev_frontend, qa_agent
+from functools import lru_cache
 
 user_input = "Je veux une application de prise de notes en ligne avec sauvegarde cloud."
 
-task_planification = Task(
-    description=f"Analyse le besoin suivant : '{user_input}' et crée un plan de projet détaillé. Identifie les composants front, back, et QA.",
-    expected_output="Un plan de projet structuré avec les tâches réparties entre le frontend, backend, et QA.",
-    agent=manager
-)
-
-task_backend = Task(
-    description="Développe les endpoints backend nécessaires pour gérer les utilisateurs, les notes, et la persistance cloud. Utilise Express.js et MongoDB.",
-    expected_output="Un dossier 'backend/' avec les endpoints Node.js opérationnels.",
-    agent=dev_backend
-)
-
-task_frontend = Task(
-    description="Crée une interface web simple avec React permettant de créer, modifier et afficher des notes. Utilise les endpoints backend existants.",
-    expected_output="Un dossier 'frontend/' avec une app React fonctionnelle.",
-    agent=dev_frontend
-)
-
-task_qa = Task(
-    description="Teste le frontend et le backend de l'application. Vérifie que toutes les fonctionnalités marchent. Documente les bugs éventuels et vérifie la conformité avec le cahier des charges.",
-    expected_output="Rapport de test avec résultats, bugs détectés, et suggestions d'amélioration.",
-    agent=qa_agent
-)
\ No newline at end of file
+# Comme les agents, les tâches sont construites au premier accès
+LAZY_ATTRIBUTES = ("task_planification", "task_backend", "task_frontend", "task_qa")
+
+@lru_cache(maxsize=None)
+def get_tasks() -> dict:
+    from crewai import Task
+    from src.agents.project_agents import get_agents
+
+    agents = get_agents()
+
+    task_planification = Task(
+        description=f"Analyse le besoin suivant : '{user_input}' et crée un plan de projet détaillé. Identifie les composants front, back, et QA.",
+        expected_output="Un plan de projet structuré avec les tâches réparties entre le frontend, backend, et QA.",
+        agent=agents["manager"]
+    )
+
+    task_backend = Task(
+        description="Développe les endpoints backend nécessaires pour gérer les utilisateurs, les notes, et la persistance cloud. Utilise Express.js et MongoDB.",
+        expected_output="Un dossier 'backend/' avec les endpoints Node.js opérationnels.",
+        agent=agents["dev_backend"]
+    )
+
+    task_frontend = Task(
+        description="Crée une interface web simple avec React permettant de créer, modifier et afficher des notes. Utilise les endpoints backend existants.",
+        expected_output="Un dossier 'frontend/' avec une app React fonctionnelle.",
+        agent=agents["dev_frontend"]
+    )
+
+    task_qa = Task(
+        description="Teste le frontend et le backend de l'application. Vérifie que toutes les fonctionnalités marchent. Documente les bugs éventuels et vérifie la conformité avec le cahier des charges.",
+        expected_output="Rapport de test avec résultats, bugs détectés, et suggestions d'amélioration.",
+        agent=agents["qa_agent"]
+    )
+
+    return {
+        "task_planification": task_planification,
+        "task_backend": task_backend,
+        "task_frontend": task_frontend,
+        "task_qa": task_qa
+    }
+
+def __getattr__(name):
+    if name in LAZY_ATTRIBUTES:
+        return get_tasks()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
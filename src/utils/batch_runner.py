@@ -0,0 +1,111 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+
+def load_batch_prompts(batch_file: str) -> List[Dict]:
+    """Charge un fichier JSONL : une ligne par projet, ``{"prompt": ..., "name": ...}`` ou une chaîne"""
+    prompts = []
+    with open(batch_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Ligne de texte brut : la considérer comme le prompt
+                entry = line
+            if isinstance(entry, str):
+                entry = {"prompt": entry}
+            if not isinstance(entry, dict) or not entry.get("prompt"):
+                raise ValueError(f"{batch_file}:{line_number} : champ 'prompt' manquant")
+            entry.setdefault("name", f"projet_{len(prompts) + 1}")
+            prompts.append(entry)
+    return prompts
+
+
+def run_batch(prompts: List[Dict], output_dir: str, concurrency: int = 2, **manager_options) -> List[Dict]:
+    """Exécute plusieurs projets en parallèle, chacun avec son SmartManager et son répertoire"""
+    results = [None] * len(prompts)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {
+            executor.submit(_run_single_project, entry, output_dir, manager_options): index
+            for index, entry in enumerate(prompts)
+        }
+        for future in as_completed(futures):
+            index = futures[future]
+            results[index] = future.result()
+            status = "✅" if results[index]["success"] else "❌"
+            print(f"{status} [{index + 1}/{len(prompts)}] {results[index]['name']} "
+                  f"({results[index]['wall_time']:.1f}s)")
+
+    return results
+
+
+def _run_single_project(entry: Dict, output_dir: str, manager_options: Dict) -> Dict:
+    from src.agents.smart_manager import SmartManager
+
+    result = {
+        "name": entry["name"],
+        "prompt": entry["prompt"],
+        "success": False,
+        "project_directory": None,
+        "wall_time": 0.0,
+        "tokens": {},
+        "error": None
+    }
+    start = time.perf_counter()
+    smart_manager = None
+
+    try:
+        smart_manager = SmartManager(output_directory=output_dir, **manager_options)
+        smart_manager.execute_dynamic_project(entry["prompt"])
+        result["success"] = True
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    finally:
+        result["wall_time"] = time.perf_counter() - start
+        if smart_manager is not None:
+            result["tokens"] = smart_manager.usage.as_dict()
+            if smart_manager.file_writer.project_directory:
+                result["project_directory"] = str(smart_manager.file_writer.project_directory)
+
+    return result
+
+
+def write_batch_summary(results: List[Dict], output_dir: str, wall_time: float) -> Path:
+    summary = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "wall_time": wall_time,
+        "projects": len(results),
+        "succeeded": sum(1 for r in results if r["success"]),
+        "failed": sum(1 for r in results if not r["success"]),
+        "total_tokens": sum(r["tokens"].get("total_tokens", 0) for r in results),
+        "results": results
+    }
+
+    summary_file = Path(output_dir) / f"batch_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    summary_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False)
+
+    print("\n" + "="*70)
+    print("📊 RÉSUMÉ DU BATCH")
+    print("="*70)
+    print(f"{'Projet':<30} {'Statut':<8} {'Durée':>8} {'Tokens':>10}")
+    for r in results:
+        status = "OK" if r["success"] else "ÉCHEC"
+        print(f"{r['name'][:30]:<30} {status:<8} {r['wall_time']:>7.1f}s {r['tokens'].get('total_tokens', 0):>10}")
+        if r["error"]:
+            print(f"    ↳ {r['error']}")
+    print("-"*70)
+    print(f"{summary['succeeded']}/{summary['projects']} projets réussis en {wall_time:.1f}s, "
+          f"{summary['total_tokens']} tokens au total")
+    print(f"📄 Résumé détaillé : {summary_file}")
+
+    return summary_file
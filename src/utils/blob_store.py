@@ -0,0 +1,239 @@
+import errno
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from src.config.paths import get_cache_dir
+from src.utils.file_writer import MANIFEST_FILENAME
+from src.utils.run_journal import JOURNAL_DIRECTORY
+
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+BLOB_STORE_MODES = ("off",) + LINK_MODES
+
+# ioctl FICLONE de Linux : copie-sur-écriture (btrfs, XFS, bcachefs...)
+_FICLONE = 0x40049409
+# Erreurs signifiant « méthode indisponible ici » : on passe à la suivante
+_UNSUPPORTED_ERRNOS = {errno.EXDEV, errno.EPERM, errno.EMLINK, errno.EINVAL, errno.ENOTTY,
+                       getattr(errno, "EOPNOTSUPP", errno.EINVAL), getattr(errno, "ENOTSUP", errno.EINVAL)}
+
+
+class BlobStore:
+    """Stockage des fichiers générés adressé par leur contenu (SHA-256).
+
+    Chaque contenu est écrit une seule fois sous ``objects/ab/cdef...`` (lecture seule) ;
+    les répertoires de projets reçoivent un reflink (copie-sur-écriture), un lien dur
+    ou, à défaut, une copie du blob. ``link_mode=auto`` essaie ces méthodes dans cet
+    ordre. Avec un lien dur, le fichier du projet *est* le blob : il ne doit pas être
+    modifié sur place (un blob dont la taille ne correspond plus est réécrit).
+
+    Les projets qui utilisent le stockage sont enregistrés sous ``projects/`` ; ``gc``
+    supprime les blobs qu'aucun de leurs manifestes ne référence.
+    """
+
+    def __init__(self, root: Optional[Path] = None, link_mode: str = "auto"):
+        if link_mode not in LINK_MODES:
+            raise ValueError(f"Mode de lien inconnu : {link_mode} (attendu : {', '.join(LINK_MODES)})")
+        self.root = Path(root).expanduser() if root else get_cache_dir() / "blobs"
+        self.link_mode = link_mode
+        self.objects = self.root / "objects"
+        self.projects = self.root / "projects"
+        self.objects.mkdir(parents=True, exist_ok=True)
+        self.projects.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        # Méthodes refusées par un système de fichiers (st_dev) : ne pas les retenter à chaque fichier
+        self._unsupported: Set[Tuple[int, str]] = set()
+
+    def blob_path(self, digest: str) -> Path:
+        return self.objects / digest[:2] / digest[2:]
+
+    def put(self, content: str, fsync: bool = False) -> Tuple[str, bool]:
+        """Enregistre un contenu ; retourne son hash et s'il a fallu l'écrire"""
+        data = content.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(digest)
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            stat = None
+        if stat is not None and stat.st_size == len(data):
+            # Blob déjà présent : rafraîchir sa date, qui protège les blobs récents du gc
+            try:
+                os.utime(path)
+            except OSError:
+                pass
+            return digest, False
+
+        path.parent.mkdir(exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                if fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.chmod(tmp_path, 0o444)
+            # Deux écrivains concurrents produisent le même contenu : le dernier renommage l'emporte
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return digest, True
+
+    def link(self, digest: str, target: Path) -> str:
+        """Matérialise un blob en ``target`` (qui ne doit pas exister) ; retourne la méthode utilisée"""
+        source = self.blob_path(digest)
+        methods = ("reflink", "hardlink", "copy") if self.link_mode == "auto" else (self.link_mode,)
+        device = os.stat(Path(target).parent).st_dev
+        for method in methods:
+            if method != "copy" and (device, method) in self._unsupported:
+                continue
+            try:
+                getattr(self, f"_{method}")(source, Path(target))
+                return method
+            except OSError as e:
+                if method == "copy" or e.errno not in _UNSUPPORTED_ERRNOS or self.link_mode != "auto":
+                    raise
+                # EMLINK est propre au blob (trop de liens), pas au système de fichiers
+                if e.errno != errno.EMLINK:
+                    with self._lock:
+                        self._unsupported.add((device, method))
+        raise OSError(f"Impossible de matérialiser le blob {digest}")
+
+    def _reflink(self, source: Path, target: Path):
+        import fcntl
+
+        fd = os.open(str(target), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+        try:
+            with open(source, "rb") as src:
+                fcntl.ioctl(fd, _FICLONE, src.fileno())
+        except BaseException:
+            os.close(fd)
+            os.unlink(target)
+            raise
+        os.close(fd)
+
+    def _hardlink(self, source: Path, target: Path):
+        os.link(source, target)
+
+    def _copy(self, source: Path, target: Path):
+        # copyfile ne reprend pas le mode du blob (lecture seule) : permissions habituelles
+        shutil.copyfile(source, target)
+
+    def register_project(self, project_directory: Path):
+        """Déclare un projet dont le manifeste référence des blobs (lu par ``gc``)"""
+        path = str(Path(project_directory).resolve())
+        ref = self.projects / hashlib.sha256(path.encode("utf-8")).hexdigest()[:24]
+        if not ref.exists():
+            ref.write_text(path, encoding="utf-8")
+
+    def _project_references(self, prune: bool) -> Tuple[Dict[str, Dict[str, str]], int, List[str]]:
+        """Fichiers référencés par projet (chemin -> hash) ; les références de projets supprimés sont retirées"""
+        references = {}
+        stale = 0
+        unreadable = []
+        for ref in sorted(self.projects.iterdir()):
+            try:
+                project = Path(ref.read_text(encoding="utf-8").strip())
+            except OSError:
+                continue
+            if not project.is_dir():
+                stale += 1
+                if prune:
+                    try:
+                        os.unlink(ref)
+                    except FileNotFoundError:
+                        pass
+                continue
+            try:
+                with open(project / JOURNAL_DIRECTORY / MANIFEST_FILENAME, "r", encoding="utf-8") as f:
+                    files = json.load(f).get("files", {})
+                references[str(project)] = {name: record["hash"] for name, record in files.items()}
+            except (OSError, ValueError, KeyError, TypeError):
+                # Projet en cours ou interrompu : sans manifeste, ses blobs restent protégés par leur âge
+                unreadable.append(str(project))
+        return references, stale, unreadable
+
+    def _blobs(self):
+        for directory in self.objects.iterdir():
+            if not directory.is_dir():
+                continue
+            for path in directory.iterdir():
+                if not path.name.startswith("."):
+                    yield directory.name + path.name, path
+
+    def report(self, top: int = 10) -> Dict:
+        """Taille du stockage, volume logique des projets et contenus les plus partagés"""
+        references, stale, unreadable = self._project_references(prune=False)
+        usage: Dict[str, List[str]] = {}
+        for project, files in references.items():
+            for name, digest in files.items():
+                usage.setdefault(digest, []).append(f"{Path(project).name}/{name}")
+
+        blobs = 0
+        stored_bytes = 0
+        logical_bytes = 0
+        sizes = {}
+        for digest, path in self._blobs():
+            size = path.stat().st_size
+            sizes[digest] = size
+            blobs += 1
+            stored_bytes += size
+            logical_bytes += size * len(usage.get(digest, ()))
+
+        shared = sorted(
+            ({"hash": digest, "references": len(paths), "size": sizes.get(digest, 0), "paths": paths[:3]}
+             for digest, paths in usage.items() if len(paths) > 1),
+            key=lambda entry: (-entry["references"], -entry["size"])
+        )
+        return {
+            "root": str(self.root),
+            "projects": len(references),
+            "projects_without_manifest": len(unreadable),
+            "stale_projects": stale,
+            "blobs": blobs,
+            "stored_bytes": stored_bytes,
+            "logical_bytes": logical_bytes,
+            "shared": shared[:top]
+        }
+
+    def gc(self, min_age_seconds: float = 86400, dry_run: bool = False) -> Dict[str, int]:
+        """Supprime les blobs non référencés plus anciens que ``min_age_seconds``.
+
+        Un blob est conservé s'il figure dans le manifeste d'un projet enregistré, s'il a
+        encore des liens durs hors du stockage, ou s'il a été écrit ou réutilisé récemment
+        (projet en cours, dont le manifeste n'est pas encore écrit).
+        """
+        references, stale, _ = self._project_references(prune=not dry_run)
+        live = {digest for files in references.values() for digest in files.values()}
+        now = time.time()
+        removed = 0
+        freed = 0
+        kept = 0
+        for digest, path in self._blobs():
+            stat = path.stat()
+            if digest in live or stat.st_nlink > 1 or now - stat.st_mtime < min_age_seconds:
+                kept += 1
+                continue
+            removed += 1
+            freed += stat.st_size
+            if not dry_run:
+                os.unlink(path)
+        return {"kept": kept, "removed": removed, "freed_bytes": freed,
+                "projects": len(references), "stale_projects": stale}
+
+
+def get_blob_store(mode: Optional[str] = None) -> Optional[BlobStore]:
+    """Stockage configuré par ``mode`` ou AGENT_CODE_BLOB_STORE (off, auto, reflink, hardlink, copy)"""
+    mode = (mode or os.getenv("AGENT_CODE_BLOB_STORE", "off")).strip().lower()
+    if mode not in BLOB_STORE_MODES:
+        raise ValueError(f"Mode de stockage de blobs inconnu : {mode} (attendu : {', '.join(BLOB_STORE_MODES)})")
+    if mode == "off":
+        return None
+    return BlobStore(os.getenv("AGENT_CODE_BLOB_DIR") or None, link_mode=mode)
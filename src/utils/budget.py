@@ -0,0 +1,133 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.utils.ledger import estimate_cost, model_prices
+from src.utils.usage import extract_token_usage
+
+# Limites de sortie par appel arrondies à une puissance de deux : peu de clients LLM distincts
+MIN_OUTPUT_TOKENS = 256
+MAX_OUTPUT_TOKENS = 16384
+
+
+def output_limit(tokens: float) -> Optional[int]:
+    """Limite de sortie d'une allocation : puissance de deux inférieure, au moins MIN_OUTPUT_TOKENS,
+    None (limite du modèle) au-delà de MAX_OUTPUT_TOKENS"""
+    if tokens >= MAX_OUTPUT_TOKENS:
+        return None
+    return max(MIN_OUTPUT_TOKENS, 1 << (max(1, int(tokens)).bit_length() - 1))
+
+
+class RunBudget(BaseCallbackHandler):
+    """Budget d'une exécution : tokens, coût estimé (dollars) et durée (secondes).
+
+    Callback LangChain qui totalise les tokens et le coût de chaque appel LLM.
+    ``allocate`` répartit le reste du budget entre les tâches encore à lancer, selon
+    leur priorité ; ``exhausted`` indique quand l'ordonnanceur doit cesser d'en lancer.
+    Les appels en cours ne sont jamais interrompus.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, max_cost: Optional[float] = None,
+                 deadline: Optional[float] = None):
+        self.max_tokens = max_tokens or None
+        self.max_cost = max_cost or None
+        self.deadline = deadline or None
+        self.tokens = 0
+        self.cost = 0.0
+        self.started: Optional[float] = None
+        self._models: Dict = {}
+        self._lock = threading.Lock()
+
+    @property
+    def limits_usage(self) -> bool:
+        # Budget de tokens ou de coût : les sorties des tâches sont bornées
+        return bool(self.max_tokens or self.max_cost)
+
+    def reset(self):
+        with self._lock:
+            self.tokens = 0
+            self.cost = 0.0
+            self._models.clear()
+            self.started = time.monotonic()
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def _start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        with self._lock:
+            self._models[run_id] = params.get("model_name") or params.get("model")
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        with self._lock:
+            requested_model = self._models.pop(run_id, None)
+            model = (response.llm_output or {}).get("model_name") or requested_model
+            self.tokens += prompt_tokens + completion_tokens
+            self.cost += estimate_cost(model, prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        with self._lock:
+            self._models.pop(run_id, None)
+
+    def exhausted(self) -> Optional[str]:
+        """Raison de l'épuisement du budget, ou None s'il reste de quoi lancer une tâche"""
+        if self.max_tokens and self.tokens >= self.max_tokens:
+            return f"{self.tokens} tokens consommés sur {self.max_tokens}"
+        if self.max_cost and self.cost >= self.max_cost:
+            return f"coût estimé ${self.cost:.4f} sur ${self.max_cost:.2f}"
+        if self.deadline and self.elapsed() >= self.deadline:
+            return f"{self.elapsed():.0f}s écoulées sur {self.deadline:.0f}s"
+        return None
+
+    def allocate(self, nodes: List[Dict], prompt_tokens: Callable[[Dict], int]) -> Dict[str, Optional[int]]:
+        """Limite de sortie par tâche (``{id: tokens}``, None = sans limite).
+
+        Le reste du budget est partagé au prorata de ``(1 + rang de priorité) × nombre
+        de tâches regroupées`` ; l'entrée estimée de chaque tâche (``prompt_tokens``)
+        est déduite de sa part, le coût de sortie est celui du modèle de sa route.
+        """
+        weights = {node["id"]: (1 + node.get("priority", 0)) * len(node.get("parts") or [None]) for node in nodes}
+        total = sum(weights.values()) or 1
+        with self._lock:
+            remaining_tokens = self.max_tokens - self.tokens if self.max_tokens else None
+            remaining_cost = self.max_cost - self.cost if self.max_cost else None
+        prices = model_prices()
+
+        limits = {}
+        for node in nodes:
+            share = weights[node["id"]] / total
+            prompt = prompt_tokens(node)
+            allowances = []
+            if remaining_tokens is not None:
+                allowances.append(remaining_tokens * share - prompt)
+            if remaining_cost is not None:
+                model = node["route"]["model"]
+                output_price = estimate_cost(model, 0, 1_000_000, prices) / 1_000_000
+                # Modèle sans prix connu : le budget de coût ne le limite pas
+                if output_price > 0:
+                    allowances.append((remaining_cost * share - estimate_cost(model, prompt, 0, prices)) / output_price)
+            limits[node["id"]] = output_limit(min(allowances)) if allowances else None
+        return limits
+
+    def summary(self) -> str:
+        parts = []
+        if self.max_tokens:
+            parts.append(f"{self.tokens}/{self.max_tokens} tokens")
+        if self.max_cost:
+            parts.append(f"${self.cost:.4f}/${self.max_cost:.2f}")
+        if self.deadline:
+            parts.append(f"{self.elapsed():.0f}s/{self.deadline:.0f}s")
+        return ", ".join(parts)
+
+    def as_dict(self) -> Dict:
+        return {"tokens": self.tokens, "max_tokens": self.max_tokens, "cost": round(self.cost, 6),
+                "max_cost": self.max_cost, "elapsed": round(self.elapsed(), 3), "deadline": self.deadline}
@@ -0,0 +1,160 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+from src.utils.tracer import traced
+
+# Extensions reconnues dans les en-têtes de fichiers des sorties d'agents
+CODE_FILE_EXTENSIONS = ('js', 'jsx', 'ts', 'tsx', 'py', 'html', 'css', 'json', 'md', 'yml', 'yaml', 'dockerfile')
+
+_EXTENSIONS = '|'.join(CODE_FILE_EXTENSIONS)
+# Les motifs ne s'appliquent qu'à une ligne à la fois : pas de retour arrière sur le texte entier.
+# Un titre peut précéder le nom du fichier (« ## Fichier app.js », « ### File: `app.js` ») :
+# le nom retenu est le dernier mot du titre.
+HEADER_PATTERN = re.compile(
+    r'^(?:#{1,3} (?:[^`\n]*?[\s:])?`?([^\s`]+\.(?:%s))`?:?|`([^\s`]+\.(?:%s))`:)$' % (_EXTENSIONS, _EXTENSIONS)
+)
+FENCE_PATTERN = re.compile(r'^[ \t]*```(\w*)[ \t]*\r?$', re.MULTILINE)
+
+
+class CodeBlockScanner:
+    """Tokenizer incrémental des blocs de code d'une sortie d'agent.
+
+    Un seul passage, en temps linéaire : le texte est parcouru de clôture en
+    clôture (```` ``` ````) avec ``str.find``, sans retour arrière, et seuls le
+    bloc ouvert et les deux dernières lignes sont conservés entre deux appels à
+    ``feed``. Pour chaque bloc fermé, ``on_block(nom_de_fichier, langage, code)``
+    est appelé ; le nom vaut ``None`` si aucun en-tête (``## app.js``,
+    ``### Fichier : app.js``, ```` `src/app.js`: ````) ne précède immédiatement le bloc. Les chemins avec
+    répertoires sont conservés.
+    """
+
+    def __init__(self, on_block: Callable[[Optional[str], str, str], None]):
+        self.on_block = on_block
+        self._buffer = ""
+        self._block_filename: Optional[str] = None
+        self._block_language = ""
+        self._block_parts: Optional[List[str]] = None
+
+    def feed(self, chunk: str):
+        data = self._buffer + chunk if self._buffer else chunk
+        pos = 0
+
+        while True:
+            fence = self._find_fence_line(data, pos, closing=self._block_parts is not None)
+
+            if self._block_parts is not None:
+                if fence is None or fence[0] == "partial":
+                    # Garder la dernière ligne, qui peut être une clôture incomplète
+                    cut = fence[1] if fence else max(pos, data.rfind("\n", pos) + 1)
+                    self._block_parts.append(data[pos:cut])
+                    self._buffer = data[cut:]
+                    return
+                _, line_start, line_end, _ = fence
+                self._block_parts.append(data[pos:line_start])
+                code = "".join(self._block_parts).strip()
+                self._block_parts = None
+                self.on_block(self._block_filename, self._block_language, code)
+                self._block_filename = None
+                pos = line_end + 1
+                continue
+
+            if fence is None or fence[0] == "partial":
+                # Garder la ligne précédente, en-tête potentiel d'un bloc à venir
+                end = fence[1] if fence else max(pos, data.rfind("\n", pos) + 1)
+                self._buffer = data[self._previous_line_start(data, pos, end):]
+                return
+
+            _, line_start, line_end, language = fence
+            self._block_filename = self._header_before(data, pos, line_start)
+            self._block_language = language
+            self._block_parts = []
+            pos = line_end + 1
+
+    def close(self):
+        # La dernière ligne peut être une clôture de bloc sans retour à la ligne ;
+        # un bloc jamais fermé est ignoré
+        if self._buffer:
+            self.feed("\n")
+        self._buffer = ""
+        self._block_parts = None
+
+    def _find_fence_line(self, data: str, pos: int, closing: bool):
+        # Renvoie ("fence", début, fin, langage), ("partial", début) si la ligne
+        # candidate n'est pas encore complète, ou None
+        while True:
+            fence = FENCE_PATTERN.search(data, pos)
+            if fence is None:
+                return None
+            if fence.end() == len(data):
+                return ("partial", fence.start())
+            if not (closing and fence.group(1)):
+                return ("fence", fence.start(), fence.end(), fence.group(1))
+            pos = fence.end() + 1
+
+    def _previous_line_start(self, data: str, pos: int, line_start: int) -> int:
+        if line_start <= pos:
+            return pos
+        return max(pos, data.rfind("\n", pos, line_start - 1) + 1)
+
+    def _header_before(self, data: str, pos: int, line_start: int) -> Optional[str]:
+        # L'en-tête doit se trouver sur la ligne qui précède immédiatement la clôture
+        if line_start <= pos:
+            return None
+        return header_filename(data[self._previous_line_start(data, pos, line_start):line_start - 1])
+
+
+def header_filename(line: str) -> Optional[str]:
+    line = line.strip()
+    if line[:1] not in ("#", "`"):
+        return None
+    header = HEADER_PATTERN.match(line)
+    return (header.group(1) or header.group(2)) if header else None
+
+
+@traced("extraction")
+def scan_code_blocks(text: str) -> List[Dict[str, Optional[str]]]:
+    """Extrait en un passage les blocs ``{'filename', 'language', 'code', 'start', 'end'}`` d'un texte complet.
+
+    Même grammaire que ``CodeBlockScanner``, parcourue directement de clôture en
+    clôture avec ``finditer`` : chaque caractère est lu une fois par le moteur
+    d'expressions régulières et chaque ligne d'en-tête au plus une fois.
+    ``start`` et ``end`` délimitent le contenu brut du bloc, entre ses deux clôtures.
+    """
+    blocks = []
+    content_start = None
+    filename = None
+    language = ""
+
+    for fence in FENCE_PATTERN.finditer(text):
+        if content_start is None:
+            start = fence.start()
+            filename = header_filename(text[text.rfind("\n", 0, start - 1) + 1:start - 1]) if start else None
+            language = fence.group(1)
+            content_start = fence.end() + 1
+        elif not fence.group(1):
+            blocks.append({'filename': filename, 'language': language,
+                           'code': text[content_start:fence.start()].strip(),
+                           'start': content_start, 'end': fence.start()})
+            content_start = None
+
+    return blocks
+
+
+def replace_file_blocks(text: str, replacements: Dict[str, str]) -> str:
+    """Remplace le contenu des blocs attribués aux fichiers de ``replacements``.
+
+    Comme à l'extraction, le dernier bloc d'un nom de fichier est celui qui compte :
+    seul ce bloc est réécrit, à sa position exacte. Un fichier sans bloc est ajouté
+    en fin de texte.
+    """
+    spans = {}
+    for block in scan_code_blocks(text):
+        if block['filename'] in replacements:
+            spans[block['filename']] = (block['start'], block['end'])
+    # De la fin vers le début : les positions des blocs restants ne bougent pas
+    for filename, (start, end) in sorted(spans.items(), key=lambda item: item[1][0], reverse=True):
+        text = text[:start] + replacements[filename] + "\n" + text[end:]
+    for filename, content in replacements.items():
+        if filename not in spans:
+            text += f"\n## {filename}\n```\n{content}\n```\n"
+    return text
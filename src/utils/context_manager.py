@@ -0,0 +1,115 @@
+import re
+from typing import Dict, List, Tuple
+
+from src.utils.code_scanner import HEADER_PATTERN, scan_code_blocks
+from src.utils.tracer import traced
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken est fourni par langchain-openai, mais reste optionnel
+    tiktoken = None
+
+CODE_FENCE_PATTERN = re.compile(r'```.*?(?:```|$)', re.DOTALL)
+
+
+class RollingContext:
+    """Construit le contexte transmis à une tâche dans un budget de tokens.
+
+    Les sorties les plus récentes sont conservées telles quelles ; les plus
+    anciennes sont réduites à un résumé (premières lignes de texte et liste des
+    fichiers produits). Si le budget reste dépassé, les résumés les plus anciens
+    sont abandonnés puis les sorties conservées sont tronquées.
+    """
+
+    def __init__(self, token_budget: int = 6000, keep_recent: int = 2, summary_tokens: int = 80):
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summary_tokens = summary_tokens
+        self._encoding = None
+
+    def count_tokens(self, text: str) -> int:
+        if tiktoken is not None:
+            if self._encoding is None:
+                try:
+                    self._encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    self._encoding = False
+            if self._encoding:
+                return len(self._encoding.encode(text, disallowed_special=()))
+        # Approximation : ~4 caractères par token
+        return (len(text) + 3) // 4
+
+    def summarize(self, label: str, output: str) -> str:
+        files = [block['filename'] for block in scan_code_blocks(output) if block['filename']]
+        prose = CODE_FENCE_PATTERN.sub('', output)
+        lines = [line.strip() for line in prose.splitlines() if line.strip() and not HEADER_PATTERN.match(line.strip())]
+
+        summary = []
+        used = 0
+        for line in lines:
+            cost = self.count_tokens(line)
+            if used + cost > self.summary_tokens:
+                break
+            summary.append(line)
+            used += cost
+
+        text = f"{label} (résumé) :\n" + ("\n".join(summary) if summary else "(pas de description)") + "\n"
+        if files:
+            text += "Fichiers produits : " + ", ".join(dict.fromkeys(files)) + "\n"
+        return text
+
+    @traced("context")
+    def build(self, entries: List[Tuple[str, str]]) -> Tuple[str, Dict[str, int]]:
+        """Assemble le contexte à partir de couples ``(libellé, sortie)`` ordonnés.
+
+        Renvoie le texte du contexte et des statistiques en tokens
+        (``raw_tokens``, ``context_tokens``, ``saved_tokens``, ``compacted``).
+        """
+        verbatim = [f"{label}:\n{output}\n" for label, output in entries]
+        raw_tokens = sum(self.count_tokens(part) for part in verbatim)
+
+        if raw_tokens <= self.token_budget:
+            return "".join(verbatim), {"raw_tokens": raw_tokens, "context_tokens": raw_tokens,
+                                       "saved_tokens": 0, "compacted": 0}
+
+        split = max(0, len(entries) - self.keep_recent)
+        parts = [self.summarize(label, output) for label, output in entries[:split]] + verbatim[split:]
+        costs = [self.count_tokens(part) for part in parts]
+        compacted = split
+
+        # Abandonner les résumés les plus anciens tant que le budget est dépassé
+        dropped = 0
+        while sum(costs) > self.token_budget and dropped < split:
+            costs[dropped] = 0
+            parts[dropped] = ""
+            dropped += 1
+
+        note = ""
+        if dropped:
+            note = f"({dropped} résultat(s) antérieur(s) omis pour respecter le budget de contexte)\n"
+        budget = self.token_budget - self.count_tokens(note)
+
+        # En dernier recours, tronquer les sorties conservées (la plus ancienne d'abord)
+        index = split
+        while sum(costs) > budget and index < len(parts):
+            allowed = max(0, budget - (sum(costs) - costs[index]))
+            parts[index] = self._truncate(parts[index], allowed)
+            costs[index] = self.count_tokens(parts[index])
+            compacted += 1
+            index += 1
+
+        context = note + "".join(parts)
+        context_tokens = self.count_tokens(context)
+        return context, {"raw_tokens": raw_tokens, "context_tokens": context_tokens,
+                         "saved_tokens": max(0, raw_tokens - context_tokens), "compacted": compacted}
+
+    def _truncate(self, text: str, max_tokens: int) -> str:
+        marker = "\n[... sortie tronquée ...]\n"
+        if max_tokens <= self.count_tokens(marker):
+            return ""
+        # Approximation par caractères, affinée si nécessaire
+        limit = max(0, (max_tokens - self.count_tokens(marker)) * 4)
+        truncated = text[:limit]
+        while truncated and self.count_tokens(truncated + marker) > max_tokens:
+            truncated = truncated[:int(len(truncated) * 0.9)]
+        return truncated + marker
@@ -1,12 +1,26 @@
 import os
+import io
 import json
-import re
+import hashlib
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
 from datetime import datetime
+from src.utils.code_scanner import scan_code_blocks
+from src.utils.run_journal import JOURNAL_DIRECTORY
+from src.utils.tracer import trace_span, traced
+
+if TYPE_CHECKING:
+    from src.utils.blob_store import BlobStore
+
+MANIFEST_FILENAME = "manifest.json"
+
 
 class FileWriter:
-    def __init__(self, output_directory: str = None):
+    def __init__(self, output_directory: str = None, write_workers: int = 4, fsync: bool = False,
+                 blob_store: Optional["BlobStore"] = None):
         if output_directory is None:
             # Utiliser le répertoire courant par défaut
             self.output_directory = Path.cwd()
@@ -16,100 +30,327 @@ class FileWriter:
         # Ne pas créer automatiquement de sous-dossier "output"
         self.project_directory = None
         
+        # Manifeste des fichiers extraits (chemin relatif -> hash, rôle, tâche, hash de l'entrée) :
+        # un fichier dont le contenu n'a pas changé n'est pas réécrit
+        self.file_records: Dict[str, Dict] = {}
+        self.files_written = 0
+        self.files_unchanged = 0
+        self._lock = threading.Lock()
+        
+        # Écritures : pool de threads, répertoires créés une seule fois, fsync groupé optionnel
+        self.write_workers = max(1, write_workers)
+        self.fsync = fsync
+        self._created_directories = set()
+        
+        # Stockage adressé par le contenu : les fichiers extraits deviennent des liens vers des blobs partagés
+        self.blob_store = blob_store
+        self.blob_stats = {"created": 0, "reused": 0, "reused_bytes": 0, "links": {}}
+        
     def set_project_directory(self, project_name: str):
         # Créer un dossier avec le nom du projet et timestamp dans le répertoire courant
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.project_directory = self.output_directory / f"{project_name}_{timestamp}"
-        self.project_directory.mkdir(exist_ok=True)
+        self.output_directory.mkdir(parents=True, exist_ok=True)
         
+        # Plusieurs projets peuvent démarrer dans la même seconde (mode batch)
+        suffix = 1
+        while True:
+            name = f"{project_name}_{timestamp}" + (f"_{suffix}" if suffix > 1 else "")
+            self.project_directory = self.output_directory / name
+            try:
+                self.project_directory.mkdir()
+                self._created_directories.add(self.project_directory)
+                break
+            except FileExistsError:
+                suffix += 1
+        if self.blob_store:
+            self.blob_store.register_project(self.project_directory)
+
+    def use_project_directory(self, project_directory: str):
+        # Réutiliser un répertoire de projet existant (reprise d'une exécution interrompue)
+        self.project_directory = Path(project_directory)
+        if not self.project_directory.is_dir():
+            raise FileNotFoundError(f"Répertoire de projet introuvable : {project_directory}")
+        self.output_directory = self.project_directory.parent
+        self.file_records = self.load_manifest().get("files", {})
+        if self.blob_store:
+            self.blob_store.register_project(self.project_directory)
+    
+    @property
+    def manifest_path(self) -> Path:
+        return self.project_directory / JOURNAL_DIRECTORY / MANIFEST_FILENAME
+    
+    def load_manifest(self) -> Dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    @traced("file_writer")
+    def write_manifest(self, prompt: str, tasks: Dict[str, Dict]):
+        """Enregistre les fichiers produits et les tâches (hash de l'entrée et de la sortie)"""
+        with self._lock:
+            manifest = {
+                "version": 1,
+                "generated_at": datetime.now().isoformat(timespec="seconds"),
+                "prompt": prompt,
+                "tasks": tasks,
+                "files": dict(sorted(self.file_records.items()))
+            }
+        self.write_files([(self.manifest_path, json.dumps(manifest, indent=2, ensure_ascii=False))])
+    
+    @traced("file_writer")
+    def write_task_files(self, output: str, origin: Dict) -> List[Path]:
+        """Écrit les fichiers nommés d'une sortie de tâche en les rattachant à leur origine"""
+        plan = []
+        paths = []
+        for filename, content in self._file_structure(scan_code_blocks(output)).items():
+            file_path, unchanged = self._extracted_file_path(filename, content, origin)
+            if not unchanged:
+                plan.append((file_path, content))
+            paths.append(file_path)
+        self.write_files(plan, shared=True)
+        return paths
+
     def extract_code_blocks(self, text: str) -> List[Dict[str, str]]:
-        code_blocks = []
-        
-        # Pattern pour les blocs de code avec langage spécifié
-        pattern = r'```(\w+)?\n(.*?)```'
-        matches = re.findall(pattern, text, re.DOTALL)
-        
-        for language, code in matches:
-            if language and code.strip():
-                code_blocks.append({
-                    'language': language,
-                    'code': code.strip()
-                })
-        
-        return code_blocks
+        return self._code_blocks(scan_code_blocks(text))
     
     def extract_file_structure(self, text: str) -> Dict[str, str]:
-        files = {}
-        
-        # Recherche de structures de fichiers mentionnées
-        file_patterns = [
-            r'# ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
-            r'## ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
-            r'### ([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))\n```\w*\n(.*?)\n```',
-            r'`([^/\n]+\.(?:js|jsx|ts|tsx|py|html|css|json|md|yml|yaml|dockerfile))`:\n```\w*\n(.*?)\n```'
+        return self._file_structure(scan_code_blocks(text))
+    
+    def _code_blocks(self, blocks: List[Dict]) -> List[Dict[str, str]]:
+        # Blocs de code avec langage spécifié
+        return [
+            {'language': block['language'], 'code': block['code']}
+            for block in blocks if block['language'] and block['code']
         ]
-        
-        for pattern in file_patterns:
-            matches = re.findall(pattern, text, re.DOTALL)
-            for filename, content in matches:
-                files[filename.strip()] = content.strip()
-        
+    
+    def _file_structure(self, blocks: List[Dict]) -> Dict[str, str]:
+        # Blocs précédés d'un nom de fichier (les chemins avec répertoires sont conservés)
+        files = {}
+        for block in blocks:
+            if block['filename']:
+                files[block['filename']] = block['code']
         return files
     
     def write_code_file(self, filename: str, content: str, subdirectory: str = None):
         if not self.project_directory:
             raise ValueError("Project directory not set. Call set_project_directory first.")
         
-        target_dir = self.project_directory
-        if subdirectory:
-            target_dir = target_dir / subdirectory
-            target_dir.mkdir(parents=True, exist_ok=True)
+        file_path = self.project_directory / (subdirectory or '') / filename
+        self.write_files([(file_path, content)])
+        return file_path
+    
+    @traced("file_writer")
+    def write_files(self, plan: List[Tuple[Path, str]], shared: bool = False) -> List[Path]:
+        """Écrit un lot de fichiers ; chaque fichier est complet ou absent, jamais tronqué.
+        
+        Les répertoires sont créés une seule fois, les contenus écrits en parallèle dans des
+        fichiers temporaires voisins puis renommés (``os.replace``, atomique). Si une
+        écriture échoue, aucun fichier du lot n'est remplacé ; si un renommage échoue, les
+        fichiers déjà renommés le restent (le lot n'est pas atomique) et les fichiers
+        temporaires restants sont supprimés. Avec ``fsync``, les fichiers
+        temporaires sont synchronisés en parallèle avant les renommages, puis chaque
+        répertoire touché une seule fois.
         
-        file_path = target_dir / filename
+        ``shared`` (fichiers extraits) : avec un stockage de blobs, le fichier temporaire
+        est un lien vers le blob du contenu, écrit seulement s'il n'existe pas encore.
+        """
+        # Une même cible écrite deux fois : la dernière version l'emporte
+        entries = list({Path(path): content for path, content in plan}.items())
+        if not entries:
+            return []
         
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        directories = sorted({path.parent for path, _ in entries})
+        for directory in directories:
+            self._ensure_directory(directory)
         
-        return file_path
+        materialize = self._link_temporary if shared and self.blob_store else self._write_temporary
+        if len(entries) == 1:
+            temporaries = [materialize(*entries[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.write_workers, len(entries)),
+                                    thread_name_prefix="agent-code-write") as executor:
+                futures = [executor.submit(materialize, path, content) for path, content in entries]
+                temporaries = []
+                errors = []
+                for future in futures:
+                    try:
+                        temporaries.append(future.result())
+                    except Exception as e:
+                        errors.append(e)
+                if errors:
+                    for tmp_path in temporaries:
+                        os.unlink(tmp_path)
+                    raise errors[0]
+        
+        renamed = 0
+        try:
+            for (path, _), tmp_path in zip(entries, temporaries):
+                os.replace(tmp_path, path)
+                renamed += 1
+        except BaseException:
+            # Ne pas laisser de fichiers temporaires orphelins dans le projet
+            for tmp_path in temporaries[renamed:]:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+            raise
+        
+        if self.fsync:
+            # Rendre les renommages durables : un fsync par répertoire, pas par fichier
+            for directory in directories:
+                self._fsync_directory(directory)
+        
+        return [path for path, _ in entries]
+    
+    def _ensure_directory(self, directory: Path):
+        if directory in self._created_directories:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._created_directories.add(directory)
+    
+    def _write_temporary(self, path: Path, content: str) -> str:
+        tmp_path = str(path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        # Mode 0666 : le noyau applique l'umask, comme pour un fichier ouvert avec open()
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0), 0o666)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(content)
+                if self.fsync:
+                    f.flush()
+                    os.fsync(f.fileno())
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return tmp_path
+    
+    def _link_temporary(self, path: Path, content: str) -> str:
+        digest, created = self.blob_store.put(content, fsync=self.fsync)
+        tmp_path = path.parent / f".{path.name}.{uuid.uuid4().hex[:8]}.tmp"
+        method = self.blob_store.link(digest, tmp_path)
+        with self._lock:
+            if created:
+                self.blob_stats["created"] += 1
+            else:
+                self.blob_stats["reused"] += 1
+                self.blob_stats["reused_bytes"] += len(content.encode('utf-8'))
+            self.blob_stats["links"][method] = self.blob_stats["links"].get(method, 0) + 1
+        return str(tmp_path)
+    
+    def _fsync_directory(self, directory: Path):
+        try:
+            fd = os.open(str(directory), os.O_RDONLY)
+        except OSError:
+            # Non supporté (Windows) : les fichiers eux-mêmes sont déjà synchronisés
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
     
+    @traced("file_writer")
     def write_agent_output(self, agent_role: str, output: str) -> List[str]:
         if not self.project_directory:
             raise ValueError("Project directory not set. Call set_project_directory first.")
         
-        created_files = []
+        # Plan d'écriture : sortie brute de l'agent puis fichiers extraits
+        raw_output_file, raw_content = self._raw_output_entry(agent_role, output)
+        plan = [(raw_output_file, raw_content)]
+        created_files = [raw_output_file]
         
-        # Créer le dossier pour l'agent
-        agent_dir = self.project_directory / agent_role.lower().replace(' ', '_')
-        agent_dir.mkdir(exist_ok=True)
-        
-        # Sauvegarder la sortie brute
-        raw_output_file = agent_dir / "output.md"
-        with open(raw_output_file, 'w', encoding='utf-8') as f:
-            f.write(f"# Sortie de l'agent: {agent_role}\n\n")
-            f.write(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-            f.write(output)
-        created_files.append(str(raw_output_file))
-        
-        # Extraire et sauvegarder les fichiers de code
-        extracted_files = self.extract_file_structure(output)
+        # Extraire les fichiers de code (un seul passage sur la sortie)
+        blocks = scan_code_blocks(output)
+        extracted_files = self._file_structure(blocks)
         
         for filename, content in extracted_files.items():
-            # Déterminer le sous-dossier basé sur le type de fichier
-            subdirectory = self._get_subdirectory_for_file(filename)
-            file_path = self.write_code_file(filename, content, subdirectory)
-            created_files.append(str(file_path))
+            file_path, unchanged = self._extracted_file_path(filename, content)
+            if not unchanged:
+                plan.append((file_path, content))
+            created_files.append(file_path)
         
         # Si aucun fichier structuré n'est trouvé, extraire les blocs de code
         if not extracted_files:
-            code_blocks = self.extract_code_blocks(output)
+            code_blocks = self._code_blocks(blocks)
             for i, block in enumerate(code_blocks):
                 extension = self._get_extension_for_language(block['language'])
                 filename = f"code_{i+1}.{extension}"
                 subdirectory = self._get_subdirectory_for_language(block['language'])
-                file_path = self.write_code_file(filename, block['code'], subdirectory)
-                created_files.append(str(file_path))
+                file_path = self.project_directory / subdirectory / filename
+                plan.append((file_path, block['code']))
+                created_files.append(file_path)
+        
+        # Deux lots : sortie brute (horodatée) écrite telle quelle, puis fichiers extraits
+        # partagés via le stockage de blobs
+        self.write_files(plan[:1])
+        self.write_files(plan[1:], shared=True)
+        return [str(path) for path in created_files]
+    
+    @traced("file_writer")
+    def write_combined_output(self, agent_role: str, output: str) -> List[str]:
+        """Sortie brute seule : les fichiers nommés, déjà écrits tâche par tâche
+        (``write_task_files``), ne sont ni réextraits ni recomptés"""
+        if not self.project_directory:
+            raise ValueError("Project directory not set. Call set_project_directory first.")
         
-        return created_files
+        raw_output_file, raw_content = self._raw_output_entry(agent_role, output)
+        self.write_files([(raw_output_file, raw_content)])
+        with self._lock:
+            recorded = sorted(self.file_records)
+        return [str(raw_output_file)] + [str(self.project_directory / key) for key in recorded]
+    
+    def _raw_output_entry(self, agent_role: str, output: str) -> Tuple[Path, str]:
+        agent_dir = self.project_directory / agent_role.lower().replace(' ', '_')
+        header = f"# Sortie de l'agent: {agent_role}\n\nDate: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+        return agent_dir / "output.md", header + output
+    
+    def write_extracted_file(self, filename: str, content: str, origin: Optional[Dict] = None) -> Path:
+        file_path, unchanged = self._extracted_file_path(filename, content, origin)
+        if not unchanged:
+            self.write_files([(file_path, content)], shared=True)
+        return file_path
+    
+    def _extracted_file_path(self, filename: str, content: str, origin: Optional[Dict] = None) -> Tuple[Path, bool]:
+        """Chemin cible d'un fichier extrait, et s'il existe déjà avec un contenu identique"""
+        relative_path = self._safe_relative_path(filename)
+        if '/' in relative_path:
+            # Chemin explicite fourni par l'agent : le conserver tel quel
+            subdirectory = None
+        else:
+            # Déterminer le sous-dossier basé sur le type de fichier
+            subdirectory = self._get_subdirectory_for_file(relative_path)
+        file_path = self.project_directory / (subdirectory or '') / relative_path
+        content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        key = file_path.relative_to(self.project_directory).as_posix()
+        
+        with self._lock:
+            record = self.file_records.get(key)
+            # Ne pas réécrire un fichier déjà produit à l'identique (streaming, exécution précédente)
+            unchanged = record is not None and record["hash"] == content_hash and file_path.exists()
+            # Fichier écrit pendant le streaming de la même tâche (pas encore de hash d'entrée) :
+            # déjà compté, la confirmation en fin de tâche n'est pas une réutilisation
+            streamed = (record is not None and origin is not None and record.get("input_hash") is None
+                        and record.get("task") is not None and record.get("task") == origin.get("task"))
+            if record is None or origin:
+                record = {"hash": content_hash, "role": None, "task": None, "input_hash": None}
+                record.update(origin or {})
+                self.file_records[key] = record
+            record["hash"] = content_hash
+            if unchanged and not streamed:
+                self.files_unchanged += 1
+            elif not unchanged:
+                self.files_written += 1
+        
+        return file_path, unchanged
+    
+    def _safe_relative_path(self, filename: str) -> str:
+        # Empêcher toute écriture hors du répertoire du projet (chemins absolus, "..")
+        parts = [part for part in filename.replace('\\', '/').split('/') if part not in ('', '.', '..')]
+        return '/'.join(parts)
     
     def _get_subdirectory_for_file(self, filename: str) -> str:
         if filename.endswith(('.js', '.jsx', '.ts', '.tsx', '.html', '.css')):
@@ -159,13 +400,15 @@ class FileWriter:
         }
         return extensions.get(language.lower(), 'txt')
     
+    @traced("file_writer")
     def write_project_summary(self, project_name: str, agents_used: List[str], files_created: Dict[str, List[str]]):
         if not self.project_directory:
             raise ValueError("Project directory not set. Call set_project_directory first.")
         
         summary_file = self.project_directory / "PROJECT_SUMMARY.md"
         
-        with open(summary_file, 'w', encoding='utf-8') as f:
+        # Composé en mémoire puis écrit atomiquement
+        with io.StringIO() as f:
             f.write(f"# {project_name}\n\n")
             f.write(f"Généré le: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
             
@@ -182,8 +425,13 @@ class FileWriter:
             
             f.write("## Structure du projet\n\n")
             f.write("```\n")
-            self._write_tree_structure(f, self.project_directory, prefix="")
+            # Parcours récursif : un seul span pour toute l'arborescence
+            with trace_span("FileWriter._write_tree_structure", "file_writer"):
+                self._write_tree_structure(f, self.project_directory, prefix="")
             f.write("```\n")
+            content = f.getvalue()
+        
+        self.write_files([(summary_file, content)])
     
     def _write_tree_structure(self, f, directory: Path, prefix: str = ""):
         items = sorted(directory.iterdir(), key=lambda x: (x.is_file(), x.name))
@@ -0,0 +1,419 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from src.config.paths import get_cache_dir
+from src.utils.task_scheduler import priority_rank
+
+QUEUE_FILENAME = "queue.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT,
+    prompt TEXT NOT NULL,
+    output_dir TEXT NOT NULL,
+    options TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'pending',
+    project_name TEXT,
+    project_directory TEXT,
+    analysis TEXT,
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tasks (
+    project_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    role TEXT,
+    priority INTEGER NOT NULL DEFAULT 1,
+    status TEXT NOT NULL DEFAULT 'pending',
+    lease_owner TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    output TEXT,
+    files TEXT,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (project_id, node_id)
+);
+CREATE TABLE IF NOT EXISTS task_dependencies (
+    project_id TEXT NOT NULL,
+    node_id TEXT NOT NULL,
+    depends_on TEXT NOT NULL,
+    PRIMARY KEY (project_id, node_id, depends_on)
+);
+CREATE INDEX IF NOT EXISTS projects_status ON projects (status);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (status);
+"""
+
+# Bail libre : jamais pris, rendu, ou expiré (worker arrêté sans prévenir)
+LEASE_FREE = "(lease_expires IS NULL OR lease_expires < :now)"
+
+# Tâches prêtes (dépendances terminées), puis projets à finaliser, puis projets à analyser :
+# les projets commencés sont terminés avant d'en ouvrir de nouveaux
+PLAN_CANDIDATE = f"""
+SELECT id FROM projects WHERE status = 'pending' AND {LEASE_FREE}
+ORDER BY priority DESC, created_at LIMIT 1
+"""
+TASK_CANDIDATE = f"""
+SELECT t.project_id, t.node_id FROM tasks t JOIN projects p ON p.id = t.project_id
+WHERE p.status = 'running' AND t.status = 'pending' AND (t.lease_expires IS NULL OR t.lease_expires < :now)
+AND NOT EXISTS (
+    SELECT 1 FROM task_dependencies d JOIN tasks u ON u.project_id = d.project_id AND u.node_id = d.depends_on
+    WHERE d.project_id = t.project_id AND d.node_id = t.node_id AND u.status != 'done'
+)
+ORDER BY t.priority DESC, p.priority DESC, p.created_at, t.position LIMIT 1
+"""
+FINALIZE_CANDIDATE = f"""
+SELECT id FROM projects p WHERE status = 'running' AND {LEASE_FREE}
+AND NOT EXISTS (SELECT 1 FROM tasks t WHERE t.project_id = p.id AND t.status != 'done')
+ORDER BY priority DESC, created_at LIMIT 1
+"""
+
+
+class JobQueue:
+    """File de projets et de tâches persistante, partagée par plusieurs processus.
+
+    SQLite en mode WAL (``<cache>/queue.sqlite``). Chaque unité de travail (analyse
+    d'un projet, tâche, finalisation) est prise sous bail : le worker le prolonge
+    tant qu'il travaille, et une unité dont le bail expire est reprise par un autre
+    worker, jusqu'à ``max_attempts`` tentatives.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_attempts: int = 3):
+        self.path = Path(path).expanduser() if path else get_cache_dir() / QUEUE_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Transactions explicites (BEGIN IMMEDIATE) : un seul worker prend une unité donnée
+            connection = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def enqueue(self, prompt: str, output_dir: str, name: Optional[str] = None, priority=None,
+                options: Optional[Dict] = None) -> str:
+        project_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO projects (id, name, prompt, output_dir, options, priority, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (project_id, name, prompt, str(Path(output_dir).absolute()), json.dumps(options or {}),
+                 priority_rank(priority), now, now)
+            )
+        return project_id
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[Dict]:
+        """Prend la prochaine unité de travail : ``{"kind": "plan"|"task"|"finalize", "project": ..., "node_id": ...}``"""
+        now = time.time()
+        with self._transaction() as connection:
+            self._fail_exhausted(connection, now)
+            parameters = {"now": now, "owner": owner, "expires": now + lease_seconds}
+
+            row = connection.execute(TASK_CANDIDATE, parameters).fetchone()
+            if row:
+                connection.execute(
+                    "UPDATE tasks SET lease_owner = :owner, lease_expires = :expires, attempts = attempts + 1, "
+                    "updated_at = :now WHERE project_id = :project_id AND node_id = :node_id",
+                    dict(parameters, project_id=row["project_id"], node_id=row["node_id"])
+                )
+                project = connection.execute("SELECT * FROM projects WHERE id = ?", (row["project_id"],)).fetchone()
+                return {"kind": "task", "project": self._project_dict(project), "node_id": row["node_id"]}
+
+            row = connection.execute(FINALIZE_CANDIDATE, parameters).fetchone()
+            if row:
+                return self._lease_project(connection, "finalize", row["id"], parameters)
+
+            row = connection.execute(PLAN_CANDIDATE, parameters).fetchone()
+            if row:
+                return self._lease_project(connection, "plan", row["id"], parameters)
+        return None
+
+    def _lease_project(self, connection, kind: str, project_id: str, parameters: Dict) -> Dict:
+        connection.execute(
+            "UPDATE projects SET lease_owner = :owner, lease_expires = :expires, attempts = attempts + 1, "
+            "updated_at = :now WHERE id = :project_id",
+            dict(parameters, project_id=project_id)
+        )
+        project = connection.execute("SELECT * FROM projects WHERE id = ?", (project_id,)).fetchone()
+        return {"kind": kind, "project": self._project_dict(project), "node_id": None}
+
+    def _fail_exhausted(self, connection, now: float):
+        # Bail expiré après la dernière tentative autorisée : abandonner l'unité et son projet
+        exhausted = connection.execute(
+            "SELECT project_id, node_id FROM tasks WHERE status = 'pending' AND lease_expires < ? AND attempts >= ?",
+            (now, self.max_attempts)
+        ).fetchall()
+        for row in exhausted:
+            self._mark_task_failed(connection, row["project_id"], row["node_id"],
+                                   f"Bail expiré après {self.max_attempts} tentative(s)", now)
+        connection.execute(
+            "UPDATE projects SET status = 'failed', error = ?, lease_owner = NULL, updated_at = ? "
+            "WHERE status IN ('pending', 'running') AND lease_expires < ? AND attempts >= ?",
+            (f"Bail expiré après {self.max_attempts} tentative(s)", now, now, self.max_attempts)
+        )
+
+    def heartbeat(self, work: Dict, owner: str, lease_seconds: float) -> bool:
+        """Prolonge le bail ; False si l'unité a été reprise par un autre worker"""
+        now = time.time()
+        with self._transaction() as connection:
+            if work["kind"] == "task":
+                cursor = connection.execute(
+                    "UPDATE tasks SET lease_expires = ? WHERE project_id = ? AND node_id = ? AND lease_owner = ? "
+                    "AND status = 'pending'",
+                    (now + lease_seconds, work["project"]["id"], work["node_id"], owner)
+                )
+            else:
+                cursor = connection.execute(
+                    "UPDATE projects SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                    (now + lease_seconds, work["project"]["id"], owner)
+                )
+        return cursor.rowcount == 1
+
+    def complete_plan(self, project_id: str, owner: str, project_name: str, project_directory: str,
+                      analysis: Dict, nodes: List[Dict]) -> bool:
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE projects SET status = ?, project_name = ?, project_directory = ?, analysis = ?, "
+                "lease_owner = NULL, lease_expires = NULL, attempts = 0, error = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'pending'",
+                ("running" if nodes else "succeeded", project_name, project_directory,
+                 json.dumps(analysis, ensure_ascii=False), now, project_id, owner)
+            )
+            if cursor.rowcount != 1:
+                return False
+            connection.executemany(
+                "INSERT INTO tasks (project_id, node_id, position, role, priority, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                [(project_id, node["id"], node["index"], node["role"], node.get("priority", 1), now) for node in nodes]
+            )
+            connection.executemany(
+                "INSERT INTO task_dependencies (project_id, node_id, depends_on) VALUES (?, ?, ?)",
+                [(project_id, node["id"], dep) for node in nodes for dep in node.get("depends_on", [])]
+            )
+        return True
+
+    def complete_task(self, project_id: str, node_id: str, owner: str, output: str, files: Dict) -> bool:
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE tasks SET status = 'done', output = ?, files = ?, lease_owner = NULL, lease_expires = NULL, "
+                "error = NULL, updated_at = ? WHERE project_id = ? AND node_id = ? AND lease_owner = ? AND status = 'pending'",
+                (output, json.dumps(files, ensure_ascii=False), time.time(), project_id, node_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def complete_project(self, project_id: str, owner: str) -> bool:
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE projects SET status = 'succeeded', lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ?",
+                (time.time(), project_id, owner)
+            )
+        return cursor.rowcount == 1
+
+    def release(self, work: Dict, owner: str, error: str):
+        """Échec d'une unité : rendue à la file, ou abandonnée après la dernière tentative"""
+        now = time.time()
+        project_id = work["project"]["id"]
+        with self._transaction() as connection:
+            if work["kind"] == "task":
+                row = connection.execute(
+                    "SELECT attempts FROM tasks WHERE project_id = ? AND node_id = ? AND lease_owner = ?",
+                    (project_id, work["node_id"], owner)
+                ).fetchone()
+                if row is None:
+                    return
+                if row["attempts"] >= self.max_attempts:
+                    self._mark_task_failed(connection, project_id, work["node_id"], error, now)
+                else:
+                    connection.execute(
+                        "UPDATE tasks SET lease_owner = NULL, lease_expires = NULL, error = ?, updated_at = ? "
+                        "WHERE project_id = ? AND node_id = ?",
+                        (error, now, project_id, work["node_id"])
+                    )
+            else:
+                row = connection.execute(
+                    "SELECT attempts FROM projects WHERE id = ? AND lease_owner = ?", (project_id, owner)
+                ).fetchone()
+                if row is None:
+                    return
+                failed = row["attempts"] >= self.max_attempts
+                connection.execute(
+                    "UPDATE projects SET status = CASE WHEN ? THEN 'failed' ELSE status END, lease_owner = NULL, "
+                    "lease_expires = NULL, error = ?, updated_at = ? WHERE id = ?",
+                    (failed, error, now, project_id)
+                )
+
+    @staticmethod
+    def _mark_task_failed(connection, project_id: str, node_id: str, error: str, now: float):
+        connection.execute(
+            "UPDATE tasks SET status = 'failed', lease_owner = NULL, error = ?, updated_at = ? "
+            "WHERE project_id = ? AND node_id = ?",
+            (error, now, project_id, node_id)
+        )
+        connection.execute(
+            "UPDATE projects SET status = 'failed', error = ?, updated_at = ? WHERE id = ?",
+            (f"Tâche {node_id} : {error}", now, project_id)
+        )
+
+    def task_results(self, project_id: str):
+        """Sorties des tâches terminées et fichiers qu'elles ont écrits"""
+        outputs, files = {}, {}
+        rows = self._connection().execute(
+            "SELECT node_id, output, files FROM tasks WHERE project_id = ? AND status = 'done' ORDER BY position",
+            (project_id,)
+        )
+        for row in rows:
+            outputs[row["node_id"]] = row["output"]
+            files.update(json.loads(row["files"] or "{}"))
+        return outputs, files
+
+    def has_unfinished_work(self) -> bool:
+        row = self._connection().execute(
+            "SELECT COUNT(*) FROM projects WHERE status IN ('pending', 'running')"
+        ).fetchone()
+        return row[0] > 0
+
+    def status(self) -> Dict:
+        connection = self._connection()
+        now = time.time()
+        projects = {row[0]: row[1] for row in connection.execute(
+            "SELECT status, COUNT(*) FROM projects GROUP BY status")}
+        tasks = {row[0]: row[1] for row in connection.execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status")}
+        tasks["leased"] = connection.execute(
+            "SELECT COUNT(*) FROM tasks WHERE status = 'pending' AND lease_expires >= ?", (now,)).fetchone()[0]
+        recent = [dict(row) for row in connection.execute(
+            "SELECT id, name, status, project_directory, error FROM projects ORDER BY created_at DESC LIMIT 20")]
+        return {"projects": projects, "tasks": tasks, "recent": recent}
+
+    @staticmethod
+    def _project_dict(row) -> Dict:
+        project = dict(row)
+        project["options"] = json.loads(project["options"] or "{}")
+        project["analysis"] = json.loads(project["analysis"]) if project["analysis"] else None
+        return project
+
+
+class QueueWorker:
+    """Worker d'une file persistante : prend une unité sous bail, la prolonge
+    (heartbeat) pendant son exécution et enregistre son résultat.
+
+    Plusieurs processus workers peuvent partager la même file : le débit croît
+    avec leur nombre jusqu'aux limites de débit de l'API.
+    """
+
+    def __init__(self, queue: JobQueue, lease_seconds: float = 120.0, poll_interval: float = 1.0,
+                 exit_when_idle: bool = False):
+        self.queue = queue
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.exit_when_idle = exit_when_idle
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.processed = 0
+
+    def run(self) -> int:
+        while True:
+            work = self.queue.lease(self.owner, self.lease_seconds)
+            if work is None:
+                # Mode vidage : s'arrêter quand plus aucun projet n'est en attente ou en cours
+                if self.exit_when_idle and not self.queue.has_unfinished_work():
+                    return self.processed
+                time.sleep(self.poll_interval)
+                continue
+            with self._heartbeat(work):
+                self._execute(work)
+            self.processed += 1
+
+    @contextmanager
+    def _heartbeat(self, work: Dict):
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(self.lease_seconds / 3):
+                if not self.queue.heartbeat(work, self.owner, self.lease_seconds):
+                    print(f"⚠️ Bail perdu pour {self._describe(work)}, résultat ignoré")
+                    return
+
+        thread = threading.Thread(target=beat, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+    def _execute(self, work: Dict):
+        from src.agents.smart_manager import SmartManager
+
+        project = work["project"]
+        print(f"🛠️ [{self.owner}] {self._describe(work)}")
+        try:
+            manager = SmartManager(output_directory=project["output_dir"], **project["options"])
+            if work["kind"] == "plan":
+                analysis, nodes = manager.plan_queued_project(project["prompt"])
+                self.queue.complete_plan(project["id"], self.owner, manager.journal.data["project_name"],
+                                         str(manager.file_writer.project_directory), analysis, nodes)
+            elif work["kind"] == "task":
+                outputs, _ = self.queue.task_results(project["id"])
+                output, files = manager.run_queued_task(project["project_directory"], project["project_name"],
+                                                        project["analysis"], work["node_id"], outputs)
+                self.queue.complete_task(project["id"], work["node_id"], self.owner, output, files)
+            else:
+                outputs, files = self.queue.task_results(project["id"])
+                manager.finalize_queued_project(project["project_directory"], project["prompt"], project["project_name"],
+                                                project["analysis"], outputs, files)
+                self.queue.complete_project(project["id"], self.owner)
+        except Exception as e:
+            print(f"❌ {self._describe(work)} : {type(e).__name__}: {e}")
+            self.queue.release(work, self.owner, f"{type(e).__name__}: {e}")
+
+    @staticmethod
+    def _describe(work: Dict) -> str:
+        name = work["project"]["name"] or work["project"]["id"]
+        labels = {"plan": "analyse", "finalize": "finalisation"}
+        return f"{name} : tâche {work['node_id']}" if work["kind"] == "task" else f"{name} : {labels[work['kind']]}"
+
+
+def run_worker_process(queue_path: Optional[str], worker_options: Dict, rate_limits: Dict) -> int:
+    """Point d'entrée d'un processus worker (``agent-code worker --processes N``)"""
+    if any(value is not None for value in rate_limits.values()):
+        from src.config.rate_limiter import configure_rate_limiter
+        configure_rate_limiter(**rate_limits)
+    max_attempts = worker_options.pop("max_attempts", 3)
+    return QueueWorker(JobQueue(queue_path, max_attempts=max_attempts), **worker_options).run()
+
+
+def get_queue_path() -> Optional[str]:
+    return os.getenv("AGENT_CODE_QUEUE") or None
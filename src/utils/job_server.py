@@ -0,0 +1,288 @@
+import json
+import os
+import queue
+import socket
+import socketserver
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+JOB_STATES = ("queued", "running", "succeeded", "failed")
+MAX_REQUEST_BYTES = 1024 * 1024
+
+
+class QueueFullError(RuntimeError):
+    """Levée quand la file des jobs en attente est pleine."""
+
+
+class Job:
+    """Un projet à générer, avec ses événements d'avancement"""
+
+    def __init__(self, prompt: str, name: Optional[str] = None):
+        self.id = uuid.uuid4().hex[:12]
+        self.prompt = prompt
+        self.name = name
+        self.status = "queued"
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.project_directory: Optional[str] = None
+        self.files = 0
+        self.tokens: Dict[str, int] = {}
+        self.error: Optional[str] = None
+        self.events: List[Dict] = []
+        self._condition = threading.Condition()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def emit(self, event: Dict):
+        with self._condition:
+            if event.get("project_directory"):
+                self.project_directory = event["project_directory"]
+            if event.get("event") == "completed":
+                self.files = event.get("files", 0)
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def set_status(self, status: str, **fields):
+        self.status = status
+        self.emit({"event": status, "time": time.time(), **fields})
+
+    def wait_events(self, start: int, timeout: float = 15.0) -> List[Dict]:
+        """Événements à partir de l'indice ``start`` (attend qu'il y en ait, au plus ``timeout``)"""
+        with self._condition:
+            if len(self.events) <= start and not self.finished:
+                self._condition.wait(timeout)
+            return self.events[start:]
+
+    def as_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "prompt": self.prompt,
+            "status": self.status,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "project_directory": self.project_directory,
+            "files": self.files,
+            "tokens": self.tokens,
+            "error": self.error
+        }
+
+
+class JobService:
+    """File de jobs bornée, exécutée par ``concurrency`` threads dans un processus persistant.
+
+    Les imports (crewai, langchain) et le pool de clients restent chargés entre
+    les jobs : seul le SmartManager est recréé pour chaque projet.
+    """
+
+    def __init__(self, output_dir: str, concurrency: int = 2, queue_size: int = 16,
+                 max_finished: int = 200, **manager_options):
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.max_finished = max_finished
+        self.manager_options = manager_options
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=max(1, queue_size))
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+
+    def start(self):
+        # Import au démarrage : le premier job ne paie pas le chargement de crewai
+        from src.agents.smart_manager import SmartManager  # noqa: F401
+
+        for index in range(self.concurrency):
+            worker = threading.Thread(target=self._work, name=f"agent-code-job-{index + 1}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        for _ in self._workers:
+            self._queue.put(None)
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def submit(self, prompt: str, name: Optional[str] = None) -> Job:
+        job = Job(prompt, name)
+        job.emit({"event": "queued", "time": job.submitted_at})
+        # Enregistré avant la mise en file : consultable dès que son exécution commence
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFullError(f"File d'attente pleine ({self._queue.maxsize} jobs en attente)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.list():
+            counts[job.status] += 1
+        return {**counts, "concurrency": self.concurrency, "queue_size": self._queue.maxsize}
+
+    def _prune(self):
+        # Ne conserver que les max_finished derniers jobs terminés
+        finished = [job for job in self._jobs.values() if job.finished]
+        for job in sorted(finished, key=lambda j: j.finished_at)[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+
+    def _work(self):
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                self._queue.task_done()
+
+    def _run(self, job: Job):
+        from src.agents.smart_manager import SmartManager
+
+        job.started_at = time.time()
+        job.set_status("running")
+        manager = None
+        try:
+            manager = SmartManager(output_directory=self.output_dir, progress=job.emit, **self.manager_options)
+            manager.execute_dynamic_project(job.prompt)
+            status, fields = "succeeded", {"project_directory": job.project_directory, "files": job.files}
+        except Exception as e:
+            job.error = f"{type(e).__name__}: {e}"
+            status, fields = "failed", {"error": job.error}
+        finally:
+            job.finished_at = time.time()
+            if manager is not None:
+                job.tokens = manager.usage.as_dict()
+        job.set_status(status, **fields)
+        with self._lock:
+            self._prune()
+
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    """API JSON locale :
+
+    - ``POST /jobs`` ``{"prompt": ..., "name": ...}`` : 202 et le job, 503 si la file est pleine ;
+    - ``GET /jobs``, ``GET /jobs/<id>`` : état, répertoire du projet, tokens ;
+    - ``GET /jobs/<id>/events`` : avancement en NDJSON, diffusé jusqu'à la fin du job ;
+    - ``GET /health`` : compteurs de la file.
+    """
+
+    server_version = "AgentCode/1.0"
+    service: JobService = None
+
+    def do_GET(self):
+        parts = [part for part in urlparse(self.path).path.split("/") if part]
+        if parts == ["health"]:
+            return self._send_json(200, {"status": "ok", **self.service.stats()})
+        if parts == ["jobs"]:
+            return self._send_json(200, {"jobs": [job.as_dict() for job in self.service.list()]})
+        if len(parts) in (2, 3) and parts[0] == "jobs":
+            job = self.service.get(parts[1])
+            if job is None:
+                return self._send_json(404, {"error": f"Job inconnu : {parts[1]}"})
+            if len(parts) == 2:
+                return self._send_json(200, job.as_dict())
+            if parts[2] == "events":
+                return self._stream_events(job)
+        self._send_json(404, {"error": f"Ressource inconnue : {self.path}"})
+
+    def do_POST(self):
+        if urlparse(self.path).path.rstrip("/") != "/jobs":
+            return self._send_json(404, {"error": f"Ressource inconnue : {self.path}"})
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            return self._send_json(413, {"error": "Requête trop volumineuse"})
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "Corps JSON invalide"})
+        prompt = payload.get("prompt") if isinstance(payload, dict) else None
+        if not isinstance(prompt, str) or not prompt.strip():
+            return self._send_json(400, {"error": "Champ 'prompt' manquant"})
+        try:
+            job = self.service.submit(prompt.strip(), payload.get("name"))
+        except QueueFullError as e:
+            return self._send_json(503, {"error": str(e)})
+        self._send_json(202, job.as_dict())
+
+    def _stream_events(self, job: Job):
+        # Réponse sans longueur connue : connexion fermée à la fin du job
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        sent = 0
+        try:
+            while True:
+                events = job.wait_events(sent)
+                for event in events:
+                    self.wfile.write(json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n")
+                self.wfile.flush()
+                sent += len(events)
+                if job.finished and sent >= len(job.events):
+                    break
+        except (BrokenPipeError, ConnectionResetError):
+            # Client déconnecté : le job continue
+            pass
+        self.close_connection = True
+
+    def _send_json(self, status: int, payload: Dict):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def address_string(self) -> str:
+        # Socket Unix : pas d'adresse cliente
+        return self.client_address[0] if self.client_address else "unix"
+
+    def log_message(self, format, *args):
+        if os.getenv("AGENT_CODE_SERVE_LOG", "off").lower() in ("on", "1", "true", "yes"):
+            super().log_message(format, *args)
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
+    """Serveur HTTP sur socket Unix (accès limité par les permissions du fichier)"""
+
+    address_family = socket.AF_UNIX
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.TCPServer.server_bind(self)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def create_server(service: JobService, host: str = "127.0.0.1", port: int = 8765,
+                  socket_path: Optional[str] = None) -> HTTPServer:
+    handler = type("BoundJobRequestHandler", (JobRequestHandler,), {"service": service})
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        server = UnixHTTPServer(socket_path, handler)
+        os.chmod(socket_path, 0o600)
+        return server
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
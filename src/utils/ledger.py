@@ -0,0 +1,196 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextvars import ContextVar, Token
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config.paths import get_cache_dir
+
+LEDGER_FILENAME = "ledger.sqlite"
+
+# Prix indicatifs en dollars par million de tokens (entrée, sortie), par préfixe de modèle.
+# Surchargeables avec AGENT_CODE_MODEL_PRICES='{"gpt-4": [30, 60]}'
+MODEL_PRICES = {
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4-turbo": (10.0, 30.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4": (30.0, 60.0),
+    "gpt-3.5-turbo": (0.5, 1.5),
+}
+
+GROUP_COLUMNS = {
+    "role": "role",
+    "model": "model",
+    "project": "project",
+    "phase": "phase",
+    "run": "run_id",
+    "day": "date(started_at, 'unixepoch', 'localtime')",
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    run_id TEXT,
+    project TEXT,
+    phase TEXT,
+    role TEXT,
+    task_id TEXT,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL DEFAULT 0,
+    completion_tokens INTEGER NOT NULL DEFAULT 0,
+    cached_tokens INTEGER NOT NULL DEFAULT 0,
+    latency REAL NOT NULL DEFAULT 0,
+    retries INTEGER NOT NULL DEFAULT 0,
+    cost REAL NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS llm_calls_started_at ON llm_calls (started_at);
+CREATE INDEX IF NOT EXISTS llm_calls_run ON llm_calls (run_id);
+"""
+
+# Contexte de l'appel LLM en cours (run, projet, phase, rôle, tâche), propagé aux threads
+# de travail par le TaskScheduler via contextvars.copy_context()
+_call_context: ContextVar[Dict[str, str]] = ContextVar("agent_code_call_context", default={})
+
+
+def set_call_context(**fields) -> Token:
+    context = dict(_call_context.get())
+    context.update(fields)
+    return _call_context.set(context)
+
+
+def reset_call_context(token: Token):
+    _call_context.reset(token)
+
+
+def get_call_context() -> Dict[str, str]:
+    return _call_context.get()
+
+
+def model_prices() -> Dict[str, Tuple[float, float]]:
+    prices = dict(MODEL_PRICES)
+    override = os.getenv("AGENT_CODE_MODEL_PRICES")
+    if override:
+        prices.update({model: tuple(value) for model, value in json.loads(override).items()})
+    return prices
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int,
+                  prices: Optional[Dict[str, Tuple[float, float]]] = None) -> float:
+    prices = prices or model_prices()
+    model = (model or "").lower()
+    # Préfixe le plus long : "gpt-4o-mini" avant "gpt-4o" avant "gpt-4"
+    for prefix in sorted(prices, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = prices[prefix]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return 0.0
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # Interpolation linéaire entre les deux rangs encadrants
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class UsageLedger:
+    """Registre SQLite local de tous les appels LLM (tokens, latence, tentatives, coût).
+
+    Partagé par tous les projets : ``<cache>/ledger.sqlite``. Une connexion par
+    thread, journal WAL pour que plusieurs processus (mode batch) puissent écrire.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else get_cache_dir() / LEDGER_FILENAME
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.executescript(SCHEMA)
+            # Registres créés avant l'ajout des tokens en cache
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(llm_calls)")}
+            if "cached_tokens" not in columns:
+                connection.execute("ALTER TABLE llm_calls ADD COLUMN cached_tokens INTEGER NOT NULL DEFAULT 0")
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(str(self.path), timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def record(self, model: Optional[str], prompt_tokens: int, completion_tokens: int, latency: float,
+               cached_tokens: int = 0, retries: int = 0, error: Optional[str] = None, started_at: Optional[float] = None,
+               context: Optional[Dict[str, str]] = None):
+        context = context if context is not None else get_call_context()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO llm_calls (started_at, run_id, project, phase, role, task_id, model, "
+                "prompt_tokens, completion_tokens, cached_tokens, latency, retries, cost, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (started_at or time.time(), context.get("run_id"), context.get("project"),
+                 context.get("phase"), context.get("role"), context.get("task_id"), model,
+                 prompt_tokens, completion_tokens, cached_tokens, latency, retries,
+                 estimate_cost(model, prompt_tokens, completion_tokens), error)
+            )
+
+    def summarize(self, group_by: str = "role", since_days: Optional[float] = None) -> List[Dict]:
+        """Statistiques agrégées : appels, tokens, coût, latences p50/p95, tentatives"""
+        if group_by not in GROUP_COLUMNS:
+            raise ValueError(f"Regroupement inconnu : {group_by} (attendu : {', '.join(GROUP_COLUMNS)})")
+        query = (f"SELECT {GROUP_COLUMNS[group_by]}, prompt_tokens, completion_tokens, cached_tokens, "
+                 f"latency, retries, cost, error FROM llm_calls")
+        parameters = ()
+        if since_days is not None:
+            query += " WHERE started_at >= ?"
+            parameters = (time.time() - since_days * 86400,)
+
+        groups: Dict[str, Dict] = {}
+        rows = self._connection().execute(query, parameters)
+        for key, prompt_tokens, completion_tokens, cached_tokens, latency, retries, cost, error in rows:
+            group = groups.setdefault(key or "-", {
+                "key": key or "-", "calls": 0, "errors": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                "cached_tokens": 0, "retries": 0, "cost": 0.0, "latencies": []
+            })
+            group["calls"] += 1
+            group["errors"] += 1 if error else 0
+            group["prompt_tokens"] += prompt_tokens
+            group["completion_tokens"] += completion_tokens
+            group["cached_tokens"] += cached_tokens
+            group["retries"] += retries
+            group["cost"] += cost
+            group["latencies"].append(latency)
+
+        results = []
+        for group in groups.values():
+            latencies = group.pop("latencies")
+            group["p50_latency"] = percentile(latencies, 0.5)
+            group["p95_latency"] = percentile(latencies, 0.95)
+            results.append(group)
+        return sorted(results, key=lambda g: g["cost"] or g["prompt_tokens"] + g["completion_tokens"], reverse=True)
+
+
+_ledger: Optional[UsageLedger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Optional[UsageLedger]:
+    """Registre du processus, désactivé avec AGENT_CODE_LEDGER=off"""
+    global _ledger
+    if os.getenv("AGENT_CODE_LEDGER", "on").strip().lower() in ("off", "0", "false", "no"):
+        return None
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = UsageLedger()
+        return _ledger
@@ -0,0 +1,130 @@
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config.paths import get_cache_dir
+
+WORD_PATTERN = re.compile(r"\w+")
+PLAN_CACHE_FILENAME = "plans.sqlite"
+
+# Mots trop fréquents pour distinguer deux projets
+STOP_WORDS = {
+    'le', 'la', 'les', 'un', 'une', 'des', 'de', 'du', 'avec', 'pour', 'et', 'ou', 'dans', 'sur',
+    'en', 'au', 'aux', 'à', 'qui', 'que', 'the', 'a', 'an', 'of', 'for', 'with', 'and', 'or', 'to', 'in'
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Mots normalisés (minuscules, sans accents) et bigrammes de mots"""
+    normalized = unicodedata.normalize("NFKD", text.lower())
+    normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+    words = [w for w in WORD_PATTERN.findall(normalized) if w not in STOP_WORDS]
+    # Les bigrammes distinguent "api rest" de "rest api" sans vectoriseur externe
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+class PlanCache:
+    """Cache local des plans d'analyse, retrouvés par similarité de prompt.
+
+    Chaque entrée associe un prompt au dict produit par ``parse_analysis_result``.
+    La recherche calcule une similarité cosinus TF-IDF entre le nouveau prompt
+    et les prompts enregistrés ; au-delà de ``threshold`` le plan est réutilisé
+    et l'appel LLM d'analyse est évité. Les entrées sont stockées dans SQLite :
+    les processus concurrents ajoutent leurs plans sans écraser ceux des autres.
+    """
+
+    def __init__(self, path: Optional[Path] = None, threshold: float = 0.85, max_entries: int = 500):
+        self.path = Path(path) if path else get_cache_dir() / PLAN_CACHE_FILENAME
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(str(self.path), timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS plans (prompt TEXT PRIMARY KEY, plan TEXT NOT NULL, stored_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+
+    def lookup(self, prompt: str) -> Optional[Tuple[Dict, float, str]]:
+        """Retourne (plan, similarité, prompt d'origine) du plan le plus proche, ou None"""
+        with self._lock:
+            rows = self._connection.execute("SELECT prompt, plan FROM plans").fetchall()
+        if not rows:
+            return None
+        documents = [Counter(tokenize(stored_prompt)) for stored_prompt, _ in rows]
+        query = Counter(tokenize(prompt))
+        idf = self._idf(documents + [query])
+        query_vector = self._vector(query, idf)
+
+        best_index, best_score = None, 0.0
+        for index, document in enumerate(documents):
+            score = self._cosine(query_vector, self._vector(document, idf))
+            if score > best_score:
+                best_index, best_score = index, score
+
+        if best_index is None or best_score < self.threshold:
+            return None
+        stored_prompt, plan = rows[best_index]
+        try:
+            return json.loads(plan), best_score, stored_prompt
+        except ValueError:
+            return None
+
+    def store(self, prompt: str, plan: Dict):
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO plans (prompt, plan, stored_at) VALUES (?, ?, ?)",
+                (prompt, json.dumps(plan, ensure_ascii=False), time.time())
+            )
+            # Conserver les plans les plus récents
+            self._connection.execute(
+                "DELETE FROM plans WHERE prompt NOT IN (SELECT prompt FROM plans ORDER BY stored_at DESC LIMIT ?)",
+                (self.max_entries,)
+            )
+            self._connection.commit()
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM plans")
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    @staticmethod
+    def _idf(documents: List[Counter]) -> Dict[str, float]:
+        document_frequency = Counter()
+        for document in documents:
+            document_frequency.update(document.keys())
+        total = len(documents)
+        # IDF lissé : un terme présent partout garde un poids non nul
+        return {term: math.log((1 + total) / (1 + df)) + 1 for term, df in document_frequency.items()}
+
+    @staticmethod
+    def _vector(document: Counter, idf: Dict[str, float]) -> Dict[str, float]:
+        return {term: count * idf[term] for term, count in document.items()}
+
+    @staticmethod
+    def _cosine(a: Dict[str, float], b: Dict[str, float]) -> float:
+        if len(a) > len(b):
+            a, b = b, a
+        dot = sum(weight * b.get(term, 0.0) for term, weight in a.items())
+        norm = math.sqrt(sum(w * w for w in a.values())) * math.sqrt(sum(w * w for w in b.values()))
+        return dot / norm if norm else 0.0
+
+
+def get_plan_cache() -> Optional[PlanCache]:
+    """Cache de plans configuré par AGENT_CODE_PLAN_CACHE (on/off) et AGENT_CODE_PLAN_CACHE_THRESHOLD"""
+    if os.getenv("AGENT_CODE_PLAN_CACHE", "on").strip().lower() in ("off", "0", "false", "no"):
+        return None
+    return PlanCache(threshold=float(os.getenv("AGENT_CODE_PLAN_CACHE_THRESHOLD", "0.85")))
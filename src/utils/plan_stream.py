@@ -0,0 +1,162 @@
+import json
+import threading
+from typing import Callable, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+class PlanStreamParser:
+    """Analyse incrémentale du plan JSON renvoyé par l'analyse du projet.
+
+    Suit l'imbrication des objets, tableaux et chaînes caractère par caractère,
+    sans jamais relire le texte déjà reçu : chaque entrée de ``agents_needed``
+    est renvoyée par ``feed`` dès que son accolade fermante arrive, et
+    ``complexity`` est connue dès que sa valeur est complète. Le texte qui
+    précède la première accolade (prose, balise de bloc de code) est ignoré.
+    """
+
+    def __init__(self):
+        self.fields: Dict[str, str] = {}
+        self.reset()
+
+    def reset(self):
+        # Nouvelle génération (nouvel appel LLM) : repartir de zéro
+        self._text = ""
+        self._stack: List[Dict] = []
+        self._started = False
+        self._done = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None
+        self._pending_key: Optional[str] = None
+
+    def feed(self, chunk: str) -> List[Dict]:
+        entries = []
+        if self._done:
+            return entries
+        offset = len(self._text)
+        self._text += chunk
+        for index in range(offset, len(self._text)):
+            char = self._text[index]
+            if not self._started:
+                if char != "{":
+                    continue
+                self._started = True
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    self._on_string(self._text[self._string_start:index + 1])
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":":
+                self._pending_key = self._last_string
+            elif char == ",":
+                self._pending_key = None
+            elif char in "{[":
+                self._stack.append({"type": char, "key": self._pending_key, "start": index})
+                self._pending_key = None
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                container = self._stack.pop()
+                if char == "}" and self._in_agents_array():
+                    entry = self._decode(self._text[container["start"]:index + 1])
+                    if isinstance(entry, dict):
+                        entries.append(entry)
+                if not self._stack:
+                    self._done = True
+                    break
+        return entries
+
+    def _in_agents_array(self) -> bool:
+        # Objet racine > tableau "agents_needed" > entrée qui vient de se fermer
+        return (len(self._stack) == 2 and self._stack[1]["type"] == "["
+                and self._stack[1]["key"] == "agents_needed")
+
+    def _on_string(self, literal: str):
+        value = self._decode(literal)
+        if self._pending_key is not None and len(self._stack) == 1:
+            # Valeur scalaire d'un champ de premier niveau (complexity, execution_plan...)
+            if isinstance(value, str):
+                self.fields[self._pending_key] = value
+            self._pending_key = None
+        self._last_string = value if isinstance(value, str) else None
+
+    @staticmethod
+    def _decode(text: str):
+        try:
+            return json.loads(text)
+        except ValueError:
+            return None
+
+
+class PlanStreamHandler(BaseCallbackHandler):
+    """Callback LangChain qui transmet à ``on_agent(spec, fields)`` chaque entrée
+    de ``agents_needed`` dès qu'elle est complète pendant le streaming de l'analyse.
+
+    Une entrée déjà transmise (même contenu) ne l'est pas une seconde fois, même si
+    l'agent de planification relance sa génération.
+    """
+
+    def __init__(self, on_agent: Callable[[Dict, Dict[str, str]], None]):
+        self.on_agent = on_agent
+        self.parser = PlanStreamParser()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        with self._lock:
+            self.parser.reset()
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        with self._lock:
+            self.parser.reset()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        with self._lock:
+            entries = self.parser.feed(token)
+            fields = dict(self.parser.fields)
+            fresh = []
+            for entry in entries:
+                key = json.dumps(entry, sort_keys=True, ensure_ascii=False)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    fresh.append(entry)
+        for entry in fresh:
+            self.on_agent(entry, fields)
+
+
+class SpeculationCancelled(Exception):
+    """Démarrage anticipé abandonné pendant son exécution"""
+
+
+class CancellationHandler(BaseCallbackHandler):
+    """Callback d'une tâche anticipée : dès que ``event`` est positionné, son prochain
+    appel LLM échoue avant l'envoi de la requête, et un appel diffusé en streaming
+    s'arrête au token suivant (``raise_error`` : l'exception n'est pas avalée).
+    """
+
+    raise_error = True
+
+    def __init__(self, event: threading.Event):
+        self.event = event
+
+    def on_chat_model_start(self, serialized, messages, **kwargs) -> None:
+        self._check()
+
+    def on_llm_start(self, serialized, prompts, **kwargs) -> None:
+        self._check()
+
+    def on_llm_new_token(self, token: str, **kwargs) -> None:
+        self._check()
+
+    def _check(self):
+        if self.event.is_set():
+            raise SpeculationCancelled("Démarrage anticipé abandonné")
@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+JOURNAL_DIRECTORY = ".agent_code"
+JOURNAL_FILENAME = "journal.json"
+
+
+class RunJournal:
+    """Journal d'exécution d'un projet, enregistré dans le répertoire du projet.
+
+    Contient le prompt, le plan issu de l'analyse et la sortie de chaque tâche
+    terminée. Chaque mise à jour réécrit le fichier de manière atomique (fichier
+    temporaire, fsync puis renommage) : un arrêt brutal laisse toujours la
+    version précédente ou la nouvelle, jamais un fichier tronqué.
+    """
+
+    def __init__(self, project_directory: Path, data: Optional[Dict] = None):
+        self.path = Path(project_directory) / JOURNAL_DIRECTORY / JOURNAL_FILENAME
+        self.data = data or {
+            "version": 1,
+            "status": "running",
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "prompt": None,
+            "project_name": None,
+            "analysis": None,
+            "tasks": {}
+        }
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, project_directory: Path) -> "RunJournal":
+        path = Path(project_directory) / JOURNAL_DIRECTORY / JOURNAL_FILENAME
+        if not path.exists():
+            raise FileNotFoundError(f"Aucun journal d'exécution trouvé dans {project_directory}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(project_directory, json.load(f))
+
+    @classmethod
+    def exists(cls, project_directory: Path) -> bool:
+        return (Path(project_directory) / JOURNAL_DIRECTORY / JOURNAL_FILENAME).exists()
+
+    def start(self, prompt: str, project_name: str):
+        with self._lock:
+            self.data["prompt"] = prompt
+            self.data["project_name"] = project_name
+            self._save()
+
+    def record_analysis(self, analysis: Dict):
+        with self._lock:
+            self.data["analysis"] = analysis
+            self._save()
+
+    def record_task(self, node: Dict, output: str, input_hash: Optional[str] = None):
+        with self._lock:
+            self.data["tasks"][node["id"]] = {
+                "role": node["role"],
+                "description": node["description"],
+                "input_hash": input_hash,
+                "output": output,
+                "completed_at": datetime.now().isoformat(timespec="seconds")
+            }
+            self._save()
+
+    def completed_outputs(self, nodes) -> Dict[str, str]:
+        """Sorties déjà enregistrées pour les noeuds dont le rôle et la tâche n'ont pas changé"""
+        outputs = {}
+        for node in nodes:
+            entry = self.data["tasks"].get(node["id"])
+            if entry and entry["role"] == node["role"] and entry["description"] == node["description"]:
+                outputs[node["id"]] = entry["output"]
+        return outputs
+
+    def mark_completed(self):
+        with self._lock:
+            self.data["status"] = "completed"
+            self.data["completed_at"] = datetime.now().isoformat(timespec="seconds")
+            self._save()
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
@@ -0,0 +1,73 @@
+import threading
+from typing import Callable, Dict, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.utils.code_scanner import CodeBlockScanner
+from src.utils.ledger import get_call_context
+
+
+class StreamingCodeExtractor:
+    """Analyse incrémentale d'une sortie LLM reçue par morceaux.
+
+    S'appuie sur ``CodeBlockScanner`` et appelle ``on_file(nom, langage, contenu)``
+    dès qu'un bloc précédé d'un en-tête de fichier est fermé.
+    """
+
+    def __init__(self, on_file: Callable[[str, str, str], None]):
+        self.on_file = on_file
+        self._scanner = CodeBlockScanner(self._on_block)
+
+    def feed(self, chunk: str):
+        self._scanner.feed(chunk)
+
+    def close(self):
+        self._scanner.close()
+
+    def _on_block(self, filename: Optional[str], language: str, code: str):
+        if filename and code:
+            self.on_file(filename, language, code)
+
+
+class StreamingFileHandler(BaseCallbackHandler):
+    """Callback LangChain qui écrit les fichiers générés au fil des tokens.
+
+    Un extracteur est tenu par exécution LLM (``run_id``), ce qui permet à
+    plusieurs tâches parallèles de partager le même client.
+    """
+
+    def __init__(self, file_writer):
+        self.file_writer = file_writer
+        self._extractors: Dict[UUID, StreamingCodeExtractor] = {}
+        self._lock = threading.Lock()
+
+    def on_llm_new_token(self, token: str, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            extractor = self._extractors.get(run_id)
+            if extractor is None:
+                extractor = StreamingCodeExtractor(self._write_file)
+                self._extractors[run_id] = extractor
+        extractor.feed(token)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs) -> None:
+        self._finish(run_id)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs) -> None:
+        with self._lock:
+            self._extractors.pop(run_id, None)
+
+    def _finish(self, run_id: UUID):
+        with self._lock:
+            extractor = self._extractors.pop(run_id, None)
+        if extractor is not None:
+            extractor.close()
+
+    def _write_file(self, filename: str, language: str, content: str):
+        if not self.file_writer.project_directory:
+            return
+        # Rattacher le fichier à la tâche en cours (contexte d'appel du thread)
+        context = get_call_context()
+        origin = {"role": context.get("role"), "task": context.get("task_id")} if context.get("task_id") else None
+        file_path = self.file_writer.write_extracted_file(filename, content, origin)
+        print(f"📝 Fichier écrit en direct : {file_path}")
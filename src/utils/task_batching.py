@@ -0,0 +1,45 @@
+import re
+from typing import List
+
+# Délimiteurs des sections d'une réponse fusionnée
+SECTION_MARKER = "=== TÂCHE {number} ==="
+SECTION_PATTERN = re.compile(r'^[ \t]*=== TÂCHE (\d+) ===[ \t]*\r?$', re.MULTILINE)
+
+
+def chunk_tasks(descriptions: List[str], output_token_budget: int, tokens_per_task: int = 1000) -> List[List[str]]:
+    """Regroupe les tâches d'un agent en lots dont la sortie estimée tient dans le budget"""
+    per_chunk = max(1, output_token_budget // max(1, tokens_per_task))
+    return [descriptions[i:i + per_chunk] for i in range(0, len(descriptions), per_chunk)]
+
+
+def build_fused_description(parts: List[str], output_token_budget: int) -> str:
+    """Texte d'une requête regroupant plusieurs tâches, avec un délimiteur par section"""
+    sections = "\n".join(f"        {number}. {part}" for number, part in enumerate(parts, 1))
+    markers = "\n".join(f"        {SECTION_MARKER.format(number=number)}" for number in range(1, len(parts) + 1))
+    return f"""Réalise les {len(parts)} tâches suivantes en une seule réponse :
+{sections}
+
+        Commence la réponse de chaque tâche par son délimiteur, seul sur sa ligne, dans cet ordre :
+{markers}
+        Réponse totale limitée à environ {output_token_budget} tokens."""
+
+
+def split_fused_output(output: str, count: int) -> List[str]:
+    """Découpe une réponse fusionnée en ``count`` sections (chaîne vide si une section manque)"""
+    sections = [""] * count
+    matches = list(SECTION_PATTERN.finditer(output))
+    if not matches:
+        # Délimiteurs absents : toute la réponse est rattachée à la première tâche
+        sections[0] = output.strip()
+        return sections
+
+    # Texte éventuel avant le premier délimiteur : rattaché à la première tâche
+    preamble = output[:matches[0].start()].strip()
+    for match, following in zip(matches, matches[1:] + [None]):
+        number = int(match.group(1))
+        if 1 <= number <= count:
+            end = following.start() if following else len(output)
+            sections[number - 1] = output[match.end():end].strip()
+    if preamble:
+        sections[0] = f"{preamble}\n\n{sections[0]}".strip()
+    return sections
@@ -0,0 +1,109 @@
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Rang des priorités émises par le planificateur ("priority" de chaque agent)
+PRIORITY_RANKS = {"critical": 3, "high": 2, "medium": 1, "low": 0}
+
+
+def priority_rank(priority) -> int:
+    if isinstance(priority, int):
+        return priority
+    return PRIORITY_RANKS.get(str(priority or "medium").strip().lower(), PRIORITY_RANKS["medium"])
+
+
+class TaskScheduler:
+    """Exécute un graphe de tâches (DAG) sur un pool de threads borné.
+
+    Chaque noeud est un dictionnaire avec au minimum une clé ``id`` et une
+    liste ``depends_on`` d'identifiants. Un noeud démarre dès que toutes ses
+    dépendances sont terminées ; les noeuds indépendants s'exécutent en parallèle,
+    les plus prioritaires (clé ``priority``, rang numérique) en premier.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max(1, int(max_workers))
+
+    @staticmethod
+    def topological_order(nodes: List[Dict]) -> List[str]:
+        ids = [node["id"] for node in nodes]
+        known = set(ids)
+        pending = {node["id"]: set(node.get("depends_on", [])) & known for node in nodes}
+        order = []
+
+        while pending:
+            ready = [node_id for node_id in ids if node_id in pending and not pending[node_id]]
+            if not ready:
+                raise ValueError(f"Dépendances cycliques entre les tâches : {sorted(pending)}")
+            for node_id in ready:
+                order.append(node_id)
+                del pending[node_id]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+        return order
+
+    @staticmethod
+    def ancestors(nodes: List[Dict]) -> Dict[str, List[str]]:
+        # Ancêtres transitifs de chaque noeud, dans l'ordre de déclaration des noeuds
+        by_id = {node["id"]: node for node in nodes}
+        position = {node["id"]: i for i, node in enumerate(nodes)}
+        result = {}
+
+        for node_id in TaskScheduler.topological_order(nodes):
+            found = set()
+            for dep in by_id[node_id].get("depends_on", []):
+                if dep in by_id:
+                    found.add(dep)
+                    found.update(result[dep])
+            result[node_id] = sorted(found, key=position.get)
+
+        return result
+
+    def run(self, nodes: List[Dict], run_fn: Callable[[Dict, List[Tuple[Dict, str]]], str],
+            completed: Optional[Dict[str, str]] = None,
+            should_stop: Optional[Callable[[], bool]] = None) -> Dict[str, str]:
+        """Exécute ``run_fn(node, upstream)`` pour chaque noeud et renvoie ``{id: sortie}``.
+
+        ``upstream`` contient les couples ``(noeud, sortie)`` de tous les ancêtres du
+        noeud. ``completed`` permet de fournir des sorties déjà connues, qui ne
+        seront pas recalculées. Dès que ``should_stop()`` est vrai, plus aucun noeud
+        n'est lancé : les noeuds en cours se terminent et les sorties obtenues sont
+        renvoyées (résultat partiel).
+        """
+        by_id = {node["id"]: node for node in nodes}
+        ancestors = self.ancestors(nodes)
+        outputs = dict(completed or {})
+        remaining = [node["id"] for node in nodes if node["id"] not in outputs]
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent-code-task") as executor:
+            while remaining or running:
+                if remaining and should_stop is not None and should_stop():
+                    remaining.clear()
+                # Tri stable : à priorité égale, l'ordre du plan est conservé
+                for node_id in sorted(remaining, key=lambda n: -by_id[n].get("priority", 0)):
+                    deps = [dep for dep in by_id[node_id].get("depends_on", []) if dep in by_id]
+                    if all(dep in outputs for dep in deps):
+                        remaining.remove(node_id)
+                        upstream = [(by_id[dep], outputs[dep]) for dep in ancestors[node_id]]
+                        # Propager le contexte (variables de contexte) au thread de travail
+                        ctx = contextvars.copy_context()
+                        future = executor.submit(ctx.run, run_fn, by_id[node_id], upstream)
+                        running[future] = node_id
+
+                if not running:
+                    break
+
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    node_id = running.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        # Ne plus rien lancer et laisser les tâches en cours se terminer
+                        remaining.clear()
+                        wait(list(running))
+                        raise error
+                    outputs[node_id] = future.result()
+
+        return outputs
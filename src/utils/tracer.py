@@ -0,0 +1,197 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# Annotations des spans lourds en mode profilage
+PROFILE_TOP_FUNCTIONS = 15
+PROFILE_TOP_ALLOCATIONS = 10
+
+
+class Tracer:
+    """Chronologie d'une exécution au format Chrome Trace Event (chrome://tracing, Perfetto).
+
+    Chaque span est un événement complet (``"ph": "X"``) placé dans la voie de son
+    thread : les tâches exécutées en parallèle apparaissent sur des lignes distinctes.
+    Avec ``profile=True``, les spans marqués ``heavy`` reçoivent dans leurs arguments
+    les fonctions les plus coûteuses (cProfile) et les plus grosses allocations
+    (écart entre deux instantanés tracemalloc).
+    """
+
+    def __init__(self, path: Path, profile: bool = False):
+        self.path = Path(path)
+        self.profile = profile
+        self.events: List[Dict] = []
+        self._origin = time.perf_counter()
+        self._pid = os.getpid()
+        self._lanes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        # Un seul profileur par thread : les spans lourds imbriqués sont couverts par le plus externe
+        self._local = threading.local()
+        self._started_tracemalloc = False
+        if profile and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def lane(self) -> int:
+        """Voie (``tid``) du thread courant, nommée d'après le thread à sa première utilisation"""
+        ident = threading.get_ident()
+        with self._lock:
+            lane = self._lanes.get(ident)
+            if lane is None:
+                lane = self._lanes[ident] = len(self._lanes) + 1
+                self.events.append({"name": "thread_name", "ph": "M", "pid": self._pid, "tid": lane,
+                                    "args": {"name": threading.current_thread().name}})
+            return lane
+
+    def timestamp(self) -> float:
+        return time.perf_counter()
+
+    def record(self, name: str, category: str, start: float, end: float, lane: int, args: Dict):
+        event = {"name": name, "cat": category, "ph": "X", "pid": self._pid, "tid": lane,
+                 "ts": round((start - self._origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                 "args": args}
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "stage", heavy: bool = False, **args):
+        """Mesure le bloc ; le dictionnaire ``args`` renvoyé peut être complété pendant le bloc"""
+        lane = self.lane()
+        profiler = snapshot = None
+        if heavy and self.profile and not getattr(self._local, "profiling", False):
+            profiler = cProfile.Profile()
+            try:
+                profiler.enable()
+                self._local.profiling = True
+            except ValueError:
+                # Python 3.12+ : un seul profileur actif par processus (spans lourds concurrents)
+                profiler = None
+            snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        start = time.perf_counter()
+        try:
+            yield args
+        except BaseException as e:
+            args["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            end = time.perf_counter()
+            if profiler is not None:
+                profiler.disable()
+                self._local.profiling = False
+            # Second instantané avant l'analyse du profil, qui alloue elle aussi
+            if snapshot is not None:
+                args["allocations"] = _top_allocations(snapshot, tracemalloc.take_snapshot())
+            if profiler is not None:
+                args["profile"] = _top_functions(profiler)
+            self.record(name, category, start, end, lane, args)
+
+    def save(self) -> Path:
+        with self._lock:
+            events = list(self.events)
+        payload = {
+            "traceEvents": [{"name": "process_name", "ph": "M", "pid": self._pid, "tid": 0,
+                             "args": {"name": "agent-code"}}] + events,
+            "displayTimeUnit": "ms"
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(payload, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return self.path
+
+    def close(self):
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+
+def _top_functions(profiler: cProfile.Profile) -> List[str]:
+    stats = pstats.Stats(profiler).stats
+    entries = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:PROFILE_TOP_FUNCTIONS]
+    return [
+        f"{cumulative * 1000:.1f} ms cumulé, {own * 1000:.1f} ms propre, {calls} appel(s) — "
+        f"{_short_path(filename)}:{line}({function})"
+        for (filename, line, function), (_, calls, own, cumulative, _) in entries
+    ]
+
+
+def _top_allocations(before: tracemalloc.Snapshot, after: tracemalloc.Snapshot) -> List[str]:
+    # Allocations du traceur lui-même, de tracemalloc et du profileur exclues
+    ignored = tuple(tracemalloc.Filter(False, filename)
+                    for filename in (tracemalloc.__file__, cProfile.__file__, pstats.__file__, __file__))
+    differences = after.filter_traces(ignored).compare_to(before.filter_traces(ignored), "lineno")
+    return [
+        f"{stat.size_diff / 1024:+.1f} Ko ({stat.count_diff:+d} bloc(s)) — "
+        f"{_short_path(stat.traceback[0].filename)}:{stat.traceback[0].lineno}"
+        for stat in differences[:PROFILE_TOP_ALLOCATIONS] if stat.size_diff
+    ]
+
+
+def _short_path(filename: str) -> str:
+    # Chemins relatifs au site-packages ou au paquet : lisibles dans les visualiseurs
+    index = filename.rfind("site-packages" + os.sep)
+    if index >= 0:
+        return filename[index + len("site-packages" + os.sep):]
+    index = filename.rfind(os.sep + "src" + os.sep)
+    return filename[index + 1:] if index >= 0 else filename
+
+
+_tracer: Optional[Tracer] = None
+
+
+def start_tracing(path: str, profile: bool = False) -> Tracer:
+    """Active la trace du processus (``--trace``) ; ``profile`` ajoute cProfile et tracemalloc"""
+    global _tracer
+    _tracer = Tracer(Path(path).expanduser(), profile=profile)
+    return _tracer
+
+
+def stop_tracing() -> Optional[Path]:
+    """Écrit la trace active et la désactive ; retourne le chemin du fichier"""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    if tracer is None:
+        return None
+    tracer.close()
+    return tracer.save()
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _tracer
+
+
+def trace_span(name: str, category: str = "stage", heavy: bool = False, **args):
+    """Span de la trace active ; sans trace, contexte vide (coût négligeable)"""
+    if _tracer is None:
+        return nullcontext(args)
+    return _tracer.span(name, category, heavy, **args)
+
+
+def traced(category: str, heavy: bool = False) -> Callable:
+    """Décorateur : chaque appel de la fonction devient un span nommé d'après elle"""
+    def decorator(function: Callable) -> Callable:
+        name = function.__qualname__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return function(*args, **kwargs)
+            with _tracer.span(name, category, heavy):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,181 @@
+import threading
+import time
+from typing import TYPE_CHECKING, Dict
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from src.config.rate_limiter import get_rate_limiter
+from src.utils.ledger import UsageLedger, get_call_context
+
+if TYPE_CHECKING:
+    from src.utils.tracer import Tracer
+
+
+class UsageTracker(BaseCallbackHandler):
+    """Callback LangChain qui totalise les tokens consommés par les appels LLM."""
+
+    def __init__(self):
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        # Tokens d'entrée servis par le cache de prompt du fournisseur (préfixe identique)
+        self.cached_tokens = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def on_llm_end(self, response, **kwargs) -> None:
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        cached_tokens = extract_cached_tokens(response)
+        with self._lock:
+            self.calls += 1
+            self.prompt_tokens += prompt_tokens
+            self.completion_tokens += completion_tokens
+            self.cached_tokens += cached_tokens
+
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "total_tokens": self.total_tokens
+        }
+
+
+class LedgerRecorder(BaseCallbackHandler):
+    """Callback LangChain qui inscrit chaque appel LLM dans le registre SQLite."""
+
+    def __init__(self, ledger: UsageLedger):
+        self.ledger = ledger
+        self._pending: Dict = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def _start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        with self._lock:
+            self._pending[run_id] = {
+                "started_at": time.time(),
+                "started": time.perf_counter(),
+                "model": params.get("model_name") or params.get("model"),
+                # Les tentatives se déroulent dans le thread de l'appel
+                "retries": get_rate_limiter().thread_retries(),
+                "context": get_call_context()
+            }
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        call = self._finish(run_id)
+        if call is None:
+            return
+        prompt_tokens, completion_tokens = extract_token_usage(response)
+        model = (response.llm_output or {}).get("model_name") or call["model"]
+        self._record(call, model, prompt_tokens, completion_tokens, extract_cached_tokens(response))
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        call = self._finish(run_id)
+        if call is not None:
+            self._record(call, call["model"], 0, 0, error=f"{type(error).__name__}: {error}")
+
+    def _finish(self, run_id):
+        with self._lock:
+            return self._pending.pop(run_id, None)
+
+    def _record(self, call, model, prompt_tokens, completion_tokens, cached_tokens=0, error=None):
+        try:
+            self.ledger.record(
+                model, prompt_tokens, completion_tokens,
+                cached_tokens=cached_tokens,
+                latency=time.perf_counter() - call["started"],
+                retries=get_rate_limiter().thread_retries() - call["retries"],
+                error=error,
+                started_at=call["started_at"],
+                context=call["context"]
+            )
+        except Exception as e:
+            # Le registre ne doit jamais interrompre une génération
+            print(f"⚠️ Registre d'usage indisponible : {e}")
+
+
+def extract_token_usage(response) -> tuple:
+    """Renvoie ``(prompt_tokens, completion_tokens)`` d'un ``LLMResult``"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    if usage:
+        return usage.get("prompt_tokens", 0) or 0, usage.get("completion_tokens", 0) or 0
+
+    # En streaming, l'usage est porté par les métadonnées du message généré
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            prompt_tokens += metadata.get("input_tokens", 0)
+            completion_tokens += metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+def extract_cached_tokens(response) -> int:
+    """Tokens d'entrée servis par le cache de prompt (``prompt_tokens_details.cached_tokens``)"""
+    usage = (response.llm_output or {}).get("token_usage") or {}
+    details = usage.get("prompt_tokens_details") or {}
+    if details:
+        return details.get("cached_tokens", 0) or 0
+
+    cached_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+            cached_tokens += (metadata.get("input_token_details") or {}).get("cache_read", 0) or 0
+    return cached_tokens
+
+
+class TraceRecorder(BaseCallbackHandler):
+    """Callback LangChain qui ajoute chaque appel LLM à la trace active (``--trace``)."""
+
+    def __init__(self, tracer: "Tracer"):
+        self.tracer = tracer
+        self._pending: Dict = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs) -> None:
+        self._start(run_id, kwargs)
+
+    def _start(self, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        context = get_call_context()
+        with self._lock:
+            # Voie du thread appelant : l'appel s'affiche sous le span de sa tâche
+            self._pending[run_id] = {
+                "start": self.tracer.timestamp(),
+                "lane": self.tracer.lane(),
+                "args": {"model": params.get("model_name") or params.get("model"),
+                         "phase": context.get("phase"), "role": context.get("role"), "task": context.get("task_id")}
+            }
+
+    def on_llm_end(self, response, *, run_id, **kwargs) -> None:
+        call = self._finish(run_id)
+        if call is not None:
+            prompt_tokens, completion_tokens = extract_token_usage(response)
+            self._record(call, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs) -> None:
+        call = self._finish(run_id)
+        if call is not None:
+            self._record(call, error=f"{type(error).__name__}: {error}")
+
+    def _finish(self, run_id):
+        with self._lock:
+            return self._pending.pop(run_id, None)
+
+    def _record(self, call, **args):
+        self.tracer.record(f"LLM {call['args']['model'] or ''}".strip(), "llm", call["start"],
+                           self.tracer.timestamp(), call["lane"], dict(call["args"], **args))
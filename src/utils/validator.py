@@ -0,0 +1,347 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from src.config.paths import get_cache_dir
+from src.utils.tracer import traced
+
+try:
+    import yaml
+except ImportError:  # PyYAML est fourni par langchain, mais reste optionnel
+    yaml = None
+
+try:
+    import tomllib
+except ImportError:  # Python < 3.11 : fichiers TOML non vérifiés
+    tomllib = None
+
+# À incrémenter quand les règles changent : les résultats en cache sont alors ignorés
+VALIDATOR_VERSION = 2
+VALIDATION_CACHE_FILENAME = "validation.sqlite"
+
+# En dessous, la vérification est plus rapide que l'envoi au pool de processus
+INLINE_MAX_FILES = 2
+INLINE_MAX_BYTES = 32 * 1024
+
+# Éléments HTML sans balise fermante, ou dont la fermeture est facultative
+HTML_VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+                  "param", "source", "track", "wbr", "!doctype"}
+HTML_OPTIONAL_CLOSE_TAGS = {"p", "li", "dt", "dd", "tr", "td", "th", "thead", "tbody", "tfoot",
+                            "option", "optgroup", "colgroup", "caption", "rb", "rt", "rp", "html", "head", "body"}
+BRACKETS = {")": "(", "]": "[", "}": "{"}
+# Un "/" après ces caractères ou mots-clés ouvre une expression régulière littérale (JS, TS)
+REGEX_PRECEDING_CHARS = "(,=:[!&|?{};+-*%~^<>"
+REGEX_PRECEDING_KEYWORDS = {"return", "typeof", "case", "in", "of", "delete", "void", "throw",
+                            "yield", "await", "instanceof", "new", "else", "do"}
+
+
+class _HTMLBalanceChecker(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack: List[Tuple[str, int]] = []
+        self.error: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag not in HTML_VOID_TAGS:
+            self.stack.append((tag, self.getpos()[0]))
+
+    def handle_startendtag(self, tag, attrs):
+        pass
+
+    def handle_endtag(self, tag):
+        if self.error or tag in HTML_VOID_TAGS:
+            return
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                unclosed = [name for name, _ in self.stack[index + 1:] if name not in HTML_OPTIONAL_CLOSE_TAGS]
+                if unclosed:
+                    self.error = f"ligne {self.getpos()[0]} : </{tag}> ferme <{unclosed[-1]}> resté ouvert"
+                del self.stack[index:]
+                return
+        if tag not in HTML_OPTIONAL_CLOSE_TAGS:
+            self.error = f"ligne {self.getpos()[0]} : </{tag}> sans balise ouvrante"
+
+
+def _check_html(content: str) -> Optional[str]:
+    checker = _HTMLBalanceChecker()
+    checker.feed(content)
+    checker.close()
+    if checker.error:
+        return checker.error
+    unclosed = [(name, line) for name, line in checker.stack if name not in HTML_OPTIONAL_CLOSE_TAGS]
+    if unclosed:
+        name, line = unclosed[-1]
+        return f"ligne {line} : <{name}> jamais fermé"
+    return None
+
+
+def _regex_literal_end(content: str, index: int) -> int:
+    """Fin (exclue) de l'expression régulière ouverte en ``index``, ou -1 si la ligne ne la ferme pas"""
+    in_class = False
+    end = index + 1
+    while end < len(content):
+        char = content[end]
+        if char == "\\":
+            end += 1
+        elif char == "\n":
+            return -1
+        elif char == "[":
+            in_class = True
+        elif char == "]":
+            in_class = False
+        elif char == "/" and not in_class:
+            return end + 1
+        end += 1
+    return -1
+
+
+def _starts_regex(content: str, index: int, previous: str, regex_after: str) -> bool:
+    if not previous or previous in regex_after:
+        return True
+    if previous.isalpha():
+        start = index
+        while start > 0 and content[start - 1].isspace():
+            start -= 1
+        word_start = start
+        while word_start > 0 and (content[word_start - 1].isalnum() or content[word_start - 1] in "_$"):
+            word_start -= 1
+        return content[word_start:start] in REGEX_PRECEDING_KEYWORDS
+    return False
+
+
+def _check_brackets(content: str, quotes: str, line_comments: bool = True,
+                    regex_after: str = "") -> Optional[str]:
+    """Équilibre des (), [] et {} hors chaînes, commentaires et expressions régulières (JS, TS, CSS).
+
+    ``regex_after`` : caractères après lesquels un "/" ouvre une expression régulière
+    (vide : pas d'expressions régulières littérales, CSS).
+    """
+    stack: List[Tuple[str, int]] = []
+    line = 1
+    index = 0
+    length = len(content)
+    # Dernier caractère significatif (hors blancs et commentaires) : distingue division et regex
+    previous = ""
+    while index < length:
+        char = content[index]
+        if not char.isspace() and not content.startswith("/*", index) \
+                and not (line_comments and content.startswith("//", index)):
+            if char == "/" and regex_after and _starts_regex(content, index, previous, regex_after):
+                end = _regex_literal_end(content, index)
+                if end >= 0:
+                    index = end
+                    previous = ")"
+                    continue
+            previous = char
+        if char == "\n":
+            line += 1
+        elif char == "/" and content.startswith("/*", index):
+            end = content.find("*/", index + 2)
+            end = length if end < 0 else end + 2
+            line += content.count("\n", index, end)
+            index = end
+            continue
+        elif char == "/" and line_comments and content.startswith("//", index):
+            end = content.find("\n", index)
+            index = length if end < 0 else end
+            continue
+        elif char in quotes:
+            # Chaîne : jusqu'au guillemet fermant (une chaîne simple s'arrête en fin de ligne)
+            end = index + 1
+            while end < length and content[end] != char:
+                if content[end] == "\\":
+                    end += 1
+                elif content[end] == "\n":
+                    if char != "`":
+                        break
+                    line += 1
+                end += 1
+            index = end + 1
+            continue
+        elif char in "([{":
+            stack.append((char, line))
+        elif char in BRACKETS:
+            if not stack or stack[-1][0] != BRACKETS[char]:
+                expected = f" (attendu : fermeture de '{stack[-1][0]}' ouvert ligne {stack[-1][1]})" if stack else ""
+                return f"ligne {line} : '{char}' inattendu{expected}"
+            stack.pop()
+        index += 1
+    if stack:
+        char, opened = stack[-1]
+        return f"ligne {opened} : '{char}' jamais fermé"
+    return None
+
+
+def validate_content(filename: str, content: str) -> Optional[str]:
+    """Vérifie un fichier selon son extension ; retourne le message d'erreur, ou None s'il est valide.
+
+    Fonction de module : exécutée dans les processus du pool de validation.
+    """
+    extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+    try:
+        if extension == "py":
+            compile(content, filename, "exec", dont_inherit=True)
+        elif extension == "json":
+            json.loads(content)
+        elif extension in ("yml", "yaml") and yaml is not None:
+            for _ in yaml.safe_load_all(content):
+                pass
+        elif extension == "toml" and tomllib is not None:
+            tomllib.loads(content)
+        elif extension in ("html", "htm"):
+            return _check_html(content)
+        elif extension in ("js", "mjs", "cjs", "ts"):
+            return _check_brackets(content, "\"'`", regex_after=REGEX_PRECEDING_CHARS)
+        elif extension in ("jsx", "tsx"):
+            # Apostrophes fréquentes dans le texte JSX : seuls " et ` délimitent des chaînes ;
+            # "</" ferme une balise, pas une expression régulière
+            return _check_brackets(content, "\"`", regex_after=REGEX_PRECEDING_CHARS.strip("<>"))
+        elif extension in ("css", "scss"):
+            return _check_brackets(content, "\"'", line_comments=extension == "scss")
+    except SyntaxError as e:
+        return f"ligne {e.lineno} : {e.msg}" if e.lineno else str(e.msg)
+    except ValueError as e:
+        # json.JSONDecodeError, tomllib.TOMLDecodeError
+        return str(e)
+    except Exception as e:
+        if yaml is not None and isinstance(e, yaml.YAMLError):
+            return " ".join(str(e).split())
+        raise
+    return None
+
+
+def _validate_batch(items: List[Tuple[str, str]]) -> List[Optional[str]]:
+    return [validate_content(filename, content) for filename, content in items]
+
+
+class FileValidator:
+    """Validation statique des fichiers générés (compile Python, JSON, YAML, TOML,
+    équilibre des balises HTML et des délimiteurs JS/TS/CSS).
+
+    Les résultats sont mis en cache par hash du contenu (SQLite, partagé entre
+    exécutions et processus) ; les fichiers non encore vus sont vérifiés dans un
+    pool de processus, créé à la première utilisation et partagé par les tâches.
+    """
+
+    def __init__(self, workers: Optional[int] = None, cache_path: Optional[Path] = None):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.cache_path = Path(cache_path) if cache_path else get_cache_dir() / VALIDATION_CACHE_FILENAME
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._connection = sqlite3.connect(str(self.cache_path), timeout=30, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (hash TEXT PRIMARY KEY, error TEXT, checked_at REAL NOT NULL)"
+        )
+        self._connection.commit()
+        self.stats = {"files": 0, "cached": 0, "invalid": 0}
+
+    @staticmethod
+    def content_hash(filename: str, content: str) -> str:
+        # L'extension fait partie de la clé : un même contenu peut être valide en .js et pas en .json
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        return hashlib.sha256(f"{VALIDATOR_VERSION}\0{extension}\0{content}".encode("utf-8")).hexdigest()
+
+    @traced("validation")
+    def validate(self, files: Dict[str, str]) -> Dict[str, str]:
+        """Vérifie ``{nom: contenu}`` ; retourne ``{nom: erreur}`` pour les fichiers invalides"""
+        hashes = {filename: self.content_hash(filename, content) for filename, content in files.items()}
+        cached = self._cached_results(list(set(hashes.values())))
+        pending = [(filename, files[filename]) for filename, digest in hashes.items() if digest not in cached]
+
+        results = {filename: cached[digest] for filename, digest in hashes.items() if digest in cached}
+        if pending:
+            for (filename, _), error in zip(pending, self._run(pending)):
+                results[filename] = error
+            self._store([(hashes[filename], results[filename]) for filename, _ in pending])
+
+        errors = {filename: error for filename, error in results.items() if error}
+        with self._lock:
+            self.stats["files"] += len(files)
+            self.stats["cached"] += len(files) - len(pending)
+            self.stats["invalid"] += len(errors)
+        return errors
+
+    def _run(self, items: List[Tuple[str, str]]) -> List[Optional[str]]:
+        if (self.workers <= 1 or len(items) <= INLINE_MAX_FILES
+                or sum(len(content) for _, content in items) <= INLINE_MAX_BYTES):
+            return _validate_batch(items)
+        # Lots équilibrés : un envoi par processus plutôt qu'un par fichier
+        batches = [batch for batch in (items[index::self.workers] for index in range(self.workers)) if batch]
+        try:
+            pool = self._get_pool()
+            futures = [pool.submit(_validate_batch, batch) for batch in batches]
+            by_name = {}
+            for batch, future in zip(batches, futures):
+                for (filename, _), error in zip(batch, future.result()):
+                    by_name[filename] = error
+        except (BrokenProcessPool, OSError) as e:
+            # Pool indisponible (processus tué, programme principal non importable) : vérification sur place
+            print(f"⚠️ Pool de validation indisponible ({type(e).__name__}), vérification dans le processus courant")
+            with self._lock:
+                self.workers = 1
+                if self._pool is not None:
+                    self._pool.shutdown(wait=False)
+                    self._pool = None
+            return _validate_batch(items)
+        return [by_name[filename] for filename, _ in items]
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # spawn : le processus principal exécute des threads (fork risquerait un interblocage)
+                self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    def _cached_results(self, digests: List[str]) -> Dict[str, Optional[str]]:
+        results = {}
+        with self._lock:
+            # Par paquets : limite du nombre de paramètres SQLite
+            for start in range(0, len(digests), 500):
+                chunk = digests[start:start + 500]
+                rows = self._connection.execute(
+                    f"SELECT hash, error FROM results WHERE hash IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                results.update(rows)
+        return results
+
+    def _store(self, entries: List[Tuple[str, Optional[str]]]):
+        now = time.time()
+        with self._lock:
+            self._connection.executemany(
+                "INSERT OR REPLACE INTO results (hash, error, checked_at) VALUES (?, ?, ?)",
+                [(digest, error, now) for digest, error in entries]
+            )
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+            self._connection.close()
+
+
+_validator: Optional[FileValidator] = None
+_validator_lock = threading.Lock()
+
+
+def get_validator() -> FileValidator:
+    """Validateur unique du processus (AGENT_CODE_VALIDATION_WORKERS processus de vérification)"""
+    global _validator
+    with _validator_lock:
+        if _validator is None:
+            workers = int(os.getenv("AGENT_CODE_VALIDATION_WORKERS", "0")) or None
+            _validator = FileValidator(workers=workers)
+        return _validator
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import json
+import os
+
+from src.utils.blob_store import BlobStore
+from src.utils.file_writer import FileWriter, MANIFEST_FILENAME
+from src.utils.run_journal import JOURNAL_DIRECTORY
+
+
+def test_put_writes_each_content_once(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    digest, created = store.put("print('a')\n")
+    assert created
+    assert store.put("print('a')\n") == (digest, False)
+    path = store.blob_path(digest)
+    assert path.read_text() == "print('a')\n"
+    assert path.stat().st_mode & 0o777 == 0o444
+
+
+def test_link_modes_materialize_the_blob(tmp_path):
+    for mode in ("hardlink", "copy", "auto"):
+        store = BlobStore(tmp_path / "blobs", link_mode=mode)
+        digest, _ = store.put("contenu partagé")
+        target = tmp_path / f"{mode}.txt"
+        method = store.link(digest, target)
+        assert target.read_text() == "contenu partagé"
+        assert method == mode or mode == "auto"
+    assert os.path.samefile(tmp_path / "hardlink.txt", store.blob_path(digest))
+
+
+def test_writer_shares_blobs_between_projects(tmp_path):
+    store = BlobStore(tmp_path / "blobs", link_mode="hardlink")
+    for _ in range(2):
+        writer = FileWriter(str(tmp_path / "projets"), blob_store=store)
+        writer.set_project_directory("demo")
+        writer.write_agent_output("Backend Developer", "## app.py\n```python\nprint('ok')\n```\n")
+    assert store.report()["blobs"] == 1
+
+
+def test_gc_keeps_referenced_blobs(tmp_path):
+    store = BlobStore(tmp_path / "blobs", link_mode="copy")
+    kept, _ = store.put("référencé")
+    orphan, _ = store.put("orphelin")
+    project = tmp_path / "projet"
+    (project / JOURNAL_DIRECTORY).mkdir(parents=True)
+    (project / JOURNAL_DIRECTORY / MANIFEST_FILENAME).write_text(
+        json.dumps({"files": {"app.py": {"hash": kept}}}), encoding="utf-8")
+    store.register_project(project)
+
+    assert store.gc(min_age_seconds=0, dry_run=True)["removed"] == 1
+    assert store.blob_path(orphan).exists()
+    result = store.gc(min_age_seconds=0)
+    assert (result["kept"], result["removed"]) == (1, 1)
+    assert store.blob_path(kept).exists() and not store.blob_path(orphan).exists()
+    # Blob récent : protégé tant qu'il est plus jeune que min_age_seconds
+    store.put("orphelin")
+    assert store.gc()["removed"] == 0
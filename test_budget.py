@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+
+from src.utils.budget import MAX_OUTPUT_TOKENS, MIN_OUTPUT_TOKENS, RunBudget, output_limit
+
+
+def test_output_limit():
+    assert output_limit(100) == MIN_OUTPUT_TOKENS
+    assert output_limit(-50) == MIN_OUTPUT_TOKENS
+    assert output_limit(1500) == 1024
+    assert output_limit(2048) == 2048
+    assert output_limit(MAX_OUTPUT_TOKENS) is None
+
+
+def test_allocate_by_priority():
+    budget = RunBudget(max_tokens=10000)
+    budget.reset()
+    nodes = [{"id": "t1", "priority": 2, "route": {"model": "gpt-4o"}},
+             {"id": "t2", "priority": 0, "route": {"model": "gpt-4o"}}]
+    # Parts 3/4 et 1/4 du budget, moins 500 tokens d'entrée chacune
+    assert budget.allocate(nodes, lambda node: 500) == {"t1": 4096, "t2": 1024}
+    assert budget.exhausted() is None
+
+    budget.tokens = 10000
+    assert budget.exhausted() == "10000 tokens consommés sur 10000"
+    assert RunBudget().allocate(nodes, lambda node: 500) == {"t1": None, "t2": None}
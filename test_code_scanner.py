@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+from src.utils.code_scanner import CodeBlockScanner, header_filename, replace_file_blocks, scan_code_blocks
+
+OUTPUT = """Le point d'entrée appelle `f(` puis démarre le serveur.
+
+## utils.js
+```js
+f(1);
+```
+
+## app.js
+```js
+f(
+```
+"""
+
+
+def test_blocks_carry_their_offsets():
+    blocks = scan_code_blocks(OUTPUT)
+    assert [block['filename'] for block in blocks] == ["utils.js", "app.js"]
+    for block in blocks:
+        assert OUTPUT[block['start']:block['end']].strip() == block['code']
+
+
+def test_replace_only_the_attributed_block():
+    # Le contenu invalide "f(" apparaît aussi dans la prose et dans utils.js
+    fixed = replace_file_blocks(OUTPUT, {"app.js": "f();"})
+    assert fixed.startswith("Le point d'entrée appelle `f(` puis")
+    files = {block['filename']: block['code'] for block in scan_code_blocks(fixed)}
+    assert files == {"utils.js": "f(1);", "app.js": "f();"}
+
+
+def test_replace_last_block_of_a_file_or_append():
+    text = "## app.js\n```js\nv1\n```\n\n## app.js\n```js\nv2\n```\n"
+    fixed = replace_file_blocks(text, {"app.js": "v3", "style.css": "a {}"})
+    blocks = scan_code_blocks(fixed)
+    assert [(block['filename'], block['code']) for block in blocks] == [
+        ("app.js", "v1"), ("app.js", "v3"), ("style.css", "a {}")
+    ]
+
+
+def test_header_forms():
+    headers = {
+        "## app.js": "app.js",
+        "### src/routes/api.js": "src/routes/api.js",
+        "`src/app.py`:": "src/app.py",
+        "## Fichier app.js": "app.js",
+        "### File: app.js": "app.js",
+        "### Fichier : `src/app.py`": "src/app.py",
+        "#### app.js": None,
+        "## Installation": None,
+        "## notes.txt": None,
+    }
+    assert {line: header_filename(line) for line in headers} == headers
+
+
+def test_streaming_scanner_matches_full_scan():
+    text = OUTPUT + "### File: b.py\n```python\npass\n```\n"
+    expected = [(block['filename'], block['language'], block['code']) for block in scan_code_blocks(text)]
+    for size in (1, 5, 64):
+        blocks = []
+        scanner = CodeBlockScanner(lambda *block: blocks.append(block))
+        for start in range(0, len(text), size):
+            scanner.feed(text[start:start + size])
+        scanner.close()
+        assert blocks == expected
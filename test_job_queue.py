@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+from src.utils.job_queue import JobQueue
+
+# Bail déjà expiré à sa prise : simule un worker arrêté sans prévenir
+EXPIRED = -1
+LEASE = 60
+
+
+def _queue(tmp_path, max_attempts=3):
+    return JobQueue(tmp_path / "queue.sqlite", max_attempts=max_attempts)
+
+
+def _plan(queue, owner):
+    work = queue.lease(owner, LEASE)
+    assert work["kind"] == "plan"
+    nodes = [{"id": "t1", "index": 0, "role": "Backend", "depends_on": []},
+             {"id": "t2", "index": 1, "role": "Frontend", "depends_on": ["t1"]}]
+    assert queue.complete_plan(work["project"]["id"], owner, "demo", "/tmp/demo", {"agents_needed": []}, nodes)
+    return work["project"]["id"]
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    queue = _queue(tmp_path)
+    project_id = queue.enqueue("API REST", str(tmp_path))
+
+    first = queue.lease("worker-a", EXPIRED)
+    second = queue.lease("worker-b", LEASE)
+    assert first["kind"] == second["kind"] == "plan"
+    assert second["project"]["id"] == project_id
+
+    # L'ancien titulaire a perdu l'unité : ni prolongation ni résultat accepté
+    assert not queue.heartbeat(first, "worker-a", LEASE)
+    assert not queue.complete_plan(project_id, "worker-a", "demo", "/tmp/demo", {}, [])
+    assert queue.heartbeat(second, "worker-b", LEASE)
+
+
+def test_tasks_follow_dependencies_and_are_requeued(tmp_path):
+    queue = _queue(tmp_path)
+    queue.enqueue("API REST", str(tmp_path))
+    project_id = _plan(queue, "worker-a")
+
+    work = queue.lease("worker-a", LEASE)
+    assert (work["kind"], work["node_id"]) == ("task", "t1")
+    # t2 attend t1 : rien d'autre à prendre
+    assert queue.lease("worker-b", LEASE) is None
+
+    queue.release(work, "worker-a", "erreur réseau")
+    retry = queue.lease("worker-b", LEASE)
+    assert (retry["kind"], retry["node_id"]) == ("task", "t1")
+    assert queue.complete_task(project_id, "t1", "worker-b", "sortie t1", {"app.py": "abc"})
+
+    work = queue.lease("worker-a", LEASE)
+    assert work["node_id"] == "t2"
+    assert queue.complete_task(project_id, "t2", "worker-a", "sortie t2", {})
+
+    work = queue.lease("worker-a", LEASE)
+    assert work["kind"] == "finalize"
+    assert queue.complete_project(project_id, "worker-a")
+    assert queue.task_results(project_id) == ({"t1": "sortie t1", "t2": "sortie t2"}, {"app.py": "abc"})
+    assert not queue.has_unfinished_work()
+
+
+def test_exhausted_attempts_fail_the_project(tmp_path):
+    queue = _queue(tmp_path, max_attempts=2)
+    queue.enqueue("API REST", str(tmp_path))
+    project_id = _plan(queue, "worker-a")
+
+    queue.lease("worker-a", EXPIRED)
+    queue.lease("worker-b", EXPIRED)
+    # Deux baux expirés sur t1 : la tâche et son projet sont abandonnés
+    assert queue.lease("worker-c", LEASE) is None
+    status = queue.status()
+    assert status["tasks"]["failed"] == 1
+    assert status["recent"][0]["id"] == project_id
+    assert status["recent"][0]["status"] == "failed"
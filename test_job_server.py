@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from src.utils.job_server import JobService, create_server
+
+
+@pytest.fixture
+def api(tmp_path):
+    # Workers non démarrés : les jobs restent en file, sans crewai ni LLM
+    service = JobService(str(tmp_path), concurrency=1, queue_size=1)
+    server = create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield service, f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _request(url, payload=None, data=None):
+    if payload is not None:
+        data = json.dumps(payload).encode("utf-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data), timeout=10) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def test_submit_and_queue_full(api):
+    service, base = api
+    status, body = _request(f"{base}/jobs", {"prompt": "API REST", "name": "api"})
+    assert status == 202
+    job = json.loads(body)
+    assert (job["status"], job["name"]) == ("queued", "api")
+
+    # File bornée : le second job est refusé et n'est pas conservé
+    status, body = _request(f"{base}/jobs", {"prompt": "Autre projet"})
+    assert status == 503
+    assert len(service.list()) == 1
+
+    status, body = _request(f"{base}/jobs/{job['id']}")
+    assert (status, json.loads(body)["prompt"]) == (200, "API REST")
+    status, body = _request(f"{base}/health")
+    assert json.loads(body)["queued"] == 1
+
+
+def test_invalid_requests(api):
+    _, base = api
+    assert _request(f"{base}/jobs", data=b"{pas du json")[0] == 400
+    assert _request(f"{base}/jobs", {"prompt": "  "})[0] == 400
+    assert _request(f"{base}/jobs/inconnu")[0] == 404
+    assert _request(f"{base}/autre")[0] == 404
+
+
+def test_events_stream_until_the_job_ends(api):
+    service, base = api
+    job = service.submit("API REST")
+    job.set_status("running")
+    job.emit({"event": "completed", "files": 3, "project_directory": "/tmp/projet"})
+    job.set_status("succeeded")
+
+    status, body = _request(f"{base}/jobs/{job.id}/events")
+    events = [json.loads(line)["event"] for line in body.splitlines()]
+    assert status == 200
+    assert events == ["queued", "running", "completed", "succeeded"]
+    assert (job.files, job.project_directory) == (3, "/tmp/projet")
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import json
+import threading
+
+import pytest
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import HumanMessage
+
+from benchmarks.fake_llm import FakeChatModel
+from src.config.client_pool import CallbackRouter, bind_callbacks, reset_callbacks
+from src.utils.plan_stream import CancellationHandler, PlanStreamHandler, PlanStreamParser, SpeculationCancelled
+
+PLAN = {
+    "complexity": "medium",
+    "agents_needed": [
+        {"role": "Backend Developer", "tasks": ["API {REST}", "modèles \"User\""]},
+        {"role": "Frontend Developer", "tasks": ["pages [React]"], "priority": "high"}
+    ],
+    "execution_plan": "backend puis frontend"
+}
+
+
+def _feed(parser, text, size):
+    entries = []
+    for start in range(0, len(text), size):
+        entries.extend(parser.feed(text[start:start + size]))
+    return entries
+
+
+def test_entries_are_emitted_as_they_close():
+    text = "Voici le plan :\n```json\n" + json.dumps(PLAN, ensure_ascii=False) + "\n```"
+    for size in (1, 3, 7, len(text)):
+        parser = PlanStreamParser()
+        assert _feed(parser, text, size) == PLAN["agents_needed"]
+        assert parser.fields == {"complexity": "medium", "execution_plan": "backend puis frontend"}
+
+
+def test_first_entry_before_the_end():
+    text = json.dumps(PLAN)
+    cut = text.index("Frontend")
+    parser = PlanStreamParser()
+    assert parser.feed(text[:cut]) == PLAN["agents_needed"][:1]
+    assert parser.feed(text[cut:]) == PLAN["agents_needed"][1:]
+    # Texte après l'objet racine ignoré
+    assert parser.feed('{"agents_needed": [{"role": "x"}]}') == []
+
+
+def test_handler_skips_entries_already_sent():
+    received = []
+    handler = PlanStreamHandler(lambda spec, fields: received.append((spec["role"], fields.get("complexity"))))
+    text = json.dumps(PLAN)
+    for _ in range(2):
+        # Relance de la génération : le parseur repart de zéro, les doublons sont filtrés
+        handler.on_llm_start({}, [])
+        for start in range(0, len(text), 5):
+            handler.on_llm_new_token(text[start:start + 5])
+    assert received == [("Backend Developer", "medium"), ("Frontend Developer", "medium")]
+
+
+class _TokenCounter(BaseCallbackHandler):
+    def __init__(self, cancel_after=None, event=None):
+        self.tokens = 0
+        self.cancel_after = cancel_after
+        self.event = event
+
+    def on_llm_new_token(self, token, **kwargs):
+        self.tokens += 1
+        if self.tokens == self.cancel_after:
+            self.event.set()
+
+
+def _model(streaming):
+    # Callbacks relayés par le routeur du pool, comme pour les clients partagés
+    return FakeChatModel(latency=0, output_bytes=4096, stream_chunk_size=16, streaming=streaming,
+                         callbacks=[CallbackRouter()])
+
+
+def test_cancelled_speculation_stops_its_llm_calls():
+    cancel = threading.Event()
+    counter = _TokenCounter(cancel_after=3, event=cancel)
+    token = bind_callbacks([counter, CancellationHandler(cancel)])
+    try:
+        with pytest.raises(SpeculationCancelled):
+            _model(streaming=True).invoke([HumanMessage(content="tâche")])
+        # Arrêt dès le token où l'abandon est constaté, bien avant la fin de la réponse
+        assert counter.tokens == 3
+        model = _model(streaming=False)
+        with pytest.raises(SpeculationCancelled):
+            model.invoke([HumanMessage(content="tâche")])
+        # Appel suivant refusé avant l'envoi de la requête
+        assert model.calls == 0
+    finally:
+        reset_callbacks(token)
+
+
+def test_other_callback_errors_are_not_raised():
+    class Broken(BaseCallbackHandler):
+        def on_llm_new_token(self, token, **kwargs):
+            raise RuntimeError("callback défaillant")
+
+    token = bind_callbacks([Broken(), CancellationHandler(threading.Event())])
+    try:
+        assert _model(streaming=True).invoke([HumanMessage(content="tâche")]).content
+    finally:
+        reset_callbacks(token)
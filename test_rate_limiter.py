@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import pytest
+from langchain_core.messages import AIMessageChunk, HumanMessage
+from langchain_core.outputs import ChatGenerationChunk
+from langchain_openai import ChatOpenAI
+
+import src.config.llm_config as llm_config
+from src.config.rate_limiter import AdaptiveRateLimiter
+
+PROMPT = [HumanMessage(content="x" * 400)]
+# 400 caractères / 4 + max_tokens
+ESTIMATED_TOKENS = 100 + 50
+
+
+class FakeError(Exception):
+    status_code = 429
+
+
+def _chunks(usage=True):
+    yield ChatGenerationChunk(message=AIMessageChunk(content="a"))
+    yield ChatGenerationChunk(message=AIMessageChunk(content="b"))
+    if usage:
+        yield ChatGenerationChunk(message=AIMessageChunk(
+            content="", usage_metadata={"input_tokens": 100, "output_tokens": 20, "total_tokens": 120}))
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    limiter = AdaptiveRateLimiter(tokens_per_minute=6000, max_concurrency=2, base_delay=0)
+    monkeypatch.setattr(llm_config, "get_rate_limiter", lambda: limiter)
+    return limiter
+
+
+def _llm():
+    return llm_config.RateLimitedChatOpenAI(model="gpt-4", openai_api_key="test", max_tokens=50, max_retries=0)
+
+
+def test_stream_charges_actual_usage(limiter, monkeypatch):
+    monkeypatch.setattr(ChatOpenAI, "_stream", lambda self, *args, **kwargs: _chunks())
+    assert "".join(chunk.message.content for chunk in _llm()._stream(PROMPT)) == "ab"
+    assert limiter.stats()["in_flight"] == 0
+    # Seau de tokens débité de l'usage réel (120) et non de l'estimation (150)
+    assert limiter.token_bucket.tokens == pytest.approx(6000 - 120, abs=5)
+
+
+def test_stream_closed_early_releases_slot(limiter, monkeypatch):
+    monkeypatch.setattr(ChatOpenAI, "_stream", lambda self, *args, **kwargs: _chunks())
+    for _ in range(3):
+        stream = _llm()._stream(PROMPT)
+        next(stream)
+        stream.close()
+    assert limiter.stats()["in_flight"] == 0
+    assert limiter.stats()["requests"] == 3
+
+
+def test_stream_interrupted_releases_slot(limiter, monkeypatch):
+    def interrupted(self, *args, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content="a"))
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", interrupted)
+    for _ in range(3):
+        with pytest.raises(KeyboardInterrupt):
+            list(_llm()._stream(PROMPT))
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_stream_retries_before_first_chunk(limiter, monkeypatch):
+    calls = []
+
+    def flaky(self, *args, **kwargs):
+        calls.append(1)
+        if len(calls) == 1:
+            raise FakeError("429")
+        yield from _chunks(usage=False)
+
+    monkeypatch.setattr(ChatOpenAI, "_stream", flaky)
+    assert len(list(_llm()._stream(PROMPT))) == 2
+    stats = limiter.stats()
+    assert (stats["in_flight"], stats["requests"], stats["retries"], stats["rate_limited"]) == (0, 2, 1, 1)
+
+
+def test_call_retries_transient_errors(limiter):
+    attempts = []
+
+    def fn():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise FakeError("429")
+        return "ok"
+
+    assert limiter.call(fn, ESTIMATED_TOKENS, usage_fn=lambda result: 10) == "ok"
+    assert limiter.stats()["retries"] == 2
+    assert limiter.stats()["in_flight"] == 0
+    with pytest.raises(ValueError):
+        limiter.call(lambda: (_ for _ in ()).throw(ValueError("définitive")))
+    assert limiter.stats()["in_flight"] == 0
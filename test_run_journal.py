@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import json
+
+import pytest
+
+from src.utils.run_journal import JOURNAL_DIRECTORY, JOURNAL_FILENAME, RunJournal
+from src.utils.task_scheduler import TaskScheduler
+
+NODES = [
+    {"id": "t1", "role": "Backend", "description": "API", "depends_on": []},
+    {"id": "t2", "role": "Frontend", "description": "Pages", "depends_on": ["t1"]},
+]
+
+
+def test_journal_survives_reload(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.start("API REST", "api_rest")
+    journal.record_analysis({"agents_needed": [{"role": "Backend"}]})
+    journal.record_task(NODES[0], "sortie t1", input_hash="abc")
+
+    loaded = RunJournal.load(tmp_path)
+    assert (loaded.data["prompt"], loaded.data["status"]) == ("API REST", "running")
+    assert loaded.data["tasks"]["t1"]["input_hash"] == "abc"
+    loaded.mark_completed()
+    with open(tmp_path / JOURNAL_DIRECTORY / JOURNAL_FILENAME, encoding="utf-8") as f:
+        assert json.load(f)["status"] == "completed"
+    # Écriture atomique : aucun fichier temporaire ne reste
+    assert [path.name for path in (tmp_path / JOURNAL_DIRECTORY).iterdir()] == [JOURNAL_FILENAME]
+
+
+def test_missing_journal(tmp_path):
+    assert not RunJournal.exists(tmp_path)
+    with pytest.raises(FileNotFoundError):
+        RunJournal.load(tmp_path)
+
+
+def test_resume_runs_only_unfinished_tasks(tmp_path):
+    journal = RunJournal(tmp_path)
+    journal.start("API REST", "api_rest")
+    journal.record_task(NODES[0], "sortie t1")
+
+    # Tâche modifiée dans le plan : sa sortie journalisée n'est pas reprise
+    changed = [dict(NODES[0], description="API v2"), NODES[1]]
+    assert RunJournal.load(tmp_path).completed_outputs(changed) == {}
+
+    completed = RunJournal.load(tmp_path).completed_outputs(NODES)
+    assert completed == {"t1": "sortie t1"}
+    ran = []
+    outputs = TaskScheduler(max_workers=2).run(
+        NODES, lambda node, upstream: ran.append((node["id"], upstream[0][1])) or "sortie t2", completed=completed
+    )
+    assert ran == [("t2", "sortie t1")]
+    assert outputs == {"t1": "sortie t1", "t2": "sortie t2"}
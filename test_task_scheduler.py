@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+
+import threading
+
+import pytest
+
+from src.utils.task_scheduler import TaskScheduler, priority_rank
+
+NODES = [
+    {"id": "t1", "depends_on": []},
+    {"id": "t2", "depends_on": ["t1"]},
+    {"id": "t3", "depends_on": []},
+    {"id": "t4", "depends_on": ["t2", "t3"]},
+]
+
+
+def test_topological_order_and_ancestors():
+    assert TaskScheduler.topological_order(NODES) == ["t1", "t3", "t2", "t4"]
+    assert TaskScheduler.ancestors(NODES)["t4"] == ["t1", "t2", "t3"]
+    with pytest.raises(ValueError):
+        TaskScheduler.topological_order([{"id": "a", "depends_on": ["b"]}, {"id": "b", "depends_on": ["a"]}])
+
+
+def test_run_passes_upstream_outputs():
+    seen = {}
+    lock = threading.Lock()
+
+    def run(node, upstream):
+        with lock:
+            seen[node["id"]] = [dep["id"] for dep, _ in upstream]
+        return f"sortie {node['id']}"
+
+    outputs = TaskScheduler(max_workers=3).run(NODES, run, completed={"t1": "reprise"})
+    assert outputs == {"t1": "reprise", "t2": "sortie t2", "t3": "sortie t3", "t4": "sortie t4"}
+    # t1 déjà terminé n'est pas relancé
+    assert seen == {"t2": ["t1"], "t3": [], "t4": ["t1", "t2", "t3"]}
+
+
+def test_run_stops_launching_when_asked():
+    chain = [{"id": "t1", "depends_on": []}, {"id": "t2", "depends_on": ["t1"]}, {"id": "t3", "depends_on": ["t2"]}]
+    started = []
+    outputs = TaskScheduler(max_workers=2).run(
+        chain, lambda node, upstream: started.append(node["id"]) or node["id"],
+        should_stop=lambda: len(started) >= 2
+    )
+    # Résultat partiel : t3 n'est jamais lancé
+    assert outputs == {"t1": "t1", "t2": "t2"}
+
+
+def test_run_raises_task_errors():
+    def run(node, upstream):
+        if node["id"] == "t2":
+            raise RuntimeError("échec t2")
+        return node["id"]
+
+    with pytest.raises(RuntimeError, match="échec t2"):
+        TaskScheduler(max_workers=2).run(NODES, run)
+
+
+def test_priority_rank():
+    assert priority_rank("critical") > priority_rank("High") > priority_rank(None) > priority_rank("low")
+    assert priority_rank("inconnue") == priority_rank("medium")
+    assert priority_rank(5) == 5
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+
+from src.utils.validator import FileValidator, validate_content
+
+
+def test_regex_literals_are_not_brackets():
+    # Parenthèses et accolades dans une expression régulière : pas de faux positif
+    assert validate_content("app.js", "const parts = s.split(/[(]/);") is None
+    assert validate_content("app.js", "if (/\\)/.test(x)) { run(); }") is None
+    assert validate_content("app.ts", "function f() { return /\\}/; }") is None
+    assert validate_content("app.js", "f(/a/, /[/]/);") is None
+
+
+def test_division_is_not_a_regex():
+    assert validate_content("app.js", "const x = (a) / 2 + [b] / (c);") is None
+    assert validate_content("app.js", "const y = total / count;\nf(") == "ligne 2 : '(' jamais fermé"
+
+
+def test_unbalanced_brackets():
+    assert validate_content("app.js", "function f() {\n  return 1;\n") == "ligne 1 : '{' jamais fermé"
+    assert validate_content("app.ts", "f(]") == "ligne 1 : ']' inattendu (attendu : fermeture de '(' ouvert ligne 1)"
+    assert validate_content("app.js", "const s = '(';\n// )\n/* ] */") is None
+
+
+def test_jsx_closing_tags():
+    assert validate_content("App.jsx", "<ul>{items.map(i => (<li>{i}</li>))}</ul>") is None
+    assert validate_content("App.tsx", "<p>L'utilisateur {name}</p>") is None
+
+
+def test_other_formats():
+    assert validate_content("main.py", "def f():\n    return 1\n") is None
+    assert validate_content("main.py", "def f(:\n").startswith("ligne 1")
+    assert validate_content("package.json", '{"name": "app"}') is None
+    assert validate_content("package.json", '{"name": }') is not None
+    assert validate_content("index.html", "<div><p>texte</div>") is None
+    assert validate_content("index.html", "<div><span>texte</div>") == "ligne 1 : </div> ferme <span> resté ouvert"
+    assert validate_content("style.css", "a { background: url(/img/x.png); }") is None
+    assert validate_content("README.md", "(") is None
+
+
+def test_validator_cache(tmp_path):
+    validator = FileValidator(workers=1, cache_path=tmp_path / "validation.sqlite")
+    files = {"app.js": "f(", "ok.js": "f();"}
+    try:
+        first = validator.validate(files)
+        second = validator.validate(files)
+    finally:
+        validator.close()
+    # Seuls les fichiers invalides sont renvoyés ; le second passage vient du cache
+    assert first == second == {"app.js": "ligne 1 : '(' jamais fermé"}
+    assert validator.stats["cached"] == 2
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+
+import os
+
+import pytest
+
+import src.utils.file_writer as file_writer
+from src.utils.file_writer import FileWriter
+
+
+def _writer(tmp_path):
+    writer = FileWriter(str(tmp_path))
+    writer.set_project_directory("demo")
+    return writer
+
+
+def test_write_files_replaces_every_target(tmp_path):
+    writer = _writer(tmp_path)
+    root = writer.project_directory
+    (root / "a.txt").write_text("ancien")
+    writer.write_files([(root / "a.txt", "a"), (root / "src" / "b.txt", "b"), (root / "a.txt", "a2")])
+    assert (root / "a.txt").read_text() == "a2"
+    assert (root / "src" / "b.txt").read_text() == "b"
+    assert not list(root.rglob("*.tmp"))
+
+
+def test_failed_rename_leaves_no_temporaries(tmp_path, monkeypatch):
+    writer = _writer(tmp_path)
+    root = writer.project_directory
+    real_replace = os.replace
+    calls = []
+
+    def failing_replace(source, target):
+        calls.append(target)
+        if len(calls) == 2:
+            raise OSError("disque plein")
+        real_replace(source, target)
+
+    monkeypatch.setattr(file_writer.os, "replace", failing_replace)
+    with pytest.raises(OSError):
+        writer.write_files([(root / name, name) for name in ("a.txt", "b.txt", "c.txt")])
+    # Chaque fichier est complet ou absent ; aucun fichier temporaire ne reste
+    assert sorted(path.name for path in root.iterdir()) == ["a.txt"]
+    assert (root / "a.txt").read_text() == "a.txt"